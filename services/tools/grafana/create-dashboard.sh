@@ -33,10 +33,8 @@ done
 
 set -e
 
-# Setup Python environment and run the dashboard creation script
+# Run the dashboard creation script; uv run syncs the environment only when needed
 cd "${SCRIPT_DIR}"
-echo "=== Setting up Python environment ==="
-uv sync
 
 echo "=== Creating Grafana dashboard ==="
 if [[ "$WITH_ALERTS" == true ]]; then
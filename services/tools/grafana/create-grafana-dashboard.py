@@ -4,54 +4,1543 @@ Create Grafana dashboard for disk monitoring.
 Reads configuration from Ansible files and creates a disk usage visualization dashboard.
 """
 
+import time
+
+IMPORT_STARTED = time.perf_counter()
+
 import json
-import yaml
-import requests
 import argparse
+import copy
+import functools
+import hashlib
+import math
+import os
+import random
+import re
 import sys
+import threading
+from contextlib import contextmanager
 from pathlib import Path
+from urllib.parse import urlsplit
+
+# requests, yaml, concurrent.futures and email.utils are imported where they
+# are first needed, so offline commands and cached runs never load them
+IMPORT_FINISHED = time.perf_counter()
+
+
+def counting_http_adapter(on_new_connection, **kwargs):
+    """HTTPAdapter that reports every new TCP/TLS connection it opens."""
+    from requests.adapters import HTTPAdapter
+
+    class CountingHTTPAdapter(HTTPAdapter):
+        def init_poolmanager(self, *args, **kwargs):
+            super().init_poolmanager(*args, **kwargs)
+
+            def counting(pool_cls):
+                def _new_conn(pool):
+                    on_new_connection()
+                    return pool_cls._new_conn(pool)
+                return type(pool_cls.__name__, (pool_cls,), {'_new_conn': _new_conn})
+
+            # Replace the (module-global) mapping rather than mutating it
+            self.poolmanager.pool_classes_by_scheme = {
+                scheme: counting(pool_cls)
+                for scheme, pool_cls in self.poolmanager.pool_classes_by_scheme.items()
+            }
+
+    return CountingHTTPAdapter(**kwargs)
+
+
+class GrafanaClient:
+    """Pooled keep-alive HTTP client for the Grafana API with timeouts and retries."""
+
+    # Grafana rejected the request before doing any work, safe to retry any method
+    RETRY_ALWAYS = {429, 503}
+    # Gateway/server errors, only retried for idempotent methods
+    RETRY_IDEMPOTENT = {500, 502, 504}
+    IDEMPOTENT_METHODS = {'GET', 'HEAD', 'PUT', 'DELETE', 'OPTIONS'}
+
+    def __init__(self, headers, connect_timeout=5, read_timeout=30, max_retries=4,
+                 backoff_factor=0.5, max_backoff=30, pool_size=10, metrics=None):
+        self.timeout = (connect_timeout, read_timeout)
+        self.metrics = metrics
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.stats = {'requests': 0, 'handshakes': 0, 'retries': 0}
+        self._stats_lock = threading.Lock()
+        self._headers = headers
+        self._pool_size = pool_size
+        self._session = None
+        self._session_lock = threading.Lock()
+
+    @property
+    def session(self):
+        """The pooled session, created (and requests imported) on first use."""
+        with self._session_lock:
+            if self._session is None:
+                import requests
+                session = requests.Session()
+                session.headers.update(self._headers)
+                adapter = counting_http_adapter(
+                    lambda: self._count('handshakes'),
+                    pool_connections=2,
+                    pool_maxsize=self._pool_size,
+                    max_retries=0
+                )
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                self._session = session
+            return self._session
+
+    def _count(self, key):
+        with self._stats_lock:
+            self.stats[key] += 1
+
+    def _retry_delay(self, attempt, response=None):
+        """Seconds to wait before the next attempt, honouring Retry-After when present."""
+        retry_after = response.headers.get('Retry-After') if response is not None else None
+        if retry_after:
+            try:
+                delay = float(retry_after)
+            except ValueError:
+                from email.utils import parsedate_to_datetime
+                try:
+                    delay = parsedate_to_datetime(retry_after).timestamp() - time.time()
+                except (TypeError, ValueError):
+                    delay = None
+            if delay is not None:
+                return min(max(delay, 0), self.max_backoff)
+        delay = self.backoff_factor * (2 ** attempt)
+        return min(delay + random.uniform(0, delay / 2), self.max_backoff)
+
+    @staticmethod
+    def _failed_to_connect(error):
+        """Whether a transport error happened before a connection was made, so Grafana never saw the request."""
+        import requests
+        from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+        if isinstance(error, requests.ConnectTimeout):
+            return True
+        reason = getattr(error.args[0], 'reason', None) if error.args else None
+        return isinstance(reason, (ConnectTimeoutError, NewConnectionError))
+
+    def request(self, method, url, **kwargs):
+        """Send a request, retrying throttled, unavailable and transport failures.
+
+        A non-idempotent request whose transport failed is only resent when
+        it never reached Grafana, as it may already have been applied.
+        """
+        import requests
+        method = method.upper()
+        kwargs.setdefault('timeout', self.timeout)
+        retry_statuses = set(self.RETRY_ALWAYS)
+        if method in self.IDEMPOTENT_METHODS:
+            retry_statuses |= self.RETRY_IDEMPOTENT
+
+        attempt = 0
+        started, started_ns = time.perf_counter(), time.time_ns()
+        while True:
+            self._count('requests')
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                retryable = method in self.IDEMPOTENT_METHODS or self._failed_to_connect(e)
+                if attempt >= self.max_retries or not retryable:
+                    if self.metrics:
+                        self.metrics.record_request(method, url, e.__class__.__name__, started_ns,
+                                                    time.perf_counter() - started, 0, 0, attempt)
+                    raise
+                delay = self._retry_delay(attempt)
+                print(f"⚠️  {method} {url} failed ({e.__class__.__name__}), retrying in {delay:.1f}s")
+            else:
+                if response.status_code not in retry_statuses or attempt >= self.max_retries:
+                    if self.metrics:
+                        self.metrics.record_request(method, url, response.status_code, started_ns,
+                                                    time.perf_counter() - started, len(response.request.body or b''),
+                                                    len(response.content), attempt)
+                    return response
+                delay = self._retry_delay(attempt, response)
+                print(f"⚠️  {method} {url} returned {response.status_code}, retrying in {delay:.1f}s")
+            self._count('retries')
+            attempt += 1
+            time.sleep(delay)
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def put(self, url, **kwargs):
+        return self.request('PUT', url, **kwargs)
+
+    def summary(self):
+        """One-line summary of connection reuse and retries for this run."""
+        return (f"{self.stats['requests']} request(s) over {self.stats['handshakes']} "
+                f"connection(s), {self.stats['retries']} retr{'y' if self.stats['retries'] == 1 else 'ies'}")
+
+    def close(self):
+        if self._session is not None:
+            self._session.close()
+
+
+def canonical_hash(obj):
+    """SHA-256 of the canonical (sorted-key, compact) JSON form of ``obj``."""
+    canonical = json.dumps(obj, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def stable_uid(namespace, kind, name):
+    """Deterministic Grafana UID (max 40 chars) for an object we generate."""
+    digest = hashlib.sha256(f"{namespace}/{kind}/{name}".encode('utf-8')).hexdigest()
+    return f"dm-{digest[:32]}"
+
+
+def payload_matches(payload, remote, ignore=()):
+    """Check whether a remote object already holds every field of ``payload``.
+
+    Only the keys we send are compared, so fields Grafana adds on its side
+    (ids, timestamps, provenance, ...) don't count as changes. Grafana leaves
+    empty and false fields out of what it returns, so a missing key matches
+    one of those.
+    """
+    if remote is None:
+        return False
+    keys = [key for key in payload if key not in ignore]
+    remote_fields = {key: remote.get(key, payload[key] if is_empty_value(payload[key]) else None) for key in keys}
+    return canonical_hash({key: payload[key] for key in keys}) == canonical_hash(remote_fields)
+
+
+def is_empty_value(value):
+    """Whether Grafana omits a field holding ``value`` from its responses: false, zero, empty or null."""
+    if isinstance(value, bool):
+        return not value
+    return value in (None, 0, "", [], {})
+
+
+class ProvisioningState:
+    """On-disk record of the objects this tool provisioned, keyed by Grafana URL and org.
+
+    Holds UIDs, versions and payload hashes so later runs can look objects up
+    directly instead of searching or listing. A ``path`` of None keeps the
+    state in memory only.
+    """
+
+    FORMAT_VERSION = 1
+
+    def __init__(self, path, grafana_url, org_id=None):
+        self.path = Path(path) if path else None
+        self.target = f"{grafana_url.rstrip('/')}#org={org_id or 'default'}"
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._data = {"version": self.FORMAT_VERSION, "targets": {}}
+        if self.path and self.path.exists():
+            try:
+                with open(self.path, 'r') as f:
+                    data = json.load(f)
+                if data.get("version") == self.FORMAT_VERSION:
+                    self._data = data
+            except (OSError, ValueError) as e:
+                print(f"⚠️  Ignoring unreadable state file {self.path}: {e}")
+
+    def for_target(self, grafana_url, org_id=None):
+        """View of the same state file for another Grafana URL and org, sharing its data and lock."""
+        view = copy.copy(self)
+        view.target = f"{grafana_url.rstrip('/')}#org={org_id or 'default'}"
+        view._dirty = False
+        return view
+
+    def _objects(self, kind):
+        return self._data["targets"].setdefault(self.target, {}).setdefault(kind, {})
+
+    def _cached(self, kind):
+        return self._data["targets"].get(self.target, {}).get(kind, {})
+
+    def get(self, kind, name):
+        """Cached entry for an object, or None."""
+        with self._lock:
+            entry = self._cached(kind).get(name)
+            return dict(entry) if entry else None
+
+    def set(self, kind, name, **fields):
+        """Record (or refresh) an object's UID, version and hash."""
+        with self._lock:
+            if self._objects(kind).get(name) != fields:
+                self._objects(kind)[name] = fields
+                self._dirty = True
+
+    def names(self, kind):
+        """Names of every cached object of a kind."""
+        with self._lock:
+            return list(self._cached(kind))
+
+    def forget(self, kind, name):
+        """Drop a stale entry so the next lookup falls back to search/list."""
+        with self._lock:
+            if self._objects(kind).pop(name, None) is not None:
+                self._dirty = True
+
+    def save(self):
+        """Write the state file atomically if anything changed."""
+        if not self.path or not self._dirty:
+            return
+        with self._lock:
+            tmp_path = self.path.with_name(self.path.name + '.tmp')
+            with open(tmp_path, 'w') as f:
+                json.dump(self._data, f, indent=2, sort_keys=True)
+            tmp_path.replace(self.path)
+            self._dirty = False
+
+
+def parse_yaml(content):
+    """Parse YAML with libyaml's C loader when available, many times faster than the pure-Python one."""
+    import yaml
+    try:
+        return yaml.load(content, Loader=getattr(yaml, 'CSafeLoader', yaml.SafeLoader))
+    except yaml.YAMLError as e:
+        raise ValueError(str(e)) from e
+
+
+def load_targets(path):
+    """Read the Grafana instances and orgs to provision from a targets file.
+
+    Each target has a ``name``, a ``url``, an optional ``org_id`` and the name
+    of the environment variable holding its API key, ``api_key_env``
+    (default: GRAFANA_API_KEY). Raises ValueError when the file is invalid.
+    """
+    with open(path, 'r') as f:
+        data = parse_yaml(f.read()) or {}
+    entries = data.get('targets') if isinstance(data, dict) else None
+    if not entries:
+        raise ValueError(f"{path} lists no targets")
+
+    targets = []
+    if not isinstance(entries, list):
+        raise ValueError(f"{path}: targets must be a list")
+    for index, entry in enumerate(entries, 1):
+        if not isinstance(entry, dict):
+            raise ValueError(f"Target {index} must be a mapping with name, url and api_key_env")
+        name = entry.get('name') or f"target-{index}"
+        if not entry.get('url'):
+            raise ValueError(f"Target '{name}' has no url")
+        if any(target['name'] == name for target in targets):
+            raise ValueError(f"Target name '{name}' is used twice")
+        key_env = entry.get('api_key_env', 'GRAFANA_API_KEY')
+        if not os.environ.get(key_env):
+            raise ValueError(f"Target '{name}' needs its API key in ${key_env}")
+        targets.append({"name": name, "url": entry['url'], "org_id": entry.get('org_id'),
+                        "api_key": os.environ[key_env]})
+    return targets
+
+
+class InventoryLoader:
+    """Resolves the Ansible inventory and role variables the way a playbook run sees them.
+
+    Parsed YAML files are cached in ``cache_path``, keyed by mtime and size
+    and, when those change, by content hash. A ``cache_path`` of None parses
+    every file on every run.
+    """
+
+    FORMAT_VERSION = 1
+
+    def __init__(self, cache_path=None):
+        self.cache_path = Path(cache_path) if cache_path else None
+        self.stats = {'parsed': 0, 'cached': 0}
+        self._dirty = False
+        self._files = {}
+        if self.cache_path and self.cache_path.exists():
+            try:
+                with open(self.cache_path, 'r') as f:
+                    data = json.load(f)
+                if data.get("version") == self.FORMAT_VERSION:
+                    self._files = data["files"]
+            except (OSError, ValueError, KeyError) as e:
+                print(f"⚠️  Ignoring unreadable inventory cache {self.cache_path}: {e}")
+
+    def load(self, path):
+        """Parsed content of a YAML file, from the cache when the file is unchanged."""
+        key = os.path.abspath(path)
+        stat = os.stat(path)
+        entry = self._files.get(key)
+        if entry and entry['mtime_ns'] == stat.st_mtime_ns and entry['size'] == stat.st_size:
+            self.stats['cached'] += 1
+            return entry['data']
+
+        with open(path, 'rb') as f:
+            content = f.read()
+        digest = hashlib.sha256(content).hexdigest()
+        if entry and entry['sha256'] == digest:
+            # Touched but not modified
+            data = entry['data']
+            self.stats['cached'] += 1
+        else:
+            data = parse_yaml(content)
+            self.stats['parsed'] += 1
+        try:
+            round_trip = json.loads(json.dumps(data))
+        except (TypeError, ValueError):
+            # Dates and other non-JSON values are parsed again next time
+            return data
+        if round_trip != data:
+            # So are non-string keys, which JSON would turn into strings
+            return data
+        self._files[key] = {'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size, 'sha256': digest, 'data': data}
+        self._dirty = True
+        return data
+
+    def load_vars(self, directory, name, names):
+        """Variables of ``directory/name.yml`` (or ``.yaml``, or a ``name/`` directory of files), {} if absent.
+
+        ``names`` is the directory listing, so hosts without a file cost no lookup.
+        """
+        variables = {}
+        for entry in (name, f"{name}.yml", f"{name}.yaml"):
+            if entry not in names:
+                continue
+            path = directory / entry
+            files = sorted(path.iterdir()) if path.is_dir() else [path]
+            for file in files:
+                if file.suffix not in ('.yml', '.yaml'):
+                    continue
+                try:
+                    variables.update(self.load(file) or {})
+                except ValueError:
+                    # e.g. still git-crypt encrypted
+                    print(f"⚠️  Skipping unreadable variables file {file}")
+        return variables
+
+    def resolve(self, inventory_path, role_path):
+        """Hosts, groups, global config and per-host variables of the inventory for a role.
+
+        Variables are layered like Ansible does: role defaults, then
+        inventory and ``group_vars`` group variables (``all`` first, then by
+        group depth and name), host variables and ``host_vars``, the role's
+        ``vars/main.yml`` and finally its ``vars/<host>.yml`` include.
+        """
+        inventory_path, role_path = Path(inventory_path), Path(role_path)
+
+        def listing(directory):
+            return set(os.listdir(directory)) if directory.is_dir() else set()
+
+        # Like every variables file, unreadable defaults are skipped with a warning
+        defaults = self.load_vars(role_path / 'defaults', 'main', listing(role_path / 'defaults'))
+        inventory = self.load(inventory_path) or {}
+
+        groups = {}
+        host_inline = {}
+
+        def walk(name, group, depth):
+            group = group or {}
+            # Hosts are kept in an insertion-ordered dict for fast de-duplication
+            info = groups.setdefault(name, {'depth': depth, 'vars': {}, 'hosts': {}})
+            info['depth'] = max(info['depth'], depth)
+            info['vars'].update(group.get('vars') or {})
+            members = []
+            for host, host_vars in (group.get('hosts') or {}).items():
+                host_inline.setdefault(host, {}).update(host_vars or {})
+                members.append(host)
+            for child_name, child in (group.get('children') or {}).items():
+                members.extend(walk(child_name, child, depth + 1))
+            info['hosts'].update(dict.fromkeys(members))
+            return members
+
+        walk('all', inventory.get('all'), 0)
+        hosts = list(host_inline)
+        membership = {host: [] for host in hosts}
+        for name, info in sorted(groups.items(), key=lambda item: (item[1]['depth'], item[0])):
+            if name != 'all':
+                for host in info['hosts']:
+                    membership[host].append(name)
+
+        group_vars_dir = inventory_path.parent / 'group_vars'
+        host_vars_dir = inventory_path.parent / 'host_vars'
+        role_vars_dir = role_path / 'vars'
+        group_files, host_files, role_files = listing(group_vars_dir), listing(host_vars_dir), listing(role_vars_dir)
+
+        group_vars = {name: self.load_vars(group_vars_dir, name, group_files) for name in groups}
+        role_vars = self.load_vars(role_vars_dir, 'main', role_files)
+        # Later layers override keys set by earlier ones
+        base = dict(defaults)
+        base.update(groups['all']['vars'])
+        base.update(group_vars['all'])
+        config = dict(base)
+        config.update(role_vars)
+
+        host_vars = {}
+        for host in hosts:
+            merged = dict(base)
+            for name in membership[host]:
+                merged.update(groups[name]['vars'])
+            for name in membership[host]:
+                merged.update(group_vars[name])
+            merged.update(host_inline[host])
+            merged.update(self.load_vars(host_vars_dir, host, host_files))
+            merged.update(role_vars)
+            merged.update(self.load_vars(role_vars_dir, host, role_files))
+            host_vars[host] = merged
+
+        return {
+            'hosts': hosts,
+            'host_groups': {name: list(info['hosts']) for name, info in groups.items() if name != 'all'},
+            'config': config,
+            'host_vars': host_vars
+        }
+
+    def summary(self):
+        return f"{self.stats['parsed']} file(s) parsed, {self.stats['cached']} from cache"
+
+    def save(self):
+        """Write the cache file atomically if anything changed."""
+        if not self.cache_path or not self._dirty:
+            return
+        tmp_path = self.cache_path.with_name(self.cache_path.name + '.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump({"version": self.FORMAT_VERSION, "files": self._files}, f)
+        tmp_path.replace(self.cache_path)
+        self._dirty = False
+
+
+class CollectionCache:
+    """Per-run read-through cache of Grafana list endpoints with indexed lookups.
+
+    Each collection (alert rules, folders, templates, contact points) is
+    fetched at most once per run until a write to it invalidates the entry.
+    """
+
+    def __init__(self, http):
+        self.http = http
+        self.stats = {'hits': 0, 'misses': 0}
+        self._entries = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def _collection_lock(self, name):
+        with self._lock:
+            return self._locks.setdefault(name, threading.Lock())
+
+    def list(self, name, url, params=None):
+        """Return ``(items, response)``; ``items`` is None and ``response`` is set on failure."""
+        with self._collection_lock(name):
+            entry = self._entries.get(name)
+            if entry is not None:
+                with self._lock:
+                    self.stats['hits'] += 1
+                return entry['items'], None
+
+            with self._lock:
+                self.stats['misses'] += 1
+            response = self.http.get(url, params=params)
+            if response.status_code != 200:
+                return None, response
+            self._entries[name] = {'items': response.json(), 'indexes': {}}
+            return self._entries[name]['items'], response
+
+    def lookup(self, name, field, value):
+        """Find a cached item by field value (title, name, uid, ...); None if absent."""
+        with self._collection_lock(name):
+            entry = self._entries.get(name)
+            if entry is None:
+                return None
+            if field not in entry['indexes']:
+                entry['indexes'][field] = {item.get(field): item for item in entry['items']}
+            item = entry['indexes'][field].get(value)
+            return copy.deepcopy(item) if item is not None else None
+
+    def invalidate(self, name):
+        """Drop a collection after we wrote to it."""
+        with self._collection_lock(name):
+            self._entries.pop(name, None)
+
+    def summary(self):
+        return f"{self.stats['hits']} hit(s), {self.stats['misses']} miss(es)"
+
+
+def line_protocol_escape(value):
+    """Escape a measurement, tag key or tag value for InfluxDB line protocol."""
+    return re.sub(r'([,= ])', r'\\\1', str(value))
+
+
+def line_protocol_field(value):
+    """Format a field value for InfluxDB line protocol."""
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, int):
+        return f"{value}i"
+    if isinstance(value, float):
+        return repr(value)
+    return '"' + str(value).replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+
+def line_protocol(measurement, tags, fields, timestamp_ns):
+    """One InfluxDB line protocol line; tags with empty values are left out."""
+    tag_text = ''.join(f",{line_protocol_escape(key)}={line_protocol_escape(value)}"
+                       for key, value in sorted(tags.items()) if value not in (None, ''))
+    field_text = ','.join(f"{line_protocol_escape(key)}={line_protocol_field(value)}" for key, value in fields.items())
+    return f"{line_protocol_escape(measurement)}{tag_text} {field_text} {timestamp_ns}"
+
+
+# Path segments of the Grafana API that are followed by a UID or name
+ENDPOINT_ID_PARENTS = {"uid", "folders", "folder", "alert-rules", "rule-groups", "templates", "contact-points"}
+
+
+def endpoint_of(url):
+    """API path of a URL with UIDs and names replaced by ``:id``, to group requests by endpoint."""
+    segments = urlsplit(url).path.split('/')
+    return '/'.join(
+        ':id' if index and (segments[index - 1] in ENDPOINT_ID_PARENTS or not re.fullmatch(r'[a-z-]*|v\d+', segment))
+        else segment
+        for index, segment in enumerate(segments))
+
+
+class RunMetrics:
+    """Per-request and per-phase timings of one run, reported as JSON or InfluxDB line protocol.
+
+    Requests are attributed to the innermost phase running on their thread.
+    """
+
+    def __init__(self):
+        self.started_ns = time.time_ns()
+        self.started = time.perf_counter()
+        self.requests = []
+        self.phases = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    @contextmanager
+    def phase(self, name):
+        """Time a block as phase ``name``; repeated phases add up."""
+        stack = self._local.__dict__.setdefault('phases', [])
+        stack.append(name)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            stack.pop()
+            with self._lock:
+                self.phases[name] = self.phases.get(name, 0) + time.perf_counter() - started
+
+    def record_request(self, method, url, status, started_ns, seconds, request_bytes, response_bytes, retries):
+        stack = self._local.__dict__.get('phases')
+        with self._lock:
+            self.requests.append({
+                "method": method,
+                "endpoint": endpoint_of(url),
+                "status": status,
+                "phase": stack[-1] if stack else None,
+                "started_ns": started_ns,
+                "latency_ms": round(seconds * 1000, 3),
+                "request_bytes": request_bytes,
+                "response_bytes": response_bytes,
+                "retries": retries
+            })
+
+    def summary(self, **run):
+        """JSON-ready summary: run totals, phase timings, per-endpoint latency and every request."""
+        endpoints = {}
+        for request in self.requests:
+            endpoints.setdefault(f"{request['method']} {request['endpoint']}", []).append(request)
+
+        def percentile(values, fraction):
+            values = sorted(values)
+            return values[min(len(values) - 1, int(fraction * len(values)))]
+
+        return {
+            "run": dict(run, duration_s=round(time.perf_counter() - self.started, 3),
+                        requests=len(self.requests), retries=sum(request["retries"] for request in self.requests),
+                        request_bytes=sum(request["request_bytes"] for request in self.requests),
+                        response_bytes=sum(request["response_bytes"] for request in self.requests)),
+            "phases": {name: round(seconds, 3) for name, seconds in self.phases.items()},
+            "endpoints": {
+                name: {
+                    "count": len(requests),
+                    "non_2xx": sum(1 for request in requests if not str(request["status"]).startswith('2')),
+                    "retries": sum(request["retries"] for request in requests),
+                    "latency_ms": {
+                        "p50": percentile([request["latency_ms"] for request in requests], 0.5),
+                        "p95": percentile([request["latency_ms"] for request in requests], 0.95),
+                        "max": max(request["latency_ms"] for request in requests)
+                    },
+                    "request_bytes": sum(request["request_bytes"] for request in requests),
+                    "response_bytes": sum(request["response_bytes"] for request in requests)
+                }
+                for name, requests in sorted(endpoints.items())
+            },
+            "requests": self.requests
+        }
+
+    def line_protocol(self, tags, **run):
+        """The run as InfluxDB line protocol: one run point with phase timings, one point per request."""
+        summary = self.summary(**run)
+        fields = {key: value for key, value in summary["run"].items() if isinstance(value, (int, float))}
+        fields.update({f"phase_{name}_s": seconds for name, seconds in summary["phases"].items()})
+        run_tags = dict(tags, **{key: value for key, value in summary["run"].items() if isinstance(value, str)})
+        lines = [line_protocol("grafana_provisioning", run_tags, fields, self.started_ns)]
+        for request in self.requests:
+            lines.append(line_protocol(
+                "grafana_provisioning_request",
+                dict(tags, method=request["method"], endpoint=request["endpoint"],
+                     status=request["status"], phase=request["phase"]),
+                {key: request[key] for key in ("latency_ms", "request_bytes", "response_bytes", "retries")},
+                request["started_ns"]
+            ))
+        return '\n'.join(lines) + '\n'
+
+
+def timed_phase(name):
+    """Decorator timing a GrafanaDashboardCreator method as phase ``name`` of the run metrics."""
+    def decorate(method):
+        @functools.wraps(method)
+        def timed(self, *args, **kwargs):
+            with self.metrics.phase(name):
+                return method(self, *args, **kwargs)
+        return timed
+    return decorate
+
+
+class PrefixedOutput:
+    """Stream wrapper prefixing every line a thread prints with that thread's ``prefix``.
+
+    Lines are written whole, so output of targets provisioned in parallel
+    interleaves by line rather than by character.
+    """
+
+    context = threading.local()
+
+    def __init__(self, stream):
+        self.stream = stream
+        self._lock = threading.Lock()
+
+    @classmethod
+    @contextmanager
+    def prefixed(cls, prefix):
+        """Prefix the current thread's output with ``prefix`` for the duration of the block."""
+        previous = getattr(cls.context, 'prefix', '')
+        cls.context.prefix = prefix
+        try:
+            yield
+        finally:
+            # End a line left unfinished under this prefix rather than carry it over
+            if getattr(cls.context, 'pending', '') and isinstance(sys.stdout, cls):
+                sys.stdout.write('\n')
+            cls.context.pending = ''
+            cls.context.prefix = previous
+
+    def write(self, text):
+        prefix = getattr(self.context, 'prefix', '')
+        if not prefix:
+            return self.stream.write(text)
+        pending = getattr(self.context, 'pending', '') + text
+        *lines, self.context.pending = pending.split('\n')
+        if lines:
+            with self._lock:
+                self.stream.write(''.join(f"{prefix}{line}\n" for line in lines))
+        return len(text)
+
+    def flush(self):
+        self.stream.flush()
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+
+def run_dependency_graph(steps, max_workers):
+    """Run steps concurrently, starting each one as soon as its dependencies finish.
+
+    ``steps`` maps a step name to ``(func, deps)``; ``func`` is called with a dict
+    of the results of every step finished so far. Returns the results by name.
+    """
+    unknown = {dep for _, deps in steps.values() for dep in deps if dep not in steps}
+    if unknown:
+        raise ValueError(f"Unknown step dependencies: {', '.join(sorted(unknown))}")
+
+    from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+    prefix = getattr(PrefixedOutput.context, 'prefix', '')
+
+    def run(func, finished):
+        with PrefixedOutput.prefixed(prefix):
+            return func(finished)
+
+    results = {}
+    pending = dict(steps)
+    running = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        while pending or running:
+            ready = [name for name, (_, deps) in pending.items() if all(dep in results for dep in deps)]
+            for name in ready:
+                func, _ = pending.pop(name)
+                running[executor.submit(run, func, dict(results))] = name
+            if not running:
+                raise ValueError(f"Dependency cycle between steps: {', '.join(sorted(pending))}")
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                error = future.exception()
+                if error is not None:
+                    for other in running:
+                        other.cancel()
+                    raise error
+                results[name] = future.result()
+    return results
+
+
+DEFAULT_STATE_FILE = Path(__file__).parent / '.grafana-state.json'
+DEFAULT_INVENTORY_CACHE = Path(__file__).parent / '.inventory-cache.json'
+
+DASHBOARD_TITLE = "Disk Monitoring"
+CONTACT_POINT_NAME = "disk-monitoring-pushover"
+IO_DASHBOARD_TITLE = f"{DASHBOARD_TITLE} - I/O"
+SHARD_TAG = "disk-monitoring-shard"
+INFLUXDB_DATASOURCE = {"type": "influxdb", "uid": "denl7c5ccxam8a"}
+# How far back the overview looks for each host's last report
+LAST_REPORT_LOOKBACK = "7d"
+# Auto-refresh and time range of every dashboard that runs queries
+DASHBOARD_TIME_SETTINGS = {
+    "refresh": "30s",
+    "time": {
+        "from": "now-1h",
+        "to": "now"
+    },
+    "timepicker": {
+        "refresh_intervals": ["5s", "10s", "30s", "1m", "5m", "15m", "30m", "1h", "2h", "1d"]
+    }
+}
+
+
+ALERT_RULE_TITLES = ("Disk Usage Alert", "Host Data Staleness Alert")
+STALENESS_ALERT_TITLE = "Host Data Staleness Alert"
+RULE_GROUP_PREFIX = "disk-monitoring"
+# Grafana's alert scheduler starts due rules on ticks of this length
+SCHEDULER_TICK_SECONDS = 10
+
+
+def assign_rule_groups(titles, max_rules_per_group, base_interval, step):
+    """Map rule titles to ``(group, interval)``, at most ``max_rules_per_group`` per group.
+
+    Each further group evaluates ``step`` seconds less often than the one
+    before, cycling back to ``base_interval`` before reaching twice it.
+    """
+    slots = max(1, base_interval // step) if step else 1
+    groups = {}
+    for index, title in enumerate(titles):
+        number = index // max_rules_per_group
+        groups[title] = (f"{RULE_GROUP_PREFIX}-{number + 1}", base_interval + step * (number % slots))
+    return groups
+
+
+def peak_concurrent_queries(schedule, horizon=86400):
+    """Most datasource queries started on one scheduler tick, and how many ticks per hour reach it.
+
+    ``schedule`` holds an ``(interval_seconds, queries)`` pair per rule.
+    Grafana starts every rule due on a tick at once.
+    """
+    period = 1
+    for interval, _ in schedule:
+        period = math.lcm(period, interval)
+    period = min(period, horizon)
+    per_tick = [sum(queries for interval, queries in schedule if tick % interval == 0)
+                for tick in range(0, period, SCHEDULER_TICK_SECONDS)]
+    peak = max(per_tick, default=0)
+    return peak, per_tick.count(peak) * 3600 / period
+
+
+# Environment references Grafana must expand in the alerting provisioning file
+PUSHOVER_ENV_REFERENCES = ("${PUSHOVER_USER_KEY}", "${PUSHOVER_API_TOKEN}")
+
+
+def escape_env_interpolation(value, keep=()):
+    """Double every ``$`` in the strings of a provisioning file so Grafana's environment expansion leaves them literal.
+
+    Strings in ``keep`` are references Grafana should expand and stay as they are.
+    """
+    if isinstance(value, dict):
+        return {key: escape_env_interpolation(item, keep) for key, item in value.items()}
+    if isinstance(value, list):
+        return [escape_env_interpolation(item, keep) for item in value]
+    if isinstance(value, str) and value not in keep:
+        return value.replace('$', '$$')
+    return value
+
+
+def slugify(title):
+    """File-name form of a title, e.g. ``disk-monitoring-host-detail``."""
+    return re.sub(r'[^a-z0-9]+', '-', title.lower()).strip('-')
+
+
+def route_key(route):
+    """Identity of a notification policy route: its set of object matchers."""
+    return frozenset(tuple(matcher) for matcher in route.get("object_matchers") or [])
+
+
+def is_owned_route(route):
+    """Whether a route is one of ours: a single ``alertname`` matcher naming a rule this tool generates.
+
+    Staleness rules of tiers no longer in use still match, so their routes are removed.
+    """
+    matchers = route.get("object_matchers") or []
+    if len(matchers) != 1 or list(matchers[0][:2]) != ["alertname", "="]:
+        return False
+    title = matchers[0][2]
+    return title in ALERT_RULE_TITLES or title.startswith(f"{STALENESS_ALERT_TITLE} (")
+
+
+def merge_policy_routes(routes, ours):
+    """Update our routes in place within ``routes``, leaving every other route untouched.
+
+    Routes we own (see ``is_owned_route``) but no longer want are removed;
+    new ones are appended. Returns the merged list and ``(added, updated,
+    removed)`` counts.
+    """
+    wanted = {route_key(route): route for route in ours}
+    merged = []
+    seen = set()
+    updated = removed = 0
+    for route in routes:
+        key = route_key(route)
+        if key not in wanted and not is_owned_route(route):
+            merged.append(route)
+        elif key in seen or key not in wanted:
+            # A duplicate, or a route we no longer want
+            removed += 1
+        else:
+            seen.add(key)
+            if payload_matches(wanted[key], route):
+                merged.append(route)
+            else:
+                merged.append(wanted[key])
+                updated += 1
+    added = [route for key, route in wanted.items() if key not in seen]
+    return merged + added, (len(added), updated, removed)
+
+
+# Tiers the role knows without configuration; telegraf_collection_tiers adds to or overrides them
+DEFAULT_COLLECTION_TIERS = {
+    "fast": {"interval": "10s", "flush_interval": "10s"},
+    "slow": {"interval": "5m", "flush_interval": "5m"}
+}
+
+
+def host_regex(hosts):
+    """InfluxQL regex matching exactly ``hosts``."""
+    return f"/^({'|'.join(host.replace('.', '[.]') for host in hosts)})$/"
+
+
+DURATION_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def parse_duration(value):
+    """Seconds in a Telegraf/Grafana duration such as ``60s``, ``1m`` or ``1h30m`` (bare numbers are seconds)."""
+    if isinstance(value, (int, float)):
+        return value
+    parts = re.findall(r'(\d+(?:\.\d+)?)(ms|s|m|h|d)', str(value).strip())
+    if not parts or ''.join(number + unit for number, unit in parts) != str(value).strip():
+        raise ValueError(f"Invalid duration: {value!r}")
+    return sum(float(number) * DURATION_UNITS[unit] for number, unit in parts)
+
+
+def format_duration(seconds):
+    """Grafana duration string for a whole number of seconds, in the largest exact unit."""
+    seconds = max(1, int(seconds))
+    for unit in ("d", "h", "m"):
+        if seconds % DURATION_UNITS[unit] == 0:
+            return f"{seconds // DURATION_UNITS[unit]}{unit}"
+    return f"{seconds}s"
+
+
+def prepend_panels(dashboard, panels):
+    """Insert panels above a dashboard's existing ones, shifting those down and renumbering ids."""
+    height = max((panel["gridPos"]["y"] + panel["gridPos"]["h"] for panel in panels), default=0)
+    next_id = len(panels) + 1
+    for panel in dashboard["panels"]:
+        for existing in [panel] + panel.get("panels", []):
+            existing["gridPos"]["y"] += height
+            existing["id"] = next_id
+            next_id += 1
+    for number, panel in enumerate(panels, 1):
+        panel["id"] = number
+    dashboard["panels"][:0] = panels
+
+
+def dashboard_query_count(dashboard, repeat_values=1, include_collapsed=True):
+    """Datasource queries one refresh of a dashboard issues, not counting template variables.
+
+    Panels that follow a repeated row (up to the next row) are counted once
+    per repeated value. Without ``include_collapsed``, panels inside rows that
+    are still collapsed are left out, as they only query once opened.
+    """
+    total = 0
+    multiplier = 1
+    for panel in dashboard["panels"]:
+        if panel.get("type") == "row":
+            multiplier = repeat_values if panel.get("repeat") else 1
+            if panel.get("collapsed") and not include_collapsed:
+                continue
+            # Collapsed rows carry their panels inside the row itself
+            total += multiplier * sum(len(child.get("targets", [])) for child in panel.get("panels", []))
+        else:
+            total += multiplier * len(panel.get("targets", []))
+    return total
+
+
+def panel_load_counts(dashboard):
+    """Count query panels that load with a dashboard vs only when their collapsed row is opened."""
+    eager = lazy = 0
+    for panel in dashboard["panels"]:
+        children = panel.get("panels", []) if panel.get("type") == "row" else [panel]
+        queried = sum(1 for child in children if child.get("targets"))
+        if panel.get("collapsed"):
+            lazy += queried
+        else:
+            eager += queried
+    return eager, lazy
+
+
+def selected_host_count(dashboard, fleet_size):
+    """Hosts a dashboard's ``host`` variable selects by default (the whole fleet when it has none)."""
+    for variable in dashboard["templating"]["list"]:
+        if variable.get("name") != "host":
+            continue
+        selected = variable["current"]["value"]
+        if selected != ["$__all"]:
+            return len(selected)
+        if variable.get("type") == "custom":
+            return len(variable["query"].split(','))
+        regex = variable.get("regex")
+        return regex.count('|') + 1 if regex else fleet_size
+    return fleet_size
+
+
+# Fields Grafana manages on a stored dashboard model
+DASHBOARD_SERVER_FIELDS = ("id", "uid", "version")
+
 
 class GrafanaDashboardCreator:
-    def __init__(self, grafana_url, api_key):
-        self.grafana_url = grafana_url.rstrip('/')
+    # Options and loaded inventory a per-target creator takes over from the one it was made from
+    CONFIGURATION_FIELDS = (
+        'inventory_cache', 'force_write', 'shard_by', 'max_hosts_per_dashboard', 'layout', 'host_variable_source',
+        'overview', 'overview_top', 'collapse_hosts', 'expand_above', 'host_usage', 'alert_query', 'io_dashboard',
+        'prebuilt_dashboards', 'config', 'hosts', 'host_groups', 'host_vars', 'collection_interval', 'aggregation',
+        'tiers', 'host_tiers', 'diskio_interval', 'uid_namespace'
+    )
+
+    def __init__(self, grafana_url, api_key, org_id=None, state_file=None, **client_options):
+        self.grafana_url = (grafana_url or '').rstrip('/')
         self.api_key = api_key
         self.headers = {
             'Authorization': f'Bearer {api_key}',
             'Content-Type': 'application/json'
         }
+        if org_id is not None:
+            self.headers['X-Grafana-Org-Id'] = str(org_id)
+        self.org_id = org_id
+        self.metrics = RunMetrics()
+        self.http = GrafanaClient(self.headers, metrics=self.metrics, **client_options)
+        self.state = ProvisioningState(state_file, self.grafana_url, org_id)
+        self.inventory_cache = DEFAULT_INVENTORY_CACHE
+        self.collections = CollectionCache(self.http)
+        self.force_write = False
+        self.shard_by = None
+        self.max_hosts_per_dashboard = None
+        self.layout = 'inline'
+        self.host_variable_source = 'influxdb'
+        self.overview = 'none'
+        self.overview_top = 10
+        self.collapse_hosts = False
+        self.expand_above = None
+        self.host_usage = {}
+        self.alert_query = 'scan'
+        self.io_dashboard = False
+        self.prebuilt_dashboards = None
+        self.write_stats = {'written': 0, 'skipped': 0}
+        self._write_stats_lock = threading.Lock()
+
+    def for_target(self, grafana_url, api_key, org_id=None, **client_options):
+        """Creator for another Grafana instance or org, sharing this one's configuration and state file.
+
+        Only ``CONFIGURATION_FIELDS`` carry over; the HTTP client, run metrics
+        and write counts are the target's own.
+        """
+        target = GrafanaDashboardCreator(grafana_url, api_key, org_id, **client_options)
+        for name in self.CONFIGURATION_FIELDS:
+            if hasattr(self, name):
+                setattr(target, name, getattr(self, name))
+        target.state = self.state.for_target(target.grafana_url, org_id)
+        return target
+
+    def is_unchanged(self, label, payload, remote, ignore=()):
+        """Return True (and count a skip) when the remote object already matches the payload."""
+        if self.force_write or not payload_matches(payload, remote, ignore):
+            return False
+        return self.skip_write(label)
+
+    def skip_write(self, label):
+        """Count a write skipped because the object is known to be current."""
+        if self.force_write:
+            return False
+        with self._write_stats_lock:
+            self.write_stats['skipped'] += 1
+        print(f"⏭️  {label} unchanged, skipping write")
+        return True
+
+    def record_write(self, collection=None):
+        """Count a write that Grafana accepted and invalidate the cached collection it touched."""
+        if collection:
+            self.collections.invalidate(collection)
+        with self._write_stats_lock:
+            self.write_stats['written'] += 1
+
+    def phase_summary(self):
+        """One-line summary of the time spent in each phase of this run."""
+        return ', '.join(f"{name} {seconds * 1000:.0f}ms" for name, seconds in self.metrics.phases.items())
+
+    def export_metrics(self, json_path=None, line_protocol_path=None, influxdb_url=None, targets=None, **run):
+        """Write the run metrics as a JSON summary, InfluxDB line protocol and/or straight to InfluxDB.
+
+        An ``influxdb_url`` of ``''`` means the InfluxDB the dashboards read,
+        from the role's variables. ``targets`` maps target names to their
+        creator and exit code in a multi-target run; their metrics are added
+        per target and tagged with its name.
+        """
+        run = dict(run, grafana=urlsplit(self.grafana_url).netloc, hosts=len(getattr(self, 'hosts', [])),
+                   handshakes=self.http.stats['handshakes'], **self.write_stats)
+        lines = self.metrics.line_protocol({}, **run)
+        summary = self.metrics.summary(**run)
+        if targets:
+            summary["targets"] = {}
+            for name, (target, exit_code) in targets.items():
+                target_run = dict(run, grafana=urlsplit(target.grafana_url).netloc, org_id=target.org_id,
+                                  exit_code=exit_code, handshakes=target.http.stats['handshakes'],
+                                  **target.write_stats)
+                lines += target.metrics.line_protocol({"target": name}, **target_run)
+                summary["targets"][name] = target.metrics.summary(**target_run)
+
+        def write(path, content):
+            with open(path, 'w') as f:
+                f.write(content)
+            print(f"📈 Wrote run metrics to {path}")
+
+        if json_path:
+            write(json_path, json.dumps(summary, indent=2) + '\n')
+        if line_protocol_path:
+            write(line_protocol_path, lines)
+        if influxdb_url is not None:
+            self.write_metrics_to_influxdb(lines, influxdb_url)
+
+    def write_metrics_to_influxdb(self, lines, url=''):
+        """POST line protocol to the ``influxdb_database`` the dashboards read; failures only warn."""
+        import requests
+        config = getattr(self, 'config', {})
+        database = config.get('influxdb_database')
+        if not database:
+            print("⚠️  Not writing run metrics: influxdb_database is not configured")
+            return False
+        url = (url or config.get('influxdb_url') or
+               f"http://{config.get('influxdb_host', 'localhost')}:{config.get('influxdb_port', 8086)}").rstrip('/')
+        username, password = config.get('influxdb_username'), config.get('influxdb_password')
+        try:
+            response = requests.post(f"{url}/write", params={"db": database, "precision": "ns"},
+                                     data=lines.encode(), auth=(username, password) if username and password else None,
+                                     timeout=self.http.timeout)
+        except requests.RequestException as e:
+            print(f"⚠️  Could not write run metrics to {url}: {e.__class__.__name__}")
+            return False
+        if response.status_code != 204:
+            print(f"⚠️  Could not write run metrics to {url}: {response.status_code} - {response.text}")
+            return False
+        print(f"📈 Wrote {lines.count(chr(10))} metric point(s) to InfluxDB database '{database}'")
+        return True
+
+    def write_summary(self):
+        """Summary of writes performed vs skipped because nothing changed."""
+        return f"{self.write_stats['written']} written / {self.write_stats['skipped']} skipped"
+
+    @timed_phase('config')
+    def load_ansible_config(self, services_path=None):
+        """Load configuration from Ansible files (under ``services_path``, default: this repository's services)."""
+        services_path = Path(services_path) if services_path else Path(__file__).parent.parent.parent
+        inventory_path = services_path / 'inventory.yml'
+        loader = InventoryLoader(self.inventory_cache)
+        inventory = loader.resolve(inventory_path, services_path / 'disk-monitoring')
+        loader.save()
         
-    def load_ansible_config(self):
-        """Load configuration from Ansible files."""
-        # Load group vars
-        group_vars_path = Path(__file__).parent.parent.parent / 'disk-monitoring' / 'defaults' / 'main.yml'
-        with open(group_vars_path, 'r') as f:
-            self.config = yaml.safe_load(f)
-            
-        # Load inventory to get host list
-        inventory_path = Path(__file__).parent.parent.parent / 'inventory.yml'
-        with open(inventory_path, 'r') as f:
-            inventory = yaml.safe_load(f)
-            self.hosts = list(inventory['all']['hosts'].keys())
+        self.config = inventory['config']
+        self.hosts = inventory['hosts']
+        self.host_groups = inventory['host_groups']
+        self.host_vars = inventory['host_vars']
+        
+        # Points arrive once per collection interval, so finer query buckets only return gaps
+        self.collection_interval = max(1, int(parse_duration(self.config.get('telegraf_interval', '60s'))))
+        self.aggregation = self.telegraf_aggregation() if self.config.get('telegraf_aggregation', False) else None
+        self.tiers = self.collection_tiers()
+        self.host_tiers = {}
+        for host in self.hosts:
+            tier = self.host_vars[host].get('telegraf_collection_tier')
+            if tier and tier not in self.tiers:
+                print(f"⚠️  {host}: unknown telegraf_collection_tier '{tier}', using the default interval")
+            elif tier:
+                self.host_tiers[host] = tier
+        stagger = self.config.get('alert_group_stagger_seconds', 0)
+        if not isinstance(stagger, int) or stagger < 0 or stagger % SCHEDULER_TICK_SECONDS:
+            raise ValueError(f"alert_group_stagger_seconds must be a multiple of Grafana's "
+                             f"{SCHEDULER_TICK_SECONDS}s scheduler tick, got {stagger!r}")
+        # In aggregation mode diskio arrives once per window, as the window's stats
+        self.diskio_interval = self.aggregation["diskio_window"] if self.aggregation else self.collection_interval
+        
+        # Generated UIDs stay stable for as long as the inventory and database do
+        self.uid_namespace = f"{inventory_path.name}:{self.config['influxdb_database']}"
             
-        print(f"Loaded config for database: {self.config['influxdb_database']}")
+        print(f"Loaded config for database: {self.config['influxdb_database']} "
+              f"(collection interval {format_duration(self.collection_interval)}; inventory: {loader.summary()})")
         print(f"Found {len(self.hosts)} hosts: {', '.join(self.hosts)}")
+        for tier in self.tiers_in_use():
+            members = [host for host in self.hosts if self.host_tiers.get(host) == tier]
+            print(f"Collection tier '{tier}': {len(members)} host(s) every {format_duration(self.tiers[tier]['interval'])}, "
+                  f"stale after {self.tiers[tier]['staleness_minutes']}m")
         
-    def create_dashboard_json(self):
-        """Create the dashboard JSON configuration."""
-        dashboard = {
+    def collection_tiers(self):
+        """Collection tiers by name: interval (seconds) and staleness window (minutes), as the role applies them.
+
+        In aggregation mode an idle host writes one disk point per dedup
+        interval, whatever its tier, so no window is shorter than that.
+        """
+        interval = self.config.get('telegraf_interval', '60s')
+        flush_interval = self.config.get('telegraf_flush_interval', '60s')
+        dedup_interval = self.aggregation["dedup_interval"] if getattr(self, 'aggregation', None) else 0
+        tiers = {}
+        for name, tier in dict(DEFAULT_COLLECTION_TIERS, **(self.config.get('telegraf_collection_tiers') or {})).items():
+            tier_interval = parse_duration(tier.get('interval', interval))
+            tier_flush = parse_duration(tier.get('flush_interval', flush_interval))
+            jitter = parse_duration(tier.get('flush_jitter', self.config.get('telegraf_flush_jitter', tier_flush)))
+            # Three missed collections (or one dedup interval) plus the longest flush delay,
+            # so one late write never alerts
+            silence = max(3 * tier_interval, dedup_interval) + tier_flush + jitter
+            staleness = tier.get('max_data_staleness_minutes', math.ceil(silence / 60))
+            if dedup_interval and staleness * 60 < dedup_interval + tier_flush + jitter:
+                print(f"⚠️  Tier '{name}': max_data_staleness_minutes ({staleness}m) is shorter than "
+                      f"telegraf_dedup_interval ({format_duration(dedup_interval)}) plus flush delay, "
+                      f"hosts with unchanged disks will look stale")
+            tiers[name] = {"interval": max(1, int(tier_interval)), "flush_interval": tier_flush,
+                           "flush_jitter": jitter, "staleness_minutes": staleness}
+        return tiers
+
+    def flush_settings(self, tier=None):
+        """Flush interval and flush jitter (seconds) of a collection tier's hosts, or of hosts in none."""
+        if tier:
+            return self.tiers[tier]["flush_interval"], self.tiers[tier]["flush_jitter"]
+        flush_interval = parse_duration(self.config.get('telegraf_flush_interval', '60s'))
+        return flush_interval, parse_duration(self.config.get('telegraf_flush_jitter', flush_interval))
+
+    def tiers_in_use(self):
+        """Names of the collection tiers at least one host is in."""
+        return sorted(set(self.host_tiers.values()))
+
+    def host_interval(self, host):
+        """Seconds between one host's points: its tier's interval, else its ``telegraf_interval``."""
+        tier = self.host_tiers.get(host)
+        if tier:
+            return self.tiers[tier]["interval"]
+        if host in self.host_vars:
+            return max(1, int(parse_duration(self.host_vars[host].get('telegraf_interval', '60s'))))
+        return self.collection_interval
+
+    def telegraf_aggregation(self):
+        """Dedup interval and diskio window (seconds) the role's aggregation mode uses when enabled."""
+        staleness = self.config.get('max_data_staleness_minutes', 5) * 60
+        aggregation = {
+            "dedup_interval": parse_duration(self.config.get('telegraf_dedup_interval', f"{staleness // 2}s")),
+            "diskio_window": max(1, int(parse_duration(self.config.get('telegraf_diskio_window', '5m'))))
+        }
+        if self.config.get('telegraf_aggregation', False) and aggregation["dedup_interval"] >= staleness:
+            print(f"⚠️  telegraf_dedup_interval ({format_duration(aggregation['dedup_interval'])}) is not below the "
+                  f"staleness window ({format_duration(staleness)}), hosts with unchanged disks will look stale")
+        return aggregation
+
+    def shard_hosts(self):
+        """Split hosts into ``(name, hosts)`` shards by inventory group and/or a host limit."""
+        if self.shard_by == 'group':
+            shards = {}
+            for host in self.hosts:
+                # A host listed in several groups lands in the first one in inventory order
+                group = next((name for name, members in self.host_groups.items() if host in members), 'ungrouped')
+                shards.setdefault(group, []).append(host)
+            shards = list(shards.items())
+        else:
+            shards = [(None, list(self.hosts))]
+
+        limit = self.max_hosts_per_dashboard
+        if not limit:
+            return shards
+        split = []
+        for name, hosts in shards:
+            chunks = [hosts[i:i + limit] for i in range(0, len(hosts), limit)]
+            for number, chunk in enumerate(chunks, 1):
+                suffix = f"{number}/{len(chunks)}" if len(chunks) > 1 else None
+                split.append((' '.join(part for part in (name, suffix) if part) or 'all', chunk))
+        return split
+
+    def dashboard_uid(self, title):
+        """UID a generated dashboard has (or will get) in Grafana."""
+        cached = self.state.get('dashboard', title)
+        return cached['uid'] if cached else self.stable_uid('dashboard', title)
+
+    def last_value_window(self, host=None):
+        """Lookback for panels showing the latest point: the staleness window, but at least 3 intervals.
+
+        Panels not tied to one inventory host cover the slowest collection tier.
+        """
+        if host in self.host_tiers:
+            tiers, intervals = [self.host_tiers[host]], []
+        elif host in self.host_vars:
+            tiers, intervals = [], [self.host_interval(host)]
+        else:
+            tiers, intervals = self.tiers_in_use(), [self.collection_interval]
+        staleness = self.config.get('max_data_staleness_minutes', 5) * 60
+        windows = [max(staleness, 3 * interval) for interval in intervals]
+        windows += [max(self.tiers[tier]["staleness_minutes"] * 60, 3 * self.tiers[tier]["interval"]) for tier in tiers]
+        return format_duration(max(windows))
+
+    @timed_phase('build')
+    def build_dashboards(self, offline=False):
+        """Build every dashboard payload: one dashboard, or an index plus one per shard.
+
+        The fleet overview is added as a section of the first (landing)
+        dashboard or as a dashboard of its own. ``offline`` builds without
+        asking Grafana for host usage, leaving every collapsed row collapsed.
+        """
+        sharded = bool(self.shard_by or self.max_hosts_per_dashboard)
+        if self.collapse_hosts and self.expand_above is not None and not offline:
+            self.host_usage = self.get_host_usage()
+        if not sharded:
+            dashboards = [self.create_dashboard_json()]
+        else:
+            dashboards = []
+            shards = []
+            for name, hosts in self.shard_hosts():
+                title = f"{DASHBOARD_TITLE} - {name}"
+                dashboards.append(self.create_dashboard_json(hosts, title, extra_tags=[SHARD_TAG]))
+                shards.append((title, self.dashboard_uid(title), hosts))
+            print(f"Sharded {len(self.hosts)} hosts into {len(shards)} dashboards")
+            dashboards.insert(0, self.create_index_dashboard_json(shards))
+
+        if self.overview != 'none':
+            if self.layout == 'repeat' and not sharded:
+                detail_uid = self.dashboard_uid(DASHBOARD_TITLE)
+            else:
+                # Drill-down needs a dashboard that can be filtered to one host
+                detail = self.create_dashboard_json(title=f"{DASHBOARD_TITLE} - Host Detail", layout='repeat')
+                detail["dashboard"]["templating"]["list"][0]["current"] = {
+                    "selected": True, "text": self.hosts[:1], "value": self.hosts[:1]
+                }
+                dashboards.append(detail)
+                detail_uid = self.dashboard_uid(detail["dashboard"]["title"])
+
+            overview_panels = self.create_overview_panels(detail_uid)
+            if self.overview == 'section':
+                prepend_panels(dashboards[0]["dashboard"], overview_panels)
+                # A sharded index has no queries of its own, so it has no refresh or time range yet
+                for key, value in DASHBOARD_TIME_SETTINGS.items():
+                    dashboards[0]["dashboard"].setdefault(key, copy.deepcopy(value))
+            else:
+                overview = self.create_dashboard_json(hosts=[], title=f"{DASHBOARD_TITLE} - Overview", layout='inline')
+                overview["dashboard"]["panels"] = overview_panels
+                dashboards.insert(1, overview)
+
+        if self.io_dashboard:
+            dashboards.append(self.create_io_dashboard_json())
+
+        self.warn_retired_dashboards(dashboards)
+        if self.collapse_hosts:
+            for dashboard_json in dashboards:
+                eager, lazy = panel_load_counts(dashboard_json["dashboard"])
+                print(f"🪟 {dashboard_json['dashboard']['title']}: {eager} query panels load eagerly, {lazy} lazily")
+        return dashboards
+
+    def warn_retired_dashboards(self, dashboards):
+        """Warn about dashboards an earlier run provisioned that are no longer generated."""
+        current = {dashboard_json["dashboard"]["title"] for dashboard_json in dashboards}
+        for title in self.state.names('dashboard'):
+            if title.startswith(f"{DASHBOARD_TITLE} - ") and title not in current:
+                print(f"⚠️  Dashboard '{title}' from an earlier run is no longer generated, delete it in Grafana if unused")
+
+    def get_host_usage(self):
+        """Fetch each host's fullest mount (percent used) through Grafana's datasource query API."""
+        window = f"now-{self.config.get('max_data_staleness_minutes', 5)}m"
+        url = f"{self.grafana_url}/api/ds/query"
+        response = self.http.post(url, json={
+            "from": window,
+            "to": "now",
+            "queries": [{
+                "refId": "A",
+                "datasource": INFLUXDB_DATASOURCE,
+                "rawQuery": True,
+                "query": (
+                    'SELECT max("used_percent") AS "used_percent" FROM '
+                    '(SELECT last("used_percent") AS "used_percent" FROM "disk" '
+                    'WHERE $timeFilter GROUP BY "host", "path") GROUP BY "host"'
+                ),
+                "resultFormat": "time_series"
+            }]
+        })
+        if response.status_code != 200:
+            print(f"⚠️  Could not fetch host usage, keeping every host collapsed: {response.status_code} - {response.text}")
+            return {}
+
+        usage = {}
+        for frame in response.json().get("results", {}).get("A", {}).get("frames", []):
+            fields = frame.get("schema", {}).get("fields", [])
+            values = frame.get("data", {}).get("values", [])
+            for field, column in zip(fields, values):
+                host = (field.get("labels") or {}).get("host")
+                readings = [value for value in column if isinstance(value, (int, float))]
+                if host and readings:
+                    usage[host] = max(usage.get(host, 0), max(readings))
+        expanded = sum(1 for host in self.hosts if usage.get(host, 0) > self.expand_above)
+        print(f"Fetched usage for {len(usage)} hosts, {expanded} above {self.expand_above:g}% will be expanded")
+        return usage
+
+    def create_overview_panels(self, detail_uid):
+        """Create the fleet overview: worst-N mounts and hosts by last report, one query each."""
+        top = self.overview_top
+        threshold = self.config.get('disk_usage_threshold', 85)
+        drill_down = {
+            "matcher": {"id": "byName", "options": "host"},
+            "properties": [{
+                "id": "links",
+                "value": [{
+                    "title": "Show ${__data.fields.host}",
+                    "url": f"/d/{detail_uid}?var-host=${{__data.fields.host}}&${{__url_time_range}}"
+                }]
+            }]
+        }
+        hidden_time = {
+            "matcher": {"id": "byName", "options": "Time"},
+            "properties": [{"id": "custom.hidden", "value": True}]
+        }
+        return [
+            {
+                "id": 1,
+                "title": f"Top {top} Mounts by Usage",
+                "type": "table",
+                "targets": [{
+                    "datasource": INFLUXDB_DATASOURCE,
+                    "rawQuery": True,
+                    "query": (
+                        f'SELECT top("used_percent", "host", "path", {top}) AS "used_percent" FROM '
+                        '(SELECT last("used_percent") AS "used_percent" FROM "disk" '
+                        'WHERE $timeFilter GROUP BY "host", "path")'
+                    ),
+                    "refId": "A",
+                    "resultFormat": "table"
+                }],
+                "interval": format_duration(self.collection_interval),
+                "timeFrom": self.last_value_window(),
+                "gridPos": {"h": 8, "w": 12, "x": 0, "y": 0},
+                "options": {"sortBy": [{"displayName": "Used (%)", "desc": True}]},
+                "fieldConfig": {
+                    "defaults": {"custom": {"align": "auto"}},
+                    "overrides": [
+                        hidden_time,
+                        drill_down,
+                        {
+                            "matcher": {"id": "byName", "options": "used_percent"},
+                            "properties": [
+                                {"id": "displayName", "value": "Used (%)"},
+                                {"id": "unit", "value": "percent"},
+                                {"id": "custom.cellOptions", "value": {"type": "color-background"}},
+                                {"id": "thresholds", "value": {
+                                    "mode": "absolute",
+                                    "steps": [
+                                        {"color": "green", "value": None},
+                                        {"color": "yellow", "value": 70},
+                                        {"color": "red", "value": threshold}
+                                    ]
+                                }}
+                            ]
+                        }
+                    ]
+                }
+            },
+            {
+                "id": 2,
+                "title": "Last Report per Host (oldest first)",
+                "type": "table",
+                "targets": [{
+                    "datasource": INFLUXDB_DATASOURCE,
+                    "rawQuery": True,
+                    "query": 'SELECT last("used_percent") AS "used_percent" FROM "disk" WHERE $timeFilter GROUP BY "host"',
+                    "refId": "A",
+                    "resultFormat": "table"
+                }],
+                # Hosts silent for longer than the dashboard range must still be listed
+                "timeFrom": LAST_REPORT_LOOKBACK,
+                "gridPos": {"h": 8, "w": 12, "x": 12, "y": 0},
+                "options": {"sortBy": [{"displayName": "Last Report", "desc": False}]},
+                "fieldConfig": {
+                    "defaults": {"custom": {"align": "auto"}},
+                    "overrides": [
+                        drill_down,
+                        {
+                            "matcher": {"id": "byName", "options": "Time"},
+                            "properties": [
+                                {"id": "displayName", "value": "Last Report"},
+                                {"id": "unit", "value": "dateTimeFromNow"}
+                            ]
+                        },
+                        {
+                            "matcher": {"id": "byName", "options": "used_percent"},
+                            "properties": [{"id": "custom.hidden", "value": True}]
+                        }
+                    ]
+                }
+            }
+        ]
+
+    def create_index_dashboard_json(self, shards):
+        """Create a query-free index dashboard linking to each shard."""
+        lines = ["| Dashboard | Hosts |", "| --- | --- |"]
+        for title, uid, hosts in shards:
+            names = ', '.join(host.replace('.cusack-ruth.name', '') for host in hosts)
+            lines.append(f"| [{title}](/d/{uid}) | {len(hosts)}: {names} |")
+        return {
             "dashboard": {
                 "id": None,
-                "title": "Disk Monitoring",
+                "title": DASHBOARD_TITLE,
                 "tags": ["disk", "monitoring", "telegraf"],
                 "timezone": "browser",
-                "refresh": "30s",
-                "time": {
-                    "from": "now-1h",
-                    "to": "now"
-                },
-                "timepicker": {
-                    "refresh_intervals": ["5s", "10s", "30s", "1m", "5m", "15m", "30m", "1h", "2h", "1d"]
+                "links": [{
+                    "title": "Shards",
+                    "type": "dashboards",
+                    "tags": [SHARD_TAG],
+                    "asDropdown": True
+                }],
+                "templating": {
+                    "list": []
                 },
+                "panels": [{
+                    "id": 1,
+                    "title": "Disk Monitoring Dashboards",
+                    "type": "text",
+                    "gridPos": {"h": min(4 + len(shards), 24), "w": 24, "x": 0, "y": 0},
+                    "options": {
+                        "content": '\n'.join(lines),
+                        "mode": "markdown"
+                    }
+                }]
+            },
+            "overwrite": True
+        }
+
+    def create_dashboard_json(self, hosts=None, title=DASHBOARD_TITLE, extra_tags=(), layout=None):
+        """Create the dashboard JSON configuration."""
+        hosts = self.hosts if hosts is None else hosts
+        layout = layout or self.layout
+        dashboard = {
+            "dashboard": {
+                "id": None,
+                "title": title,
+                "tags": ["disk", "monitoring", "telegraf"] + list(extra_tags),
+                "timezone": "browser",
+                **copy.deepcopy(DASHBOARD_TIME_SETTINGS),
                 "templating": {
                     "list": []
                 },
@@ -60,19 +1549,307 @@ class GrafanaDashboardCreator:
             "overwrite": True
         }
         
+        if layout == 'repeat':
+            dashboard["dashboard"]["templating"]["list"].append(self.create_host_variable(hosts))
+            dashboard["dashboard"]["panels"].extend(self.create_repeated_host_panels(1, 0))
+            return dashboard
+        
+        if self.collapse_hosts:
+            panel_id = 1
+            y_position = 0
+            for host in hosts:
+                expanded = self.expand_above is not None and self.host_usage.get(host, 0) > self.expand_above
+                panels = self.create_host_row(host, panel_id, y_position, expanded)
+                dashboard["dashboard"]["panels"].extend(panels)
+                panel_id += 4
+                y_position += 7 if expanded else 1
+            return dashboard
+        
         # Create a section for each host (2 rows of 3 hosts each)
         panel_id = 1
         y_position = 0
         
-        for i, host in enumerate(self.hosts):
+        for i, host in enumerate(hosts):
             # Calculate grid position (3 hosts per row)
             row = i // 3
             col = i % 3
             x_position = col * 8  # Each host section is 8 units wide
             y_position = row * 12  # Each row is 12 units high
             
-            # Host title/header panel
+            dashboard["dashboard"]["panels"].extend(
+                self.create_host_panels(host, panel_id, x_position, y_position)
+            )
+            panel_id += 3
+        
+        return dashboard
+
+    def create_host_variable(self, hosts, measurement="disk"):
+        """Create the multi-select ``host`` template variable for the repeat layout."""
+        variable = {
+            "name": "host",
+            "label": "Host",
+            "multi": True,
+            "includeAll": True,
+            "current": {"selected": True, "text": ["All"], "value": ["$__all"]},
+            "hide": 0,
+            "sort": 1
+        }
+        if self.host_variable_source == 'inventory':
+            variable.update({
+                "type": "custom",
+                "query": ','.join(hosts),
+                "options": []
+            })
+        else:
+            query = f'SHOW TAG VALUES FROM "{measurement}" WITH KEY = "host"'
+            variable.update({
+                "type": "query",
+                "datasource": INFLUXDB_DATASOURCE,
+                "query": query,
+                "definition": query,
+                "refresh": 1,
+                # Keep a shard's variable to its own hosts
+                "regex": host_regex(hosts) if hosts != self.hosts else ""
+            })
+        return variable
+
+    def diskio_rates(self, *fields):
+        """InfluxQL turning diskio counters into per-second rates per host and device, computed by InfluxDB.
+
+        Buckets are at least one reporting interval wide, so each holds a
+        point and the derivative spans consecutive reports.
+        """
+        # Aggregation mode sends each counter's window maximum, i.e. its value at the end of the window
+        suffix = "_max" if self.aggregation else ""
+        rates = ', '.join(f'non_negative_derivative(last("{field}{suffix}"), 1s) AS "{field}"' for field in fields)
+        return (f'SELECT {rates} FROM "diskio" WHERE $timeFilter AND "host" =~ /^$host$/ '
+                'AND "name" !~ /^(loop|ram)/ GROUP BY time($__interval), "host", "name" fill(none)')
+
+    def create_io_dashboard_json(self):
+        """Create the I/O dashboard: IOPS, throughput, await and utilisation per device."""
+        dashboard = self.create_dashboard_json(hosts=[], title=IO_DASHBOARD_TITLE, layout='inline')
+        dashboard["dashboard"]["tags"].append("diskio")
+        dashboard["dashboard"]["templating"]["list"].append(self.create_host_variable(self.hosts, "diskio"))
+        # Milliseconds of I/O per second, so /10 is the percentage of time the device was busy
+        panels = [
+            ("IOPS", self.diskio_rates("reads", "writes"), "iops", None),
+            ("Throughput", self.diskio_rates("read_bytes", "write_bytes"), "Bps", None),
+            ("Await", 'SELECT ("read_time" + "write_time") / ("reads" + "writes") AS "await" '
+                      f'FROM ({self.diskio_rates("read_time", "write_time", "reads", "writes")}) GROUP BY "host", "name"',
+             "ms", None),
+            ("Utilisation", f'SELECT "io_time" / 10 AS "util" FROM ({self.diskio_rates("io_time")}) GROUP BY "host", "name"',
+             "percent", 100),
+        ]
+        for index, (title, query, unit, maximum) in enumerate(panels):
+            defaults = {"unit": unit, "min": 0, "custom": {"fillOpacity": 10, "showPoints": "never"}}
+            if maximum is not None:
+                defaults["max"] = maximum
             dashboard["dashboard"]["panels"].append({
+                "id": index + 1,
+                "title": title,
+                "type": "timeseries",
+                "targets": [{
+                    "datasource": INFLUXDB_DATASOURCE,
+                    "rawQuery": True,
+                    "query": query,
+                    "alias": "$tag_host $tag_name $col",
+                    "refId": "A",
+                    "resultFormat": "time_series"
+                }],
+                "interval": format_duration(self.diskio_interval),
+                "gridPos": {"h": 9, "w": 12, "x": (index % 2) * 12, "y": (index // 2) * 9},
+                "options": {"legend": {"displayMode": "table", "placement": "bottom", "calcs": ["mean", "max"]}},
+                "fieldConfig": {"defaults": defaults, "overrides": []}
+            })
+        return dashboard
+
+    def create_repeated_host_panels(self, panel_id, y_position):
+        """Create one row, repeated per selected ``$host``, holding the gauge and details panels."""
+        _, gauge, table = self.create_host_panels("$host", panel_id + 1, 0, y_position + 1)
+        for panel in (gauge, table):
+            panel["targets"][0]["tags"] = [{"key": "host", "operator": "=~", "value": "/^$host$/"}]
+        gauge["id"], table["id"] = panel_id + 1, panel_id + 2
+        gauge["gridPos"] = {"h": 6, "w": 8, "x": 0, "y": y_position + 1}
+        table["gridPos"] = {"h": 6, "w": 16, "x": 8, "y": y_position + 1}
+        return [
+            {
+                "id": panel_id,
+                "title": "$host",
+                "type": "row",
+                "repeat": "host",
+                "collapsed": False,
+                "gridPos": {"h": 1, "w": 24, "x": 0, "y": y_position},
+                "panels": []
+            },
+            gauge,
+            table
+        ]
+
+    def create_host_row(self, host, panel_id, y_position, expanded=False):
+        """Create a row holding one host's panels, collapsed so they only query once opened."""
+        header, gauge, table = self.create_host_panels(host, panel_id + 1, 0, y_position + 1)
+        gauge["gridPos"] = {"h": 4, "w": 8, "x": 0, "y": y_position + 3}
+        table["gridPos"] = {"h": 6, "w": 16, "x": 8, "y": y_position + 1}
+        row = {
+            "id": panel_id,
+            "title": host.replace('.cusack-ruth.name', ''),
+            "type": "row",
+            "collapsed": not expanded,
+            "gridPos": {"h": 1, "w": 24, "x": 0, "y": y_position},
+            "panels": [] if expanded else [header, gauge, table]
+        }
+        return [row, header, gauge, table] if expanded else [row]
+
+    def benchmark_layouts(self, host_counts, rounds=5):
+        """Compare JSON size, generation time and queries per refresh of each layout."""
+        real_hosts, real_layout, real_collapse = self.hosts, self.layout, self.collapse_hosts
+        print(f"{'hosts':>6}  {'layout':<9} {'JSON bytes':>11} {'generate ms':>12} {'queries/refresh':>16}")
+        try:
+            for count in host_counts:
+                self.hosts = [f"host{number:05d}.example.com" for number in range(count)]
+                for layout, collapse in (('inline', False), ('collapsed', True), ('repeat', False)):
+                    self.layout = 'inline' if collapse else layout
+                    self.collapse_hosts = collapse
+                    timings = []
+                    for _ in range(rounds):
+                        started = time.perf_counter()
+                        dashboard_json = self.create_dashboard_json()
+                        size = len(json.dumps(dashboard_json))
+                        timings.append(time.perf_counter() - started)
+                    dashboard = dashboard_json["dashboard"]
+                    queries = dashboard_query_count(dashboard, repeat_values=count, include_collapsed=False)
+                    variable_queries = sum(1 for variable in dashboard["templating"]["list"]
+                                           if variable.get("type") == "query")
+                    note = f" (+{variable_queries} on load)" if variable_queries else ""
+                    print(f"{count:>6}  {layout:<9} {size:>11,} {min(timings) * 1000:>12.2f} {queries:>16}{note}")
+        finally:
+            self.hosts, self.layout, self.collapse_hosts = real_hosts, real_layout, real_collapse
+        print("Repeat layout queries scale with the hosts selected in the $host picker, not the fleet size;")
+        print("collapsed rows query only once opened.")
+
+    def profile_startup(self, budget_ms):
+        """Time each startup phase up to the first Grafana request; False if over ``budget_ms``."""
+        phases = [("imports", IMPORT_FINISHED - IMPORT_STARTED)]
+
+        started = time.perf_counter()
+        self.load_ansible_config()
+        phases.append(("config load", time.perf_counter() - started))
+        offline_modules = sorted(name for name in ('yaml', 'requests') if name in sys.modules)
+
+        started = time.perf_counter()
+        for dashboard_json in self.build_dashboards(offline=True):
+            json.dumps(dashboard_json)
+        json.dumps([build("") for build in self.alert_rule_builders().values()])
+        phases.append(("JSON generation", time.perf_counter() - started))
+
+        # What a deploy pays on top, just before its first request
+        started = time.perf_counter()
+        self.http.session
+        phases.append(("HTTP client import", time.perf_counter() - started))
+
+        total = sum(seconds for _, seconds in phases)
+        print("\n⏱️  Startup profile (excluding interpreter start):")
+        for name, seconds in phases:
+            print(f"   {name:<20} {seconds * 1000:>8.1f}ms")
+        print(f"   {'total':<20} {total * 1000:>8.1f}ms (budget {budget_ms:.0f}ms)")
+        print(f"   Modules loaded before any request: {', '.join(offline_modules) or 'neither yaml nor requests'}")
+        if total * 1000 > budget_ms:
+            print(f"❌ Startup took {total * 1000:.0f}ms, over the {budget_ms:.0f}ms budget")
+            return False
+        print("✅ Startup within budget")
+        return True
+
+    @timed_phase('plan')
+    def plan(self, viewers=1, mounts_per_host=4, devices_per_host=2, max_query_rate=None, max_write_rate=None):
+        """Model the InfluxDB query and write rates of the generated stack; False when over a budget."""
+        # Usage-based expansion needs Grafana, so plan every collapsed row as collapsed
+        dashboards = self.build_dashboards(offline=True)
+
+        print(f"\n{'dashboard':<40} {'queries/refresh':>16} {'lazy':>5} {'refresh':>8} {'queries/s':>10}")
+        dashboard_rate = 0
+        for dashboard_json in dashboards:
+            dashboard = dashboard_json["dashboard"]
+            selected = selected_host_count(dashboard, len(self.hosts))
+            eager = dashboard_query_count(dashboard, repeat_values=selected, include_collapsed=False)
+            lazy = dashboard_query_count(dashboard, repeat_values=selected) - eager
+            refresh = dashboard.get("refresh")
+            rate = eager / parse_duration(refresh) if refresh and eager else 0
+            dashboard_rate += rate
+            print(f"{dashboard['title']:<40} {eager:>16} {lazy:>5} {refresh or '-':>8} {rate:>10.2f}")
+        dashboard_rate *= viewers
+
+        print(f"\n{'alert rule':<40} {'queries/eval':>16} {'group':>18} {'every':>8} {'queries/s':>10}")
+        alert_rate = 0
+        schedule = []
+        for rule in (build(None) for build in self.alert_rule_builders().values()):
+            queries = sum(1 for query in rule["data"] if query["datasourceUid"] != "__expr__")
+            rate = queries / rule["intervalSeconds"]
+            alert_rate += rate
+            schedule.append((rule["intervalSeconds"], queries))
+            print(f"{rule['title']:<40} {queries:>16} {rule['ruleGroup']:>18} "
+                  f"{format_duration(rule['intervalSeconds']):>8} {rate:>10.2f}")
+        shared_interval = self.config.get('alert_interval_seconds', 60)
+        shared_peak, shared_frequency = peak_concurrent_queries([(shared_interval, queries) for _, queries in schedule])
+        peak, frequency = peak_concurrent_queries(schedule)
+        print(f"Peak concurrent alert queries: {peak}, {frequency:.1f} time(s)/hour "
+              f"(one shared group: {shared_peak}, {shared_frequency:.1f} time(s)/hour)")
+
+        # Telegraf writes one point per mount (disk) and per device (diskio) each interval
+        mounts = len(self.config.get('monitor_mount_points') or []) or mounts_per_host
+        aggregation = self.aggregation or self.telegraf_aggregation()
+        tiers = {}
+        for host in self.hosts:
+            tiers.setdefault(self.host_tiers.get(host), []).append(host)
+        print(f"\nTelegraf: {len(self.hosts)} hosts x {mounts} mounts + {devices_per_host} devices")
+        print(f"{'points/host/hour':<40} {'disk':>16} {'diskio':>10} {'total':>10}")
+        write_rate = write_requests = 0
+        for tier, hosts in tiers.items():
+            interval = self.tiers[tier]["interval"] if tier else self.collection_interval
+            flush_interval, jitter = self.flush_settings(tier)
+            raw_disk = mounts * 3600 / interval
+            raw_diskio = devices_per_host * 3600 / interval
+            # Dedup sends a changed mount every interval and an unchanged one every dedup interval
+            idle_disk = mounts * 3600 / max(aggregation["dedup_interval"], interval)
+            aggregated_diskio = devices_per_host * 3600 / max(aggregation["diskio_window"], interval)
+            # Each flush is delayed by up to the jitter, so on average by half of it
+            flush = max(flush_interval + jitter / 2, interval)
+            # The role sizes a batch to one flush interval of raw points, at least 100
+            intervals_per_flush = max(1, math.ceil(flush_interval / interval))
+            batch_size = self.config.get('telegraf_metric_batch_size',
+                                         max((mounts + devices_per_host) * intervals_per_flush, 100))
+            spread = f"spread over {format_duration(jitter)}" if jitter else "all at the same instant"
+            print(f"{tier or 'default'} tier: {len(hosts)} host(s) every {format_duration(interval)}, flushing every "
+                  f"{format_duration(flush)} on average in batches of up to {batch_size} points, {spread}")
+            for label, disk, diskio in (
+                    ("raw" + ("" if self.aggregation else " (configured)"), (raw_disk,), raw_diskio),
+                    ("aggregated" + (" (configured)" if self.aggregation else ""), (idle_disk, raw_disk), aggregated_diskio)):
+                disk_text = '-'.join(f"{points:.0f}" for points in disk)
+                total_text = '-'.join(f"{points + diskio:.0f}" for points in disk)
+                print(f"  {label:<38} {disk_text:>16} {diskio:>10.0f} {total_text:>10}")
+            # Budget against the busy case: every mount changing each interval
+            points_per_hour = raw_disk + (aggregated_diskio if self.aggregation else raw_diskio)
+            batches = -(-(points_per_hour * flush / 3600) // batch_size)
+            write_rate += len(hosts) * points_per_hour / 3600
+            write_requests += len(hosts) * batches / flush
+
+        query_rate = dashboard_rate + alert_rate
+        print(f"\n📈 Dashboards: {dashboard_rate:.2f} queries/s ({viewers} viewer(s) per dashboard)")
+        print(f"📈 Alert rules: {alert_rate:.2f} queries/s (with --with-alerts)")
+        print(f"📈 Total: {query_rate:.2f} queries/s, {write_rate:.2f} points/s in {write_requests:.2f} writes/s")
+
+        within_budget = True
+        for label, value, budget, unit in (("Query rate", query_rate, max_query_rate, "queries/s"),
+                                           ("Write rate", write_rate, max_write_rate, "points/s")):
+            if budget is not None and value > budget:
+                print(f"⚠️  {label} {value:.2f} {unit} exceeds the budget of {budget:g} {unit}")
+                within_budget = False
+        return within_budget
+
+    def create_host_panels(self, host, panel_id, x_position, y_position):
+        """Create the header, gauge and details panels for one host, 8 units wide."""
+        return [
+            # Host title/header panel
+            {
                 "id": panel_id,
                 "title": "",
                 "type": "text",
@@ -81,12 +1858,10 @@ class GrafanaDashboardCreator:
                     "content": f"**{host.replace('.cusack-ruth.name', '')}**",
                     "mode": "markdown"
                 }
-            })
-            panel_id += 1
-            
+            },
             # Disk usage gauge for this host
-            dashboard["dashboard"]["panels"].append({
-                "id": panel_id,
+            {
+                "id": panel_id + 1,
                 "title": "Disk Usage",
                 "type": "gauge",
                 "targets": [{
@@ -107,6 +1882,8 @@ class GrafanaDashboardCreator:
                     ],
                     "adhocFilters": []
                 }],
+                "interval": format_duration(self.host_interval(host)),
+                "timeFrom": self.last_value_window(host),
                 "gridPos": {"h": 4, "w": 8, "x": x_position, "y": y_position + 2},
                 "options": {
                     "orientation": "auto",
@@ -143,12 +1920,10 @@ class GrafanaDashboardCreator:
                         }
                     ]
                 }
-            })
-            panel_id += 1
-            
+            },
             # Disk details table for this host
-            dashboard["dashboard"]["panels"].append({
-                "id": panel_id,
+            {
+                "id": panel_id + 2,
                 "title": "Disk Details",
                 "type": "table",
                 "targets": [{
@@ -171,6 +1946,8 @@ class GrafanaDashboardCreator:
                     ],
                     "adhocFilters": []
                 }],
+                "interval": format_duration(self.host_interval(host)),
+                "timeFrom": self.last_value_window(host),
                 "gridPos": {"h": 6, "w": 8, "x": x_position, "y": y_position + 6},
                 "fieldConfig": {
                     "defaults": {
@@ -240,98 +2017,165 @@ class GrafanaDashboardCreator:
                         }
                     ]
                 }
-            })
-            panel_id += 1
-        
-        return dashboard
+            }
+        ]
         
     def get_existing_alert_rules(self):
         """Get existing alert rules to understand the structure."""
         url = f"{self.grafana_url}/api/v1/provisioning/alert-rules"
-        response = requests.get(url, headers=self.headers)
+        rules, response = self.collections.list('alert-rules', url)
         
-        if response.status_code == 200:
-            return response.json()
+        if rules is not None:
+            return rules
         else:
             print(f"❌ Failed to get existing alert rules: {response.status_code}")
             print(f"   Response: {response.text}")
             return []
 
-    def get_folders(self):
-        """Get available folders for alert rules."""
-        url = f"{self.grafana_url}/api/folders"
-        response = requests.get(url, headers=self.headers)
-        
-        if response.status_code == 200:
+    def get_folders(self):
+        """Get available folders for alert rules."""
+        url = f"{self.grafana_url}/api/folders"
+        folders, response = self.collections.list('folders', url)
+        
+        if folders is not None:
+            return folders
+        else:
+            print(f"❌ Failed to get folders: {response.status_code}")
+            return []
+
+    def folder_exists(self, uid):
+        """Whether a folder is still in Grafana; only a 404 counts as gone."""
+        url = f"{self.grafana_url}/api/folders/{uid}"
+        return self.http.get(url).status_code != 404
+
+    def select_alert_folder(self, existing_rule=None):
+        """Pick the folder for an alert rule: the existing rule's, else a monitoring folder."""
+        if existing_rule:
+            return existing_rule.get('folderUID', '')
+
+        folders = self.get_folders()
+        # Look for a monitoring/alerting folder, or use the first available
+        for folder in folders:
+            if any(keyword in folder['title'].lower() for keyword in ['monitor', 'alert', 'disk']):
+                return folder['uid']
+        return folders[0]['uid'] if folders else ""
+
+    def stable_uid(self, kind, name):
+        """Deterministic UID for a generated object, derived from the inventory and its identity."""
+        return stable_uid(self.uid_namespace, kind, name)
+
+    def alert_rule_titles(self):
+        """Titles of every generated alert rule: the fixed ones, then one staleness rule per tier in use."""
+        return ALERT_RULE_TITLES + tuple(f"{STALENESS_ALERT_TITLE} ({tier})" for tier in self.tiers_in_use())
+
+    def alert_rule_builders(self):
+        """``{title: build(folder_uid)}`` for every generated alert rule, in provisioning order."""
+        builders = {
+            "Disk Usage Alert": self.build_alert_rule,
+            STALENESS_ALERT_TITLE: self.build_data_freshness_alert_rule
+        }
+        for tier in self.tiers_in_use():
+            builders[f"{STALENESS_ALERT_TITLE} ({tier})"] = (
+                lambda folder_uid, tier=tier: self.build_data_freshness_alert_rule(folder_uid, tier))
+        return builders
+
+    def rule_group(self, title):
+        """Evaluation group and interval (seconds) a rule is provisioned in."""
+        groups = assign_rule_groups(
+            self.alert_rule_titles(),
+            max(1, self.config.get('alert_rules_per_group', 1)),
+            self.config.get('alert_interval_seconds', 60),
+            self.config.get('alert_group_stagger_seconds', 0)
+        )
+        return groups[title]
+
+    def get_rule_group(self, folder_uid, group):
+        """Get an evaluation group with its rules, or None if it doesn't exist yet."""
+        url = f"{self.grafana_url}/api/v1/provisioning/folder/{folder_uid}/rule-groups/{group}"
+        response = self.http.get(url)
+        return response.json() if response.status_code == 200 else None
+
+    def get_alert_rule(self, uid, title):
+        """Get an alert rule by UID, or None if missing or no longer ours (title changed)."""
+        url = f"{self.grafana_url}/api/v1/provisioning/alert-rules/{uid}"
+        response = self.http.get(url)
+        if response.status_code == 200 and response.json().get('title') == title:
             return response.json()
-        else:
-            print(f"❌ Failed to get folders: {response.status_code}")
-            return []
+        return None
+
+    def find_existing_alert_rule(self, title):
+        """Find an existing alert rule by cached UID, then its deterministic UID, then by title."""
+        cached = self.state.get('alert_rule', title)
+        if cached:
+            rule = self.get_alert_rule(cached['uid'], title)
+            if rule:
+                return rule
+            self.state.forget('alert_rule', title)
+
+        uid = self.stable_uid('alert_rule', title)
+        if not cached or cached['uid'] != uid:
+            rule = self.get_alert_rule(uid, title)
+            if rule:
+                return rule
 
-    def create_alert_rule(self):
-        """Create or update alert rule for disk usage threshold."""
+        # One-time migration: adopt a rule created before UIDs were deterministic
+        self.get_existing_alert_rules()
+        rule = self.collections.lookup('alert-rules', 'title', title)
+        if rule:
+            print(f"Adopting existing alert rule '{title}' (UID {rule['uid']}) found by title")
+        return rule
+
+    def alert_query_shape(self, tags, aggregate):
+        """``groupBy`` and ``select`` of an alert rule's InfluxDB query.
+
+        ``scan`` aggregates every point in the window into time buckets;
+        ``last-point`` reads just the latest point of each series.
+        """
+        group_by = [{"params": [f"{tag}::tag"], "type": "tag"} for tag in tags]
+        if self.alert_query == 'last-point':
+            return group_by, [[{"params": ["used_percent"], "type": "field"}, {"params": [], "type": "last"}]]
+        return (
+            [{"params": ["$__interval"], "type": "time"}] + group_by + [{"params": ["none"], "type": "fill"}],
+            [[{"params": ["used_percent"], "type": "field"}, {"params": [], "type": aggregate}]]
+        )
+
+    def build_alert_rule(self, folder_uid):
+        """Build the disk usage alert rule payload."""
         threshold = self.config.get('disk_usage_threshold', 85)
         eval_for = self.config.get('alert_eval_for', '5m')
-        interval_seconds = self.config.get('alert_interval_seconds', 60)
-        
-        # Check if alert rule already exists
-        existing_rules = self.get_existing_alert_rules()
-        existing_rule = None
-        for rule in existing_rules:
-            if rule.get('title') == 'Disk Usage Alert':
-                existing_rule = rule
-                print(f"Found existing alert rule with UID: {rule['uid']}")
-                break
-        
-        # Get available folders
-        folders = self.get_folders()
-        folder_uid = ""
-        
-        # Use existing rule's folder or find a suitable one
-        if existing_rule:
-            folder_uid = existing_rule.get('folderUID', '')
-        elif folders:
-            # Look for a monitoring/alerting folder, or use the first available
-            for folder in folders:
-                if any(keyword in folder['title'].lower() for keyword in ['monitor', 'alert', 'disk']):
-                    folder_uid = folder['uid']
-                    break
-            
-            if not folder_uid:
-                folder_uid = folders[0]['uid']
-        
+        rule_group, interval_seconds = self.rule_group("Disk Usage Alert")
+        # Query no finer than Telegraf writes, over a window holding at least two points of the slowest host
+        window = max(600, 2 * self.collection_interval, *(2 * self.host_interval(host) for host in self.hosts))
+        interval_ms = self.collection_interval * 1000
+        max_data_points = window // self.collection_interval
+        group_by, select = self.alert_query_shape(["host", "path"], "mean")
+
         # Create rule with proper 3-query structure (A -> B -> C)
-        alert_rule = {
+        return {
             "folderUID": folder_uid,
             "title": "Disk Usage Alert",
+            "ruleGroup": rule_group,
             "condition": "C",
             "data": [
                 {
                     "refId": "A",
                     "queryType": "",
                     "relativeTimeRange": {
-                        "from": 600,
+                        "from": window,
                         "to": 0
                     },
                     "datasourceUid": "denl7c5ccxam8a",
                     "model": {
                         "datasource": {"type": "influxdb", "uid": "denl7c5ccxam8a"},
-                        "groupBy": [
-                            {"params": ["$__interval"], "type": "time"},
-                            {"params": ["host::tag"], "type": "tag"},
-                            {"params": ["path::tag"], "type": "tag"},
-                            {"params": ["null"], "type": "fill"}
-                        ],
-                        "intervalMs": 1000,
-                        "maxDataPoints": 43200,
+                        "groupBy": group_by,
+                        "intervalMs": interval_ms,
+                        "maxDataPoints": max_data_points,
                         "measurement": "disk",
                         "orderByTime": "ASC",
                         "policy": "default",
                         "refId": "A",
                         "resultFormat": "time_series",
-                        "select": [
-                            [{"params": ["used_percent"], "type": "field"}, {"params": [], "type": "mean"}]
-                        ],
+                        "select": select,
                         "tags": []
                     }
                 },
@@ -355,8 +2199,8 @@ class GrafanaDashboardCreator:
                         ],
                         "datasource": {"type": "__expr__", "uid": "__expr__"},
                         "expression": "A",
-                        "intervalMs": 1000,
-                        "maxDataPoints": 43200,
+                        "intervalMs": interval_ms,
+                        "maxDataPoints": max_data_points,
                         "reducer": "last",
                         "refId": "B",
                         "settings": {"mode": "dropNN"},
@@ -383,8 +2227,8 @@ class GrafanaDashboardCreator:
                         ],
                         "datasource": {"type": "__expr__", "uid": "__expr__"},
                         "expression": "B",
-                        "intervalMs": 1000,
-                        "maxDataPoints": 43200,
+                        "intervalMs": interval_ms,
+                        "maxDataPoints": max_data_points,
                         "refId": "C",
                         "type": "threshold"
                     }
@@ -397,34 +2241,80 @@ class GrafanaDashboardCreator:
                 "description": f"Disk usage on {{{{ $labels.host }}}}:{{{{ $labels.path }}}} is {{{{ printf \"%.1f\" $values.B.Value }}}}% which exceeds the threshold of {threshold}%",
                 "summary": "High disk usage detected on {{ $labels.host }}"
             },
-            "labels": {},
+            # No "labels": Grafana leaves empty labels out of the rules it returns
             "intervalSeconds": interval_seconds
         }
-        
-        # Create or update the alert rule
-        if existing_rule:
-            # Update existing rule
-            alert_rule['uid'] = existing_rule['uid']
-            url = f"{self.grafana_url}/api/v1/provisioning/alert-rules/{existing_rule['uid']}"
-            response = requests.put(url, json=alert_rule, headers=self.headers)
-            action = "updated"
-        else:
-            # Create new rule
-            url = f"{self.grafana_url}/api/v1/provisioning/alert-rules"
-            response = requests.post(url, json=alert_rule, headers=self.headers)
-            action = "created"
-        
-        if response.status_code in [200, 201]:
-            result = response.json()
-            print(f"✅ Alert rule {action} successfully!")
-            return result.get('uid', existing_rule['uid'] if existing_rule else '')
-        else:
-            print(f"❌ Failed to {action[:-1]} alert rule: {response.status_code}")
-            print(f"   Response: {response.text}")
-            return None
 
-    def create_notification_template(self):
-        """Create notification template for disk usage alerts."""
+    @timed_phase('rules')
+    def create_alert_rules(self):
+        """Create or update every alert rule, one rule group write per evaluation group.
+
+        Returns ``{title: uid}``, with None for rules that could not be written.
+        """
+        builders = self.alert_rule_builders()
+        for title in self.state.names('alert_rule'):
+            if title.startswith(f"{STALENESS_ALERT_TITLE} (") and title not in builders:
+                print(f"⚠️  Alert rule '{title}' from an earlier run is no longer generated, delete it in Grafana if unused")
+        groups = {}
+        for title in builders:
+            groups.setdefault(self.rule_group(title), []).append(title)
+        uids = {}
+        for (group, interval), titles in groups.items():
+            uids.update(self.write_rule_group(group, interval, [builders[title] for title in titles]))
+        return uids
+
+    def write_rule_group(self, group, interval, builders):
+        """Write one evaluation group with a single call, skipping it when no rule changed."""
+        cached = self.state.get('rule_group', group)
+        folder_uid = cached['folder_uid'] if cached else None
+        remote_group = self.get_rule_group(folder_uid, group) if folder_uid is not None else None
+        if remote_group is None and folder_uid is not None and not self.folder_exists(folder_uid):
+            print(f"⚠️  Cached folder {folder_uid} of rule group '{group}' not found, selecting a folder again")
+            self.state.forget('rule_group', group)
+            folder_uid = None
+        remote = {rule['title']: rule for rule in (remote_group or {}).get('rules', [])}
+
+        rules = [build(folder_uid) for build in builders]
+        existing = {}
+        for rule in rules:
+            # Rules outside this group are found once, then moved into it
+            existing[rule['title']] = remote.get(rule['title']) or self.find_existing_alert_rule(rule['title'])
+        if folder_uid is None:
+            folder_uid = self.select_alert_folder(next((rule for rule in existing.values() if rule), None))
+            remote_group = self.get_rule_group(folder_uid, group)
+            remote = {rule['title']: rule for rule in (remote_group or {}).get('rules', [])}
+        for rule in rules:
+            rule['folderUID'] = folder_uid
+            found = existing[rule['title']]
+            rule['uid'] = found['uid'] if found else self.stable_uid('alert_rule', rule['title'])
+
+        titles = [rule['title'] for rule in rules]
+        unchanged = (remote_group is not None and remote_group.get('interval') == interval and
+                     all(payload_matches(rule, remote.get(rule['title']), ignore=('intervalSeconds',)) for rule in rules))
+        if not (unchanged and self.skip_write(f"Rule group '{group}'")):
+            # A group write replaces its rules, so keep any that other tools added to it
+            others = [rule for rule in (remote_group or {}).get('rules', []) if rule['title'] not in titles]
+            url = f"{self.grafana_url}/api/v1/provisioning/folder/{folder_uid}/rule-groups/{group}"
+            response = self.http.put(url, json={
+                "title": group,
+                "folderUid": folder_uid,
+                "interval": interval,
+                "rules": rules + others
+            })
+            if response.status_code not in [200, 202]:
+                print(f"❌ Failed to write rule group '{group}': {response.status_code}")
+                print(f"   Response: {response.text}")
+                return {title: None for title in titles}
+            self.record_write('alert-rules')
+            print(f"✅ Rule group '{group}' written: {', '.join(titles)} every {interval}s")
+
+        self.state.set('rule_group', group, folder_uid=folder_uid)
+        for rule in rules:
+            self.state.set('alert_rule', rule['title'], uid=rule['uid'], hash=canonical_hash(rule))
+        return {rule['title']: rule['uid'] for rule in rules}
+
+    def build_notification_template(self):
+        """Build the notification template payload for disk usage alerts."""
         template_name = "pushover-disk-usage"
         
         # The template content
@@ -457,36 +2347,51 @@ class GrafanaDashboardCreator:
     {{- end -}}
 {{ end }}"""
         
-        template_data = {
+        return {
             "name": template_name,
             "template": template_content
         }
+
+    @timed_phase('template')
+    def create_notification_template(self):
+        """Create notification template for disk usage alerts."""
+        template_data = self.build_notification_template()
+        template_name = template_data["name"]
         
-        # Check if template already exists
-        url = f"{self.grafana_url}/api/v1/provisioning/templates"
-        response = requests.get(url, headers=self.headers)
-        
+        # Check if template already exists, directly by name if we provisioned it before
         existing_template = None
-        if response.status_code == 200:
-            templates = response.json()
-            for template in templates:
-                if template.get('name') == template_name:
-                    existing_template = template
-                    break
+        if self.state.get('template', template_name):
+            url = f"{self.grafana_url}/api/v1/provisioning/templates/{template_name}"
+            response = self.http.get(url)
+            if response.status_code == 200:
+                existing_template = response.json()
+            else:
+                self.state.forget('template', template_name)
+        
+        if existing_template is None:
+            url = f"{self.grafana_url}/api/v1/provisioning/templates"
+            self.collections.list('templates', url)
+            existing_template = self.collections.lookup('templates', 'name', template_name)
+        
+        if self.is_unchanged("Notification template", template_data, existing_template):
+            self.state.set('template', template_name, hash=canonical_hash(template_data))
+            return template_name
         
         # Create or update template
         if existing_template:
             # Update existing template
             url = f"{self.grafana_url}/api/v1/provisioning/templates/{template_name}"
-            response = requests.put(url, json=template_data, headers=self.headers)
+            response = self.http.put(url, json=template_data)
             action = "updated"
         else:
             # Create new template
             url = f"{self.grafana_url}/api/v1/provisioning/templates"
-            response = requests.post(url, json=template_data, headers=self.headers)
+            response = self.http.post(url, json=template_data)
             action = "created"
         
         if response.status_code in [200, 201, 202]:
+            self.record_write('templates')
+            self.state.set('template', template_name, hash=canonical_hash(template_data))
             print(f"✅ Notification template {action} successfully!")
             return template_name
         else:
@@ -494,41 +2399,48 @@ class GrafanaDashboardCreator:
             print(f"   Response: {response.text}")
             return None
 
+    def build_pushover_message_settings(self, template_name):
+        """Pushover contact point settings that render alerts with our template."""
+        return {
+            # Update the message template to use our custom template
+            "message": f'{{{{ template "{template_name}" . }}}}',
+            # Update the title to be more concise - include hostname but keep it simple
+            "title": '{{ if .Alerts.Firing }}🔥 {{ range .Alerts.Firing }}{{ .Labels.host }}{{ break }}{{ end }}{{ else }}✅ Disk OK{{ end }}'
+        }
+
+    @timed_phase('contact_point')
     def update_contact_point_template(self, template_name):
         """Update contact point to use the custom notification template."""
         # Get existing contact points
         url = f"{self.grafana_url}/api/v1/provisioning/contact-points"
-        response = requests.get(url, headers=self.headers)
+        contact_points, response = self.collections.list('contact-points', url)
         
-        if response.status_code != 200:
+        if contact_points is None:
             print(f"❌ Failed to get contact points: {response.status_code}")
             return False
         
-        contact_points = response.json()
-        pushover_contact = None
-        
         # Find the disk-monitoring-pushover contact point
-        for cp in contact_points:
-            if cp.get('name') == 'disk-monitoring-pushover':
-                pushover_contact = cp
-                break
+        pushover_contact = self.collections.lookup('contact-points', 'name', CONTACT_POINT_NAME)
         
         if not pushover_contact:
             print("⚠️  disk-monitoring-pushover contact point not found, skipping template update")
             return False
         
+        original_contact = copy.deepcopy(pushover_contact)
+        
         # Update the contact point to use our template
         if pushover_contact.get('type') == 'pushover':
-            # Update the message template to use our custom template
-            pushover_contact['settings']['message'] = f'{{{{ template "{template_name}" . }}}}'
-            # Update the title to be more concise - include hostname but keep it simple
-            pushover_contact['settings']['title'] = '{{ if .Alerts.Firing }}🔥 {{ range .Alerts.Firing }}{{ .Labels.host }}{{ break }}{{ end }}{{ else }}✅ Disk OK{{ end }}'
+            pushover_contact['settings'].update(self.build_pushover_message_settings(template_name))
+        
+        if self.is_unchanged("Contact point", pushover_contact, original_contact):
+            return True
         
         # Update the contact point
         url = f"{self.grafana_url}/api/v1/provisioning/contact-points/{pushover_contact['uid']}"
-        response = requests.put(url, json=pushover_contact, headers=self.headers)
+        response = self.http.put(url, json=pushover_contact)
         
         if response.status_code in [200, 202]:
+            self.record_write('contact-points')
             print(f"✅ Contact point updated to use template '{template_name}'!")
             return True
         else:
@@ -536,42 +2448,37 @@ class GrafanaDashboardCreator:
             print(f"   Response: {response.text}")
             return False
 
-    def create_data_freshness_alert_rule(self):
-        """Create alert rule to detect when hosts stop sending data."""
-        max_staleness_minutes = self.config.get('max_data_staleness_minutes', 5)
+    def build_data_freshness_alert_rule(self, folder_uid, tier=None):
+        """Build the host data staleness alert rule payload, for the hosts of one collection tier if given.
+
+        Without a tier the rule covers every host not in a tier, at the
+        default interval and ``max_data_staleness_minutes``.
+        """
         eval_for = self.config.get('staleness_alert_eval_for', '2m')
-        interval_seconds = self.config.get('alert_interval_seconds', 60)
-        
-        # Check if alert rule already exists
-        existing_rules = self.get_existing_alert_rules()
-        existing_rule = None
-        for rule in existing_rules:
-            if rule.get('title') == 'Host Data Staleness Alert':
-                existing_rule = rule
-                print(f"Found existing data staleness alert rule with UID: {rule['uid']}")
-                break
-        
-        # Get available folders
-        folders = self.get_folders()
-        folder_uid = ""
-        
-        # Use existing rule's folder or find a suitable one
-        if existing_rule:
-            folder_uid = existing_rule.get('folderUID', '')
-        elif folders:
-            # Look for a monitoring/alerting folder, or use the first available
-            for folder in folders:
-                if any(keyword in folder['title'].lower() for keyword in ['monitor', 'alert', 'disk']):
-                    folder_uid = folder['uid']
-                    break
-            
-            if not folder_uid:
-                folder_uid = folders[0]['uid']
-        
+        if tier:
+            title = f"{STALENESS_ALERT_TITLE} ({tier})"
+            max_staleness_minutes = self.tiers[tier]["staleness_minutes"]
+            interval = self.tiers[tier]["interval"]
+            tags = [{"key": "host", "operator": "=~",
+                     "value": host_regex(host for host in self.hosts if self.host_tiers.get(host) == tier)}]
+        else:
+            title = STALENESS_ALERT_TITLE
+            max_staleness_minutes = self.config.get('max_data_staleness_minutes', 5)
+            interval = self.collection_interval
+            # Tiered hosts are watched by their tier's rule, over their own window
+            tags = [{"key": "host", "operator": "!~", "value": host_regex(self.host_tiers)}] if self.host_tiers else []
+        rule_group, interval_seconds = self.rule_group(title)
+        interval_ms = interval * 1000
+        max_data_points = max(1, max_staleness_minutes * 60 // interval)
+        group_by, select = self.alert_query_shape(["host"], "count")
+        # A last point per host always counts as one, so only a scan has a count worth showing
+        point_count = "" if self.alert_query == 'last-point' else ' (data points: {{ printf "%.0f" $values.B.Value }})'
+
         # Create rule with 3-query structure (A -> B -> C) to handle data reduction properly
-        alert_rule = {
+        return {
             "folderUID": folder_uid,
-            "title": "Host Data Staleness Alert",
+            "title": title,
+            "ruleGroup": rule_group,
             "condition": "C",
             "data": [
                 {
@@ -584,22 +2491,16 @@ class GrafanaDashboardCreator:
                     "datasourceUid": "denl7c5ccxam8a",
                     "model": {
                         "datasource": {"type": "influxdb", "uid": "denl7c5ccxam8a"},
-                        "groupBy": [
-                            {"params": ["$__interval"], "type": "time"},
-                            {"params": ["host::tag"], "type": "tag"},
-                            {"params": ["null"], "type": "fill"}
-                        ],
+                        "groupBy": group_by,
                         "measurement": "disk",
                         "orderByTime": "ASC",
                         "policy": "default",
                         "refId": "A",
                         "resultFormat": "time_series",
-                        "select": [
-                            [{"params": ["used_percent"], "type": "field"}, {"params": [], "type": "count"}]
-                        ],
-                        "tags": [],
-                        "intervalMs": 1000,
-                        "maxDataPoints": 43200
+                        "select": select,
+                        "tags": tags,
+                        "intervalMs": interval_ms,
+                        "maxDataPoints": max_data_points
                     }
                 },
                 {
@@ -622,9 +2523,10 @@ class GrafanaDashboardCreator:
                         ],
                         "datasource": {"type": "__expr__", "uid": "__expr__"},
                         "expression": "A",
-                        "intervalMs": 1000,
-                        "maxDataPoints": 43200,
-                        "reducer": "sum",
+                        "intervalMs": interval_ms,
+                        "maxDataPoints": max_data_points,
+                        # Point counts add up; a last point per host counts as one
+                        "reducer": "count" if self.alert_query == 'last-point' else "sum",
                         "refId": "B",
                         "settings": {"mode": "dropNN"},
                         "type": "reduce"
@@ -650,8 +2552,8 @@ class GrafanaDashboardCreator:
                         ],
                         "datasource": {"type": "__expr__", "uid": "__expr__"},
                         "expression": "B",
-                        "intervalMs": 1000,
-                        "maxDataPoints": 43200,
+                        "intervalMs": interval_ms,
+                        "maxDataPoints": max_data_points,
                         "refId": "C",
                         "type": "threshold"
                     }
@@ -661,7 +2563,7 @@ class GrafanaDashboardCreator:
             "execErrState": "Alerting",
             "for": eval_for,
             "annotations": {
-                "description": f"Host {{{{ $labels.host }}}} has not sent disk monitoring data in the last {max_staleness_minutes} minutes (data points: {{{{ printf \"%.0f\" $values.B.Value }}}}). Telegraf may have stopped or there may be a connectivity issue.",
+                "description": f"Host {{{{ $labels.host }}}} has not sent disk monitoring data in the last {max_staleness_minutes} minutes{point_count}. Telegraf may have stopped or there may be a connectivity issue.",
                 "summary": "Host {{ $labels.host }} stopped sending monitoring data"
             },
             "labels": {
@@ -671,54 +2573,21 @@ class GrafanaDashboardCreator:
             },
             "intervalSeconds": interval_seconds
         }
-        
-        # Create or update the alert rule
-        if existing_rule:
-            # Update existing rule
-            alert_rule['uid'] = existing_rule['uid']
-            url = f"{self.grafana_url}/api/v1/provisioning/alert-rules/{existing_rule['uid']}"
-            response = requests.put(url, json=alert_rule, headers=self.headers)
-            action = "updated"
-        else:
-            # Create new rule
-            url = f"{self.grafana_url}/api/v1/provisioning/alert-rules"
-            response = requests.post(url, json=alert_rule, headers=self.headers)
-            action = "created"
-        
-        if response.status_code in [200, 201]:
-            result = response.json()
-            print(f"✅ Data staleness alert rule {action} successfully!")
-            return result.get('uid', existing_rule['uid'] if existing_rule else '')
-        else:
-            print(f"❌ Failed to {action[:-1]} data staleness alert rule: {response.status_code}")
-            print(f"   Response: {response.text}")
-            return None
 
-    def create_notification_policy(self, alert_rule_uid, staleness_alert_uid=None):
-        """Create notification policy to route alerts to Pushover."""
-        # First, get existing notification policies
-        url = f"{self.grafana_url}/api/v1/provisioning/policies"
-        response = requests.get(url, headers=self.headers)
-        
-        if response.status_code != 200:
-            print(f"❌ Failed to get existing policies: {response.status_code}")
-            return False
-            
-        existing_policy = response.json()
-        
-        # Remove any existing disk monitoring policies to avoid duplicates
-        if "routes" in existing_policy:
-            existing_policy["routes"] = [
-                route for route in existing_policy["routes"] 
-                if not (route.get("object_matchers") and 
-                       any(matcher[0] == "alertname" and matcher[2] in ["Disk Usage Alert", "Host Data Staleness Alert"]
-                           for matcher in route.get("object_matchers", [])))
-            ]
-        
+    def build_notification_policy_routes(self, titles=None):
+        """Build the nested notification policy routes for disk monitoring alerts.
+
+        ``titles`` limits the routes to rules that exist; by default every
+        generated rule gets one.
+
+        Keys left at Grafana's default (``continue: false``) are not sent, as
+        Grafana leaves them out of the routes it returns.
+        """
+        titles = self.alert_rule_titles() if titles is None else titles
         # Add our disk monitoring policies as nested policies
         disk_policies = [
             {
-                "receiver": "disk-monitoring-pushover",
+                "receiver": CONTACT_POINT_NAME,
                 "object_matchers": [
                     [
                         "alertname",
@@ -726,7 +2595,6 @@ class GrafanaDashboardCreator:
                         "Disk Usage Alert"
                     ]
                 ],
-                "continue": False,
                 "group_by": ["host", "path"],
                 "group_wait": "5s",
                 "group_interval": "5m",
@@ -734,44 +2602,68 @@ class GrafanaDashboardCreator:
             }
         ]
         
-        # Add staleness alert policy if we created one
-        if staleness_alert_uid:
-            disk_policies.append({
-                "receiver": "disk-monitoring-pushover",
-                "object_matchers": [
-                    [
-                        "alertname",
-                        "=",
-                        "Host Data Staleness Alert"
-                    ]
-                ],
-                "continue": False,
-                "group_by": ["host"],
-                "group_wait": "10s",
-                "group_interval": "10m",
-                "repeat_interval": "2h"
-            })
+        # Add staleness alert policies (one per collection tier in use) for those we created
+        for title in titles:
+            if title.startswith(STALENESS_ALERT_TITLE):
+                disk_policies.append({
+                    "receiver": CONTACT_POINT_NAME,
+                    "object_matchers": [
+                        [
+                            "alertname",
+                            "=",
+                            title
+                        ]
+                    ],
+                    "group_by": ["host"],
+                    "group_wait": "10s",
+                    "group_interval": "10m",
+                    "repeat_interval": "2h"
+                })
+        return disk_policies
+
+    @timed_phase('policy')
+    def create_notification_policy(self, rule_uids):
+        """Create notification policy to route alerts to Pushover, changing only our own routes.
+
+        ``rule_uids`` maps the titles of the rules written to their UIDs; each gets a route.
+        """
+        # First, get existing notification policies
+        url = f"{self.grafana_url}/api/v1/provisioning/policies"
+        response = self.http.get(url)
+        
+        if response.status_code != 200:
+            print(f"❌ Failed to get existing policies: {response.status_code}")
+            return False
+            
+        existing_policy = response.json()
+        titles = [title for title in self.alert_rule_titles() if rule_uids.get(title)]
+        routes, (added, updated, removed) = merge_policy_routes(
+            existing_policy.get("routes") or [],
+            self.build_notification_policy_routes(titles)
+        )
+        changed = added + updated + removed
         
-        # Add to existing nested policies or create new list
-        if "routes" not in existing_policy:
-            existing_policy["routes"] = []
-        existing_policy["routes"].extend(disk_policies)
+        if not changed and self.skip_write("Notification policy"):
+            return True
         
-        # Update the notification policy
-        response = requests.put(url, json=existing_policy, headers=self.headers)
+        # The API only takes whole trees; other teams' routes go back exactly as read
+        existing_policy["routes"] = routes
+        response = self.http.put(url, json=existing_policy)
         
         if response.status_code == 202:
-            print(f"✅ Notification policy updated successfully!")
+            self.record_write()
+            print(f"✅ Notification policy updated successfully! "
+                  f"({added} added, {updated} updated, {removed} removed of {len(routes)} routes)")
             return True
         else:
             print(f"❌ Failed to update notification policy: {response.status_code}")
             print(f"   Response: {response.text}")
             return False
 
-    def get_existing_dashboard(self, title="Disk Monitoring"):
+    def get_existing_dashboard(self, title=DASHBOARD_TITLE):
         """Get existing dashboard by title."""
         url = f"{self.grafana_url}/api/search"
-        response = requests.get(url, params={"query": title, "type": "dash-db"}, headers=self.headers)
+        response = self.http.get(url, params={"query": title, "type": "dash-db"})
 
         if response.status_code == 200:
             results = response.json()
@@ -785,24 +2677,114 @@ class GrafanaDashboardCreator:
 
         return None
 
+    def get_dashboard(self, uid):
+        """Get a dashboard's stored JSON model by UID."""
+        url = f"{self.grafana_url}/api/dashboards/uid/{uid}"
+        response = self.http.get(url)
+        if response.status_code == 200:
+            return response.json().get("dashboard")
+        return None
+
+    def get_dashboard_version(self, uid):
+        """Latest saved version number of a dashboard, or None if it can't be found."""
+        url = f"{self.grafana_url}/api/dashboards/uid/{uid}/versions"
+        response = self.http.get(url, params={"limit": 1})
+        if response.status_code != 200:
+            return None
+        versions = response.json()
+        # Grafana 11 wraps the list in {"versions": [...]}
+        if isinstance(versions, dict):
+            versions = versions.get("versions", [])
+        return versions[0].get("version") if versions else None
+
+    def revalidate_cached_dashboard(self, title, content_hash):
+        """Check a cached dashboard entry with a cheap version lookup.
+
+        Returns ``(existing, unchanged)``: ``existing`` is the search-style
+        reference to reuse (or None to fall back to a title search) and
+        ``unchanged`` is True/False when the cache settles it, None otherwise.
+        """
+        cached = self.state.get('dashboard', title)
+        if not cached:
+            return None, None
+
+        version = self.get_dashboard_version(cached['uid'])
+        if version is None:
+            print(f"⚠️  Cached dashboard UID {cached['uid']} not found, searching by title")
+            self.state.forget('dashboard', title)
+            return None, None
+
+        existing = {"uid": cached['uid'], "id": None}
+        if version != cached.get('version'):
+            # Edited outside this tool since our last write, compare the full model
+            return existing, None
+        return existing, cached.get('hash') == content_hash
+
+    @timed_phase('dashboard')
     def create_dashboard(self):
-        """Create or update the dashboard in Grafana."""
-        dashboard_json = self.create_dashboard_json()
+        """Create or update the dashboard(s) in Grafana, from the prebuilt payloads when there are any."""
+        dashboards = self.prebuilt_dashboards
+        if dashboards is not None:
+            titles = [dashboard_json["dashboard"]["title"] for dashboard_json in dashboards]
+            if any(self.dashboard_uid(title) != self.stable_uid('dashboard', title) for title in titles):
+                # Links between dashboards must use the UIDs of dashboards adopted by title
+                print("Rebuilding dashboards for this target's adopted dashboard UIDs")
+                dashboards = None
+        if dashboards is None:
+            dashboards = self.build_dashboards()
+        else:
+            # write_dashboard sets the UID and ID on the payload it writes
+            dashboards = copy.deepcopy(dashboards)
+            self.warn_retired_dashboards(dashboards)
+        results = [self.write_dashboard(dashboard_json) for dashboard_json in dashboards]
+        return all(results)
+
+    def write_dashboard(self, dashboard_json):
+        """Create or update one dashboard, skipping the write when nothing changed."""
+        dashboard = dashboard_json["dashboard"]
+        title = dashboard["title"]
+        content_hash = canonical_hash({key: value for key, value in dashboard.items()
+                                       if key not in DASHBOARD_SERVER_FIELDS})
 
-        existing = self.get_existing_dashboard()
+        existing, unchanged = self.revalidate_cached_dashboard(title, content_hash)
+        label = f"Dashboard '{title}'"
+        if unchanged and self.skip_write(label):
+            return True
+
+        remote = None
+        if existing is None:
+            uid = self.stable_uid('dashboard', title)
+            remote = self.get_dashboard(uid)
+            if remote is not None:
+                existing = {"uid": uid, "id": remote.get("id")}
+            else:
+                # One-time migration: adopt a dashboard created before UIDs were deterministic
+                existing = self.get_existing_dashboard(title)
+                if existing:
+                    print(f"Adopting existing dashboard '{title}' found by title")
         if existing:
-            dashboard_json["dashboard"]["uid"] = existing["uid"]
-            dashboard_json["dashboard"]["id"] = existing["id"]
+            dashboard["uid"] = existing["uid"]
+            dashboard["id"] = existing["id"]
+            if unchanged is None and not self.force_write:
+                if remote is None:
+                    remote = self.get_dashboard(existing["uid"])
+                if self.is_unchanged(label, dashboard, remote, ignore=DASHBOARD_SERVER_FIELDS):
+                    self.state.set('dashboard', title, uid=existing["uid"],
+                                   version=remote.get("version"), hash=content_hash)
+                    return True
             action = "updated"
         else:
+            dashboard["uid"] = self.stable_uid('dashboard', title)
             action = "created"
 
         url = f"{self.grafana_url}/api/dashboards/db"
-        response = requests.post(url, json=dashboard_json, headers=self.headers)
+        response = self.http.post(url, json=dashboard_json)
 
         if response.status_code == 200:
+            self.record_write()
             result = response.json()
-            print(f"✅ Dashboard {action} successfully!")
+            self.state.set('dashboard', title, uid=result['uid'], version=result.get('version'), hash=content_hash)
+            print(f"✅ {label} {action} successfully!")
             print(f"   Dashboard URL: {self.grafana_url}/d/{result['uid']}")
         else:
             print(f"❌ Failed to {action[:-1]} dashboard: {response.status_code}")
@@ -813,112 +2795,10 @@ class GrafanaDashboardCreator:
 
     def export_alert_config(self):
         """Export alert rule configuration for manual import."""
-        threshold = self.config.get('disk_usage_threshold', 85)
-        eval_for = self.config.get('alert_eval_for', '5m')
-        interval_seconds = self.config.get('alert_interval_seconds', 60)
-        
-        # Create alert rule configuration with proper 3-query structure (A -> B -> C)
-        alert_rule = {
-            "folderUID": "",
-            "title": "Disk Usage Alert",
-            "condition": "C",
-            "data": [
-                {
-                    "refId": "A",
-                    "queryType": "",
-                    "relativeTimeRange": {
-                        "from": 600,
-                        "to": 0
-                    },
-                    "datasourceUid": "denl7c5ccxam8a",
-                    "model": {
-                        "datasource": {"type": "influxdb", "uid": "denl7c5ccxam8a"},
-                        "groupBy": [
-                            {"params": ["$__interval"], "type": "time"},
-                            {"params": ["host::tag"], "type": "tag"},
-                            {"params": ["path::tag"], "type": "tag"},
-                            {"params": ["null"], "type": "fill"}
-                        ],
-                        "intervalMs": 1000,
-                        "maxDataPoints": 43200,
-                        "measurement": "disk",
-                        "orderByTime": "ASC",
-                        "policy": "default",
-                        "refId": "A",
-                        "resultFormat": "time_series",
-                        "select": [
-                            [{"params": ["used_percent"], "type": "field"}, {"params": [], "type": "mean"}]
-                        ],
-                        "tags": []
-                    }
-                },
-                {
-                    "refId": "B",
-                    "queryType": "",
-                    "relativeTimeRange": {
-                        "from": 0,
-                        "to": 0
-                    },
-                    "datasourceUid": "__expr__",
-                    "model": {
-                        "conditions": [
-                            {
-                                "evaluator": {"params": [], "type": "gt"},
-                                "operator": {"type": "and"},
-                                "query": {"params": ["B"]},
-                                "reducer": {"params": [], "type": "last"},
-                                "type": "query"
-                            }
-                        ],
-                        "datasource": {"type": "__expr__", "uid": "__expr__"},
-                        "expression": "A",
-                        "intervalMs": 1000,
-                        "maxDataPoints": 43200,
-                        "reducer": "last",
-                        "refId": "B",
-                        "settings": {"mode": "dropNN"},
-                        "type": "reduce"
-                    }
-                },
-                {
-                    "refId": "C",
-                    "queryType": "",
-                    "relativeTimeRange": {
-                        "from": 0,
-                        "to": 0
-                    },
-                    "datasourceUid": "__expr__",
-                    "model": {
-                        "conditions": [
-                            {
-                                "evaluator": {"params": [threshold], "type": "gt"},
-                                "operator": {"type": "and"},
-                                "query": {"params": ["C"]},
-                                "reducer": {"params": [], "type": "last"},
-                                "type": "query"
-                            }
-                        ],
-                        "datasource": {"type": "__expr__", "uid": "__expr__"},
-                        "expression": "B",
-                        "intervalMs": 1000,
-                        "maxDataPoints": 43200,
-                        "refId": "C",
-                        "type": "threshold"
-                    }
-                }
-            ],
-            "noDataState": "NoData",
-            "execErrState": "Alerting",
-            "for": eval_for,
-            "annotations": {
-                "description": f"Disk usage on {{{{ $labels.host }}}}:{{{{ $labels.path }}}} is {{{{ printf \"%.1f\" $values.B.Value }}}}% which exceeds the threshold of {threshold}%",
-                "summary": "High disk usage detected on {{ $labels.host }}"
-            },
-            "labels": {
-                "severity": "warning",
-                "team": "infrastructure"
-            },
-            "intervalSeconds": interval_seconds
+        alert_rule = self.build_alert_rule("")
+        alert_rule["labels"] = {
+            "severity": "warning",
+            "team": "infrastructure"
         }
         
         # Export to file
@@ -928,7 +2808,7 @@ class GrafanaDashboardCreator:
         
         # Create notification policy update
         notification_policy = {
-            "receiver": "disk-monitoring-pushover",
+            "receiver": CONTACT_POINT_NAME,
             "object_matchers": [
                 ["alertname", "=", "Disk Usage Alert"]
             ],
@@ -968,6 +2848,101 @@ class GrafanaDashboardCreator:
         
         return True
 
+    @timed_phase('bundle')
+    def export_bundle(self, directory, provisioning_path='/etc/grafana/provisioning'):
+        """Write dashboards and alerting as Grafana file-provisioning files, without contacting Grafana.
+
+        ``provisioning_path`` is where ``directory`` is mounted in the Grafana
+        container; the dashboard provider points at it.
+        """
+        import yaml
+        directory = Path(directory)
+        org_id = self.org_id or 1
+        folder = DASHBOARD_TITLE
+        written = []
+
+        def write(path, content):
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(path, 'w') as f:
+                f.write(content)
+            written.append(path)
+
+        dashboard_dir = directory / 'dashboards' / 'disk-monitoring'
+        for dashboard_json in self.build_dashboards(offline=True):
+            dashboard = dashboard_json["dashboard"]
+            dashboard["uid"] = self.dashboard_uid(dashboard["title"])
+            dashboard.pop("id", None)
+            write(dashboard_dir / f"{slugify(dashboard['title'])}.json", json.dumps(dashboard, indent=2) + '\n')
+        write(directory / 'dashboards' / 'disk-monitoring.yaml', yaml.safe_dump({
+            "apiVersion": 1,
+            "providers": [{
+                "name": "disk-monitoring",
+                "orgId": org_id,
+                "folder": folder,
+                "type": "file",
+                "disableDeletion": False,
+                "allowUiUpdates": False,
+                "options": {"path": f"{provisioning_path.rstrip('/')}/dashboards/disk-monitoring"}
+            }]
+        }, sort_keys=False))
+
+        groups = {}
+        for rule in (build("") for build in self.alert_rule_builders().values()):
+            group = groups.setdefault(rule["ruleGroup"], {
+                "orgId": org_id,
+                "name": rule["ruleGroup"],
+                "folder": folder,
+                "interval": format_duration(rule["intervalSeconds"]),
+                "rules": []
+            })
+            # File provisioning takes the folder and interval from the group
+            rule = {key: value for key, value in rule.items()
+                    if key not in ("folderUID", "ruleGroup", "intervalSeconds")}
+            group["rules"].append(dict(uid=self.stable_uid('alert_rule', rule["title"]), **rule))
+
+        template = self.build_notification_template()
+        policy_routes = self.build_notification_policy_routes()
+        alerting = {
+            "apiVersion": 1,
+            "groups": list(groups.values()),
+            "templates": [dict(orgId=org_id, **template)],
+            "contactPoints": [{
+                "orgId": org_id,
+                "name": CONTACT_POINT_NAME,
+                "receivers": [{
+                    "uid": self.stable_uid('contact_point', CONTACT_POINT_NAME),
+                    "type": "pushover",
+                    # Grafana expands these from its own environment at startup
+                    "settings": dict({
+                        "userKey": PUSHOVER_ENV_REFERENCES[0],
+                        "apiToken": PUSHOVER_ENV_REFERENCES[1]
+                    }, **self.build_pushover_message_settings(template["name"]))
+                }]
+            }],
+            # A provisioned policy tree replaces the organization's whole tree
+            "policies": [{
+                "orgId": org_id,
+                "receiver": CONTACT_POINT_NAME,
+                "group_by": ["grafana_folder", "alertname"],
+                "routes": policy_routes
+            }]
+        }
+        # Grafana expands $VAR and ${VAR} throughout the file, so every other $ (template
+        # variables, $labels, $__interval) is written as $$
+        alerting = escape_env_interpolation(alerting, keep=PUSHOVER_ENV_REFERENCES)
+        write(directory / 'alerting' / 'disk-monitoring.yaml',
+              yaml.safe_dump(alerting, sort_keys=False, allow_unicode=True, width=1000))
+
+        for path in written:
+            print(f"📦 Wrote {path}")
+        return written
+
+    def warn_missing_staleness_rules(self, rule_uids):
+        """Warn about each staleness rule that was not written; it gets no notification route."""
+        for title in self.alert_rule_titles():
+            if title.startswith(STALENESS_ALERT_TITLE) and rule_uids.get(title) is None:
+                print(f"⚠️  {title} creation failed, leaving it out of the notification policy...")
+
     def create_alerting(self):
         """Create alert rule, notification template, and notification policy."""
         print("Creating notification template...")
@@ -979,64 +2954,307 @@ class GrafanaDashboardCreator:
             print("Updating contact point to use custom template...")
             self.update_contact_point_template(template_name)
         
-        print("Creating disk usage alert rule...")
-        alert_rule_uid = self.create_alert_rule()
+        print("Creating alert rules...")
+        rule_uids = self.create_alert_rules()
+        alert_rule_uid = rule_uids.get("Disk Usage Alert")
         if alert_rule_uid is None:
             print("❌ Disk usage alert creation failed due to permissions.")
             print("🔄 Falling back to export mode...")
             return self.export_alert_config()
         
-        print("Creating data staleness alert rule...")
-        staleness_alert_uid = self.create_data_freshness_alert_rule()
-        if staleness_alert_uid is None:
-            print("⚠️  Data staleness alert creation failed, continuing with disk usage alert only...")
+        self.warn_missing_staleness_rules(rule_uids)
             
         print("Updating notification policy...")
-        return self.create_notification_policy(alert_rule_uid, staleness_alert_uid)
+        return self.create_notification_policy(rule_uids)
+
+    def provisioning_steps(self, with_alerts=False):
+        """Describe dashboard and alerting provisioning as a dependency graph.
+
+        Mirrors create_dashboard() followed by create_alerting(), but only the
+        contact point (needs the template) and the notification policy (needs
+        the rule UIDs) wait on other steps.
+        """
+        steps = {'dashboard': (lambda results: self.create_dashboard(), [])}
+        if not with_alerts:
+            return steps
+
+        def contact_point(results):
+            if results['template'] is None:
+                print("⚠️  Template creation failed, skipping contact point update...")
+                return False
+            return self.update_contact_point_template(results['template'])
+
+        def policy(results):
+            if results['rules'].get("Disk Usage Alert") is None:
+                print("❌ Disk usage alert creation failed due to permissions.")
+                print("🔄 Falling back to export mode...")
+                return self.export_alert_config()
+            self.warn_missing_staleness_rules(results['rules'])
+            return self.create_notification_policy(results['rules'])
+
+        steps.update({
+            'template': (lambda results: self.create_notification_template(), []),
+            'contact_point': (contact_point, ['template']),
+            'rules': (lambda results: self.create_alert_rules(), []),
+            'policy': (policy, ['rules'])
+        })
+        return steps
+
+    def provision_concurrently(self, with_alerts=False, concurrency=4):
+        """Run the provisioning graph with up to ``concurrency`` steps in flight."""
+        results = run_dependency_graph(self.provisioning_steps(with_alerts), concurrency)
+        if not results['dashboard']:
+            return False
+        if with_alerts and not results['policy']:
+            print("⚠️  Dashboard created but alerting setup failed")
+            return False
+        return True
+
+    def provision(self, with_alerts=False, concurrency=1):
+        """Create the dashboards and, if requested, the alerting; concurrently when ``concurrency`` > 1."""
+        if concurrency > 1:
+            return self.provision_concurrently(with_alerts, concurrency)
+        if not self.create_dashboard():
+            return False
+        if with_alerts and not self.create_alerting():
+            print("⚠️  Dashboard created but alerting setup failed")
+            return False
+        return True
+
+    def provision_targets(self, targets, with_alerts=False, concurrency=1):
+        """Provision every target in ``targets`` (name to creator) at once, each isolated from the others' failures.
+
+        Dashboards are built once here and shared; alert rules embed the
+        target's folder UID so each target builds its own. Returns the
+        success and elapsed seconds of every target by name.
+        """
+        self.prebuilt_dashboards = self.build_dashboards(offline=True)
+        for target in targets.values():
+            target.prebuilt_dashboards = self.prebuilt_dashboards
+
+        def run(name):
+            started = time.monotonic()
+            with PrefixedOutput.prefixed(f"[{name}] "):
+                try:
+                    success = targets[name].provision(with_alerts, concurrency)
+                except Exception as e:
+                    print(f"❌ Error: {e}")
+                    success = False
+            return success, time.monotonic() - started
+
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=len(targets)) as executor:
+            return dict(zip(targets, executor.map(run, targets)))
 
 def main():
     parser = argparse.ArgumentParser(description='Create Grafana dashboard for disk monitoring')
-    parser.add_argument('--grafana-url', required=True, help='Grafana URL (e.g., http://grafana.example.com:3000)')
-    parser.add_argument('--api-key', required=True, help='Grafana API key with dashboard creation permissions')
+    parser.add_argument('command', nargs='?', choices=['deploy', 'plan', 'bundle'], default='deploy',
+                        help='deploy: provision Grafana (default); plan: model InfluxDB query and write load; '
+                             'bundle: write Grafana file-provisioning files. plan and bundle need no Grafana')
+    parser.add_argument('--grafana-url', default=os.environ.get('GRAFANA_URL'),
+                        help='Grafana URL (e.g., http://grafana.example.com:3000, default: $GRAFANA_URL)')
+    parser.add_argument('--api-key', default=os.environ.get('GRAFANA_API_KEY'),
+                        help='Grafana API key with dashboard creation permissions (default: $GRAFANA_API_KEY)')
     parser.add_argument('--with-alerts', action='store_true', help='Also create alert rules and notification policies')
     parser.add_argument('--debug-alerts', action='store_true', help='Just examine existing alert rules and policies')
+    parser.add_argument('--connect-timeout', type=float, default=5, help='Seconds to wait for a connection to Grafana (default: 5)')
+    parser.add_argument('--timeout', type=float, default=30, help='Seconds to wait for a Grafana response (default: 30)')
+    parser.add_argument('--max-retries', type=int, default=4, help='Retries for throttled or failed Grafana requests (default: 4)')
+    parser.add_argument('--org-id', type=int, help='Grafana organization ID (default: the API key\'s organization)')
+    parser.add_argument('--targets', metavar='FILE',
+                        help='deploy: provision every Grafana instance and org listed in FILE in parallel '
+                             '(see targets.example.yml) instead of --grafana-url')
+    parser.add_argument('--state-file', default=str(DEFAULT_STATE_FILE),
+                        help='File caching UIDs, versions and hashes of provisioned objects (default: next to this script)')
+    parser.add_argument('--no-state', action='store_true', help='Neither read nor write the state file')
+    parser.add_argument('--no-inventory-cache', action='store_true',
+                        help='Parse the inventory and variable files without reading or writing the parse cache')
+    parser.add_argument('--force-write', action='store_true',
+                        help='Write every object even when its content is unchanged')
+    parser.add_argument('--shard-by', choices=['group'],
+                        help='Split the dashboard into one per inventory group, linked from an index dashboard')
+    parser.add_argument('--max-hosts-per-dashboard', type=int, metavar='N',
+                        help='Split dashboards so none holds more than N hosts, linked from an index dashboard')
+    parser.add_argument('--layout', choices=['inline', 'repeat'], default='inline',
+                        help='inline: panels per host (default); repeat: one row repeated over a $host variable')
+    parser.add_argument('--host-variable-source', choices=['influxdb', 'inventory'], default='influxdb',
+                        help='Where the repeat layout\'s $host variable gets its values (default: influxdb)')
+    parser.add_argument('--overview', choices=['section', 'dashboard', 'none'], default='none',
+                        help='Fleet overview: a section atop the landing dashboard, its own dashboard, or none (default)')
+    parser.add_argument('--overview-top', type=int, default=10, metavar='N',
+                        help='Number of fullest mounts the overview lists (default: 10)')
+    parser.add_argument('--collapse-hosts', action='store_true',
+                        help='Put each host\'s panels in a collapsed row so they only query when opened (inline layout)')
+    parser.add_argument('--expand-above', type=float, metavar='PERCENT',
+                        help='With --collapse-hosts, leave rows of hosts whose fullest mount is above PERCENT expanded')
+    parser.add_argument('--io-dashboard', action='store_true',
+                        help='Also generate an I/O dashboard (IOPS, throughput, await, utilisation) from diskio')
+    parser.add_argument('--benchmark-layouts', metavar='COUNTS', nargs='?', const='10,100,500,1000',
+                        help='Compare dashboard layouts for comma-separated host counts and exit (default: 10,100,500,1000)')
+    parser.add_argument('--profile-startup', action='store_true',
+                        help='Time imports, config load and JSON generation, then exit; fails when over --startup-budget-ms')
+    parser.add_argument('--startup-budget-ms', type=float, default=500, metavar='MS',
+                        help='Startup time --profile-startup holds the tool to (default: 500)')
+    parser.add_argument('--alert-query', choices=['scan', 'last-point'], default='scan',
+                        help='Alert rule queries: scan every point in time buckets (default) or read the last point per series')
+    parser.add_argument('--concurrency', type=int, default=1, metavar='N',
+                        help='Run up to N independent provisioning steps in parallel (default: 1, sequential)')
+    parser.add_argument('--bundle-dir', default='grafana-provisioning', metavar='DIR',
+                        help='bundle: directory to write the provisioning files to (default: grafana-provisioning)')
+    parser.add_argument('--provisioning-path', default='/etc/grafana/provisioning', metavar='PATH',
+                        help='bundle: where the bundle directory is mounted in Grafana (default: /etc/grafana/provisioning)')
+    parser.add_argument('--metrics-json', metavar='PATH',
+                        help='Write per-request and per-phase run metrics as JSON to PATH')
+    parser.add_argument('--metrics-line-protocol', metavar='PATH',
+                        help='Write the run metrics as InfluxDB line protocol to PATH')
+    parser.add_argument('--metrics-influxdb', metavar='URL', nargs='?', const='',
+                        help='Write the run metrics to influxdb_database, at URL or the role\'s InfluxDB by default')
+    parser.add_argument('--viewers', type=int, default=1, metavar='N',
+                        help='plan: viewers keeping each dashboard open (default: 1)')
+    parser.add_argument('--mounts-per-host', type=int, default=4, metavar='N',
+                        help='plan: mounts per host when monitor_mount_points is not set (default: 4)')
+    parser.add_argument('--devices-per-host', type=int, default=2, metavar='N',
+                        help='plan: block devices per host (default: 2)')
+    parser.add_argument('--max-query-rate', type=float, metavar='QPS',
+                        help='plan: InfluxDB queries per second budget')
+    parser.add_argument('--max-write-rate', type=float, metavar='POINTS',
+                        help='plan: InfluxDB points written per second budget')
+    parser.add_argument('--fail-over-budget', action='store_true',
+                        help='plan: exit with an error, rather than warn, when a budget is exceeded')
     
     args = parser.parse_args()
+    if args.concurrency < 1:
+        parser.error('--concurrency must be at least 1')
+    if args.max_hosts_per_dashboard is not None and args.max_hosts_per_dashboard < 1:
+        parser.error('--max-hosts-per-dashboard must be at least 1')
+    if args.collapse_hosts and args.layout == 'repeat':
+        parser.error('--collapse-hosts applies to the inline layout only')
+    if args.expand_above is not None and not args.collapse_hosts:
+        parser.error('--expand-above requires --collapse-hosts')
+    if args.targets and (args.command != 'deploy' or args.debug_alerts):
+        parser.error('--targets applies to deploy only')
+    if args.targets and args.expand_above is not None:
+        parser.error('--expand-above needs one Grafana\'s host usage and cannot be used with --targets')
+    if (args.command == 'deploy' and not (args.benchmark_layouts or args.profile_startup or args.targets)
+            and not (args.grafana_url and args.api_key)):
+        parser.error('--grafana-url and --api-key (or GRAFANA_URL and GRAFANA_API_KEY) are required')
+    targets = []
+    if args.targets:
+        try:
+            targets = load_targets(args.targets)
+        except (OSError, ValueError) as e:
+            parser.error(f"--targets: {e}")
+        sys.stdout = PrefixedOutput(sys.stdout)
     
-    creator = GrafanaDashboardCreator(args.grafana_url, args.api_key)
+    client_options = {
+        'connect_timeout': args.connect_timeout,
+        'read_timeout': args.timeout,
+        'max_retries': args.max_retries,
+        'pool_size': max(10, args.concurrency)
+    }
+    creator = GrafanaDashboardCreator(
+        None if targets else args.grafana_url,
+        args.api_key,
+        org_id=None if targets else args.org_id,
+        state_file=None if args.no_state else args.state_file,
+        **client_options
+    )
+    creator.force_write = args.force_write
+    creator.inventory_cache = None if args.no_inventory_cache else DEFAULT_INVENTORY_CACHE
+    creator.shard_by = args.shard_by
+    creator.max_hosts_per_dashboard = args.max_hosts_per_dashboard
+    creator.layout = args.layout
+    creator.host_variable_source = args.host_variable_source
+    creator.overview = args.overview
+    creator.overview_top = args.overview_top
+    creator.collapse_hosts = args.collapse_hosts
+    creator.expand_above = args.expand_above
+    creator.alert_query = args.alert_query
+    creator.io_dashboard = args.io_dashboard
+    target_creators = {}
+    target_results = {}
     
     try:
+        if args.profile_startup:
+            sys.exit(0 if creator.profile_startup(args.startup_budget_ms) else 1)
+        
         creator.load_ansible_config()
         
+        if args.benchmark_layouts:
+            creator.benchmark_layouts([int(count) for count in args.benchmark_layouts.split(',')])
+            sys.exit(0)
+        
+        if args.command == 'plan':
+            within_budget = creator.plan(
+                viewers=args.viewers,
+                mounts_per_host=args.mounts_per_host,
+                devices_per_host=args.devices_per_host,
+                max_query_rate=args.max_query_rate,
+                max_write_rate=args.max_write_rate
+            )
+            sys.exit(1 if args.fail_over_budget and not within_budget else 0)
+        
+        if args.command == 'bundle':
+            started = time.monotonic()
+            creator.export_bundle(args.bundle_dir, args.provisioning_path)
+            print(f"⏱️  Bundle written in {(time.monotonic() - started) * 1000:.0f}ms")
+            sys.exit(0)
+        
+        if targets:
+            target_creators.update({target['name']: creator.for_target(target['url'], target['api_key'],
+                                                                       target['org_id'], **client_options)
+                                    for target in targets})
+            started = time.monotonic()
+            target_results.update(creator.provision_targets(target_creators, args.with_alerts, args.concurrency))
+            width = max(len(name) for name in target_results)
+            print("\n📋 Targets:")
+            for name, (success, seconds) in target_results.items():
+                print(f"   {'✅' if success else '❌'} {name:<{width}}  {seconds:6.2f}s  "
+                      f"{target_creators[name].grafana_url}")
+            print(f"⏱️  Provisioned {len(target_results)} targets in {time.monotonic() - started:.2f}s "
+                  f"({sum(seconds for _, seconds in target_results.values()):.2f}s one after another)")
+            sys.exit(0 if all(success for success, _ in target_results.values()) else 1)
+        
         # Debug mode - just examine existing rules
         if args.debug_alerts:
             print("=== Existing Alert Rules ===")
             creator.get_existing_alert_rules()
             print("\n=== Existing Notification Policies ===")
             url = f"{creator.grafana_url}/api/v1/provisioning/policies"
-            response = requests.get(url, headers=creator.headers)
+            response = creator.http.get(url)
             if response.status_code == 200:
                 print(json.dumps(response.json(), indent=2))
             else:
                 print(f"Failed to get policies: {response.status_code}")
             sys.exit(0)
         
-        # Create dashboard
-        dashboard_success = creator.create_dashboard()
-        if not dashboard_success:
-            sys.exit(1)
-            
-        # Create alerting if requested
-        if args.with_alerts:
-            alerting_success = creator.create_alerting()
-            if not alerting_success:
-                print("⚠️  Dashboard created but alerting setup failed")
-                sys.exit(1)
-                
-        sys.exit(0)
+        started = time.monotonic()
+        success = creator.provision(args.with_alerts, args.concurrency)
+        if args.concurrency > 1:
+            print(f"⏱️  Provisioned in {time.monotonic() - started:.2f}s with concurrency {args.concurrency}")
+        sys.exit(0 if success else 1)
     except Exception as e:
         print(f"❌ Error: {e}")
         sys.exit(1)
+    finally:
+        if target_creators:
+            print(f"⏱️  Shared phases: {creator.phase_summary()}")
+        for name, target in (target_creators or {'': creator}).items():
+            with PrefixedOutput.prefixed(f"[{name}] " if name else ''):
+                if target.http.stats['requests']:
+                    print(f"📝 Writes: {target.write_summary()}")
+                    print(f"📊 HTTP: {target.http.summary()}")
+                    print(f"🗂️  List cache: {target.collections.summary()}")
+                    print(f"⏱️  Phases: {target.phase_summary()}")
+        if args.metrics_json or args.metrics_line_protocol or args.metrics_influxdb is not None:
+            creator.export_metrics(args.metrics_json, args.metrics_line_protocol, args.metrics_influxdb,
+                                   targets={name: (target, 0 if target_results.get(name, (False,))[0] else 1)
+                                            for name, target in target_creators.items()},
+                                   command=args.command, concurrency=args.concurrency,
+                                   exit_code=getattr(sys.exc_info()[1], 'code', 1))
+        for target in [creator, *target_creators.values()]:
+            target.http.close()
+            target.state.save()
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,116 @@
+"""Load create-grafana-dashboard.py, whose file name is not importable, as a module."""
+
+import importlib.util
+import json
+import re
+from pathlib import Path
+from urllib.parse import urlsplit
+
+SCRIPT = Path(__file__).resolve().parent.parent / 'create-grafana-dashboard.py'
+TELEGRAF_TEMPLATE = Path(__file__).resolve().parents[3] / 'disk-monitoring' / 'templates' / 'telegraf-disk.conf.j2'
+HAS_JINJA2 = importlib.util.find_spec('jinja2') is not None
+
+
+def load_script():
+    spec = importlib.util.spec_from_file_location('create_grafana_dashboard', SCRIPT)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+dashboard = load_script()
+
+DEFAULTS = """\
+influxdb_host: influxdb.example.com
+influxdb_port: 8086
+influxdb_database: disk_monitoring
+telegraf_interval: 60s
+telegraf_flush_interval: 10s
+disk_usage_threshold: 85
+alert_eval_for: 5m
+alert_interval_seconds: 60
+max_data_staleness_minutes: 5
+staleness_alert_eval_for: 2m
+"""
+
+INVENTORY = """\
+all:
+  hosts:
+    nas.example.com:
+    db.example.com:
+  children:
+    storage:
+      hosts:
+        nas.example.com:
+"""
+
+
+def render_telegraf_config(**variables):
+    """Render the disk-monitoring role's Telegraf template as Ansible would for one host."""
+    import jinja2
+    env = jinja2.Environment(trim_blocks=True)
+    # Ansible's filters the template uses
+    env.filters['regex_findall'] = lambda value, pattern: re.findall(pattern, value)
+    env.filters['combine'] = lambda base, override: dict(base, **override)
+    variables = dict({"ansible_facts": {}, "inventory_hostname": "nas.example.com"}, **variables)
+    return env.from_string(TELEGRAF_TEMPLATE.read_text()).render(**variables)
+
+
+def make_creator(root, defaults=DEFAULTS, inventory=INVENTORY, host_vars=None):
+    """A creator loaded from a services tree written under ``root``, with no Grafana or state file."""
+    services = Path(root) / 'services'
+    (services / 'disk-monitoring' / 'defaults').mkdir(parents=True)
+    (services / 'disk-monitoring' / 'defaults' / 'main.yml').write_text(defaults)
+    (services / 'inventory.yml').write_text(inventory)
+    for host, content in (host_vars or {}).items():
+        (services / 'host_vars').mkdir(exist_ok=True)
+        (services / 'host_vars' / f"{host}.yml").write_text(content)
+    creator = dashboard.GrafanaDashboardCreator('http://grafana.invalid:3000', 'key')
+    creator.inventory_cache = None
+    creator.load_ansible_config(services)
+    return creator
+
+
+class FakeResponse:
+    def __init__(self, status_code, body=None):
+        self.status_code = status_code
+        self._body = body
+        self.text = json.dumps(body)
+
+    def json(self):
+        return self._body
+
+
+class FakeGrafana:
+    """Stand-in for GrafanaClient answering from ``routes``: ``{(method, path): (status, body)}``, else 404.
+
+    The last JSON body sent to each ``(method, path)`` is kept in ``bodies``.
+    """
+
+    def __init__(self, routes):
+        self.routes = routes
+        self.calls = []
+        self.bodies = {}
+
+    def request(self, method, url, **kwargs):
+        path = urlsplit(url).path
+        self.calls.append((method, path))
+        if 'json' in kwargs:
+            self.bodies[(method, path)] = kwargs['json']
+        return FakeResponse(*self.routes.get((method, path), (404, {"message": "not found"})))
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def put(self, url, **kwargs):
+        return self.request('PUT', url, **kwargs)
+
+
+def use_fake_grafana(creator, routes):
+    """Point a creator's API calls at a FakeGrafana and return it."""
+    creator.http = FakeGrafana(routes)
+    creator.collections = dashboard.CollectionCache(creator.http)
+    return creator.http
@@ -0,0 +1,80 @@
+import contextlib
+import io
+import re
+import tempfile
+import unittest
+
+from .helpers import DEFAULTS, HAS_JINJA2, dashboard, make_creator, render_telegraf_config
+
+AGGREGATION = DEFAULTS + "telegraf_aggregation: true\n"
+
+
+def creator_with(defaults):
+    with tempfile.TemporaryDirectory() as root, contextlib.redirect_stdout(io.StringIO()) as output:
+        creator = make_creator(root, defaults)
+    return creator, output.getvalue()
+
+
+def diskio_fields(creator):
+    """Every diskio field the I/O dashboard reads."""
+    queries = [panel["targets"][0]["query"] for panel in creator.create_io_dashboard_json()["dashboard"]["panels"]]
+    return set(re.findall(r'last\("(\w+)"\)', ' '.join(queries)))
+
+
+class AggregationModeTest(unittest.TestCase):
+    def test_off_by_default(self):
+        creator, _ = creator_with(DEFAULTS)
+        self.assertIsNone(creator.aggregation)
+        self.assertEqual(creator.diskio_interval, creator.collection_interval)
+
+    def test_defaults_follow_the_staleness_window(self):
+        creator, output = creator_with(AGGREGATION)
+        # Half of max_data_staleness_minutes: 5
+        self.assertEqual(creator.aggregation, {"dedup_interval": 150, "diskio_window": 300})
+        self.assertNotIn("⚠️", output)
+
+    def test_io_dashboard_reads_window_maxima(self):
+        creator, _ = creator_with(AGGREGATION)
+        fields = diskio_fields(creator)
+        self.assertTrue(fields and all(field.endswith("_max") for field in fields))
+        for panel in creator.create_io_dashboard_json()["dashboard"]["panels"]:
+            self.assertEqual(panel["interval"], "5m")
+
+    def test_dedup_interval_reaching_the_staleness_window_warns(self):
+        _, output = creator_with(AGGREGATION + "telegraf_dedup_interval: 5m\n")
+        self.assertIn("telegraf_dedup_interval (5m) is not below the staleness window (5m)", output)
+
+    def test_plan_budgets_aggregated_writes(self):
+        creator, _ = creator_with(AGGREGATION)
+        with contextlib.redirect_stdout(io.StringIO()) as output:
+            creator.plan()
+        self.assertRegex(output.getvalue(), r"aggregated \(configured\) +96-240 +24 +120-264")
+        # Busy disks (240) plus one diskio point per device per window (24), for two hosts
+        self.assertIn("0.15 points/s", output.getvalue())
+
+
+@unittest.skipUnless(HAS_JINJA2, 'jinja2 is not installed')
+class AggregationTemplateTest(unittest.TestCase):
+    def test_off_by_default(self):
+        config = render_telegraf_config()
+        self.assertNotIn("[[processors.dedup]]", config)
+        self.assertNotIn("[[aggregators.basicstats]]", config)
+
+    def test_dedup_default_matches_the_tool(self):
+        config = render_telegraf_config(telegraf_aggregation=True, max_data_staleness_minutes=5)
+        creator, _ = creator_with(AGGREGATION)
+        dedup = re.search(r'dedup_interval = "([^"]+)"', config).group(1)
+        self.assertEqual(dashboard.parse_duration(dedup), creator.aggregation["dedup_interval"])
+        self.assertIn('period = "5m"', config)
+        self.assertIn('stats = ["max"]', config)
+
+    def test_diskio_keeps_every_field_the_dashboard_reads(self):
+        config = render_telegraf_config(telegraf_aggregation=True)
+        creator, _ = creator_with(AGGREGATION)
+        diskio = config[config.index("[[inputs.diskio]]"):]
+        kept = set(re.findall(r'"(\w+)"', re.search(r'fieldpass = \[([^\]]*)\]', diskio).group(1)))
+        self.assertLessEqual({field.removesuffix("_max") for field in diskio_fields(creator)}, kept)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import contextlib
+import io
+import tempfile
+import unittest
+
+from .helpers import make_creator, use_fake_grafana
+
+
+class WriteRuleGroupTest(unittest.TestCase):
+    def setUp(self):
+        with tempfile.TemporaryDirectory() as root, contextlib.redirect_stdout(io.StringIO()):
+            self.creator = make_creator(root)
+
+    def test_reselects_folder_when_cached_one_is_gone(self):
+        group = "disk-monitoring-1"
+        self.creator.state.set('rule_group', group, folder_uid='deleted')
+        http = use_fake_grafana(self.creator, {
+            ('GET', '/api/folders'): (200, [{"uid": "monitoring", "title": "Monitoring"}]),
+            ('GET', '/api/v1/provisioning/alert-rules'): (200, []),
+            ('PUT', f'/api/v1/provisioning/folder/monitoring/rule-groups/{group}'): (200, {})
+        })
+        with contextlib.redirect_stdout(io.StringIO()) as output:
+            uids = self.creator.write_rule_group(group, 60, [self.creator.build_alert_rule])
+
+        self.assertIn("Cached folder deleted of rule group", output.getvalue())
+        self.assertIsNotNone(uids["Disk Usage Alert"])
+        self.assertIn(('PUT', f'/api/v1/provisioning/folder/monitoring/rule-groups/{group}'), http.calls)
+        self.assertEqual(self.creator.state.get('rule_group', group), {"folder_uid": "monitoring"})
+
+    def test_keeps_cached_folder_that_still_exists(self):
+        group = "disk-monitoring-1"
+        self.creator.state.set('rule_group', group, folder_uid='monitoring')
+        http = use_fake_grafana(self.creator, {
+            ('GET', '/api/folders/monitoring'): (200, {"uid": "monitoring", "title": "Monitoring"}),
+            ('GET', '/api/v1/provisioning/alert-rules'): (200, []),
+            ('PUT', f'/api/v1/provisioning/folder/monitoring/rule-groups/{group}'): (200, {})
+        })
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.creator.write_rule_group(group, 60, [self.creator.build_alert_rule])
+        self.assertNotIn(('GET', '/api/folders'), http.calls)
+
+    def test_stored_group_matching_but_for_server_fields_is_not_written(self):
+        group, interval = self.creator.rule_group("Disk Usage Alert")
+        stored = self.creator.build_alert_rule('monitoring')
+        # As Grafana returns it: server-side fields added, empty values left out
+        stored = {key: value for key, value in stored.items() if value not in ({}, [], None)}
+        stored.update(uid="usage-uid", id=7, orgID=1, updated="2026-01-01T00:00:00Z", provenance="api")
+        self.creator.state.set('rule_group', group, folder_uid='monitoring')
+        http = use_fake_grafana(self.creator, {
+            ('GET', f'/api/v1/provisioning/folder/monitoring/rule-groups/{group}'):
+                (200, {"title": group, "folderUid": "monitoring", "interval": interval, "rules": [stored]})
+        })
+        with contextlib.redirect_stdout(io.StringIO()):
+            uids = self.creator.write_rule_group(group, interval, [self.creator.build_alert_rule])
+
+        self.assertEqual(uids, {"Disk Usage Alert": "usage-uid"})
+        self.assertEqual(http.calls, [('GET', f'/api/v1/provisioning/folder/monitoring/rule-groups/{group}')])
+        self.assertEqual(self.creator.write_stats, {'written': 0, 'skipped': 1})
+
+
+class StalenessRuleTest(unittest.TestCase):
+    def setUp(self):
+        with tempfile.TemporaryDirectory() as root, contextlib.redirect_stdout(io.StringIO()):
+            self.creator = make_creator(root)
+
+    def build(self, alert_query):
+        self.creator.alert_query = alert_query
+        rule = self.creator.build_data_freshness_alert_rule('monitoring')
+        return rule, {query["refId"]: query["model"] for query in rule["data"]}
+
+    def test_scan_counts_points_and_reports_them(self):
+        rule, models = self.build('scan')
+        self.assertEqual(models["A"]["select"], [[{"params": ["used_percent"], "type": "field"},
+                                                  {"params": [], "type": "count"}]])
+        self.assertEqual(models["B"]["reducer"], "sum")
+        self.assertIn("(data points: ", rule["annotations"]["description"])
+
+    def test_last_point_counts_series_and_leaves_out_the_point_count(self):
+        rule, models = self.build('last-point')
+        self.assertEqual(models["A"]["select"], [[{"params": ["used_percent"], "type": "field"},
+                                                  {"params": [], "type": "last"}]])
+        self.assertNotIn({"params": ["$__interval"], "type": "time"}, models["A"]["groupBy"])
+        self.assertEqual(models["B"]["reducer"], "count")
+        self.assertNotIn("data points", rule["annotations"]["description"])
+        self.assertNotIn("$values.B", rule["annotations"]["description"])
+
+
+if __name__ == '__main__':
+    unittest.main()
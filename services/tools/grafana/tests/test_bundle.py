@@ -0,0 +1,42 @@
+import contextlib
+import io
+import re
+import tempfile
+import unittest
+from pathlib import Path
+
+from .helpers import dashboard, make_creator
+
+
+class ExportBundleTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        with contextlib.redirect_stdout(io.StringIO()):
+            creator = make_creator(self.tmp.name)
+            creator.export_bundle(Path(self.tmp.name) / 'bundle')
+        self.alerting = (Path(self.tmp.name) / 'bundle' / 'alerting' / 'disk-monitoring.yaml').read_text()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_only_credentials_are_left_for_grafana_to_expand(self):
+        text = self.alerting
+        for reference in dashboard.PUSHOVER_ENV_REFERENCES:
+            self.assertIn(reference, text)
+            text = text.replace(reference, '')
+        self.assertNotRegex(text.replace('$$', ''), re.escape('$'))
+
+    def test_literal_dollars_are_escaped(self):
+        self.assertIn('$$labels', self.alerting)
+        self.assertIn('$$__interval', self.alerting)
+
+
+class EscapeEnvInterpolationTest(unittest.TestCase):
+    def test_escapes_nested_strings_and_keeps_references(self):
+        value = {"a": ["$x", {"b": "${KEEP}"}], "c": 1}
+        self.assertEqual(dashboard.escape_env_interpolation(value, keep=("${KEEP}",)),
+                         {"a": ["$$x", {"b": "${KEEP}"}], "c": 1})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import contextlib
+import io
+import unittest
+
+import requests
+from urllib3.exceptions import MaxRetryError, NewConnectionError, ProtocolError
+
+from .helpers import FakeResponse, dashboard
+
+
+class FailingSession:
+    """Session raising ``errors`` in turn, then answering 200."""
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    def request(self, method, url, **kwargs):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        response = FakeResponse(200, {})
+        response.request = type('Request', (), {'body': None})()
+        response.content = b'{}'
+        return response
+
+
+def refused():
+    reason = NewConnectionError(None, "Connection refused")
+    return requests.ConnectionError(MaxRetryError(None, '/api/folders', reason))
+
+
+class TransportRetryTest(unittest.TestCase):
+    def client(self, *errors):
+        client = dashboard.GrafanaClient({}, max_retries=2, backoff_factor=0)
+        client._session = FailingSession(*errors)
+        return client
+
+    def send(self, client, method):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return client.request(method, 'http://grafana.invalid/api/v1/provisioning/templates')
+
+    def test_post_is_not_resent_after_read_timeout(self):
+        client = self.client(requests.ReadTimeout())
+        with self.assertRaises(requests.ReadTimeout):
+            self.send(client, 'POST')
+        self.assertEqual(client._session.calls, 1)
+
+    def test_post_is_not_resent_after_connection_dropped_mid_request(self):
+        client = self.client(requests.ConnectionError(ProtocolError("Connection aborted")))
+        with self.assertRaises(requests.ConnectionError):
+            self.send(client, 'POST')
+        self.assertEqual(client._session.calls, 1)
+
+    def test_post_is_resent_when_it_never_connected(self):
+        client = self.client(requests.ConnectTimeout(), refused())
+        self.assertEqual(self.send(client, 'POST').status_code, 200)
+        self.assertEqual(client._session.calls, 3)
+
+    def test_idempotent_methods_are_resent_after_read_timeout(self):
+        for method in ('GET', 'PUT'):
+            client = self.client(requests.ReadTimeout())
+            self.assertEqual(self.send(client, method).status_code, 200)
+            self.assertEqual(client._session.calls, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
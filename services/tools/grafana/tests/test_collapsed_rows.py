@@ -0,0 +1,78 @@
+import contextlib
+import io
+import tempfile
+import unittest
+
+from .helpers import dashboard, make_creator, use_fake_grafana
+
+
+def usage_frames(usage):
+    """A /api/ds/query response with one time series per host, as Grafana returns InfluxDB results."""
+    frames = [{
+        "schema": {"fields": [{"name": "Time", "type": "time"},
+                              {"name": "used_percent", "labels": {"host": host}}]},
+        "data": {"values": [[1760000000000], [percent]]}
+    } for host, percent in usage.items()]
+    return {"results": {"A": {"frames": frames}}}
+
+
+class CollapsedRowsTest(unittest.TestCase):
+    def setUp(self):
+        with tempfile.TemporaryDirectory() as root, contextlib.redirect_stdout(io.StringIO()):
+            self.creator = make_creator(root)
+        self.creator.collapse_hosts = True
+
+    def build(self):
+        with contextlib.redirect_stdout(io.StringIO()) as output:
+            dashboards = self.creator.build_dashboards()
+        return dashboards[0]["dashboard"], output.getvalue()
+
+    def rows(self, model):
+        return {panel["title"]: panel for panel in model["panels"] if panel["type"] == "row"}
+
+    def test_every_host_row_is_collapsed_and_loads_lazily(self):
+        model, output = self.build()
+        rows = self.rows(model)
+        self.assertEqual(len(model["panels"]), len(self.creator.hosts))
+        self.assertTrue(all(row["collapsed"] and len(row["panels"]) == 3 for row in rows.values()))
+        eager, lazy = dashboard.panel_load_counts(model)
+        self.assertEqual(eager, 0)
+        self.assertGreater(lazy, 0)
+        self.assertIn(f"0 query panels load eagerly, {lazy} lazily", output)
+        self.assertEqual([row["gridPos"]["y"] for row in rows.values()], list(range(len(rows))))
+
+    def test_hosts_above_the_threshold_are_expanded(self):
+        self.creator.expand_above = 80
+        http = use_fake_grafana(self.creator, {
+            ('POST', '/api/ds/query'): (200, usage_frames({"nas.example.com": 91.5, "db.example.com": 40.0}))
+        })
+        model, output = self.build()
+        rows = self.rows(model)
+
+        self.assertEqual(http.calls, [('POST', '/api/ds/query')])
+        self.assertIn("1 above 80% will be expanded", output)
+        self.assertFalse(rows["nas.example.com"]["collapsed"])
+        self.assertEqual(rows["nas.example.com"]["panels"], [])
+        self.assertTrue(rows["db.example.com"]["collapsed"])
+        # The expanded row's panels sit after it, pushing the next row down
+        self.assertEqual(len(model["panels"]), 5)
+        self.assertEqual(rows["db.example.com"]["gridPos"]["y"], 7)
+
+    def test_failed_usage_lookup_keeps_every_row_collapsed(self):
+        self.creator.expand_above = 80
+        use_fake_grafana(self.creator, {('POST', '/api/ds/query'): (500, {"message": "datasource down"})})
+        model, output = self.build()
+        self.assertIn("Could not fetch host usage", output)
+        self.assertTrue(all(row["collapsed"] for row in self.rows(model).values()))
+
+    def test_offline_build_asks_grafana_nothing(self):
+        self.creator.expand_above = 80
+        http = use_fake_grafana(self.creator, {})
+        with contextlib.redirect_stdout(io.StringIO()):
+            model = self.creator.build_dashboards(offline=True)[0]["dashboard"]
+        self.assertEqual(http.calls, [])
+        self.assertTrue(all(row["collapsed"] for row in self.rows(model).values()))
+
+
+if __name__ == '__main__':
+    unittest.main()
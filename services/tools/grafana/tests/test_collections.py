@@ -0,0 +1,81 @@
+import contextlib
+import io
+import tempfile
+import threading
+import unittest
+
+from .helpers import FakeGrafana, dashboard, make_creator, use_fake_grafana
+
+
+class CollectionCacheTest(unittest.TestCase):
+    def test_lists_once_until_invalidated(self):
+        http = FakeGrafana({('GET', '/api/folders'): (200, [{"uid": "f1", "title": "Monitoring"}])})
+        cache = dashboard.CollectionCache(http)
+        url = 'http://grafana:3000/api/folders'
+        cache.list('folders', url)
+        cache.list('folders', url)
+        self.assertEqual(cache.lookup('folders', 'title', 'Monitoring'), {"uid": "f1", "title": "Monitoring"})
+        self.assertEqual(len(http.calls), 1)
+
+        cache.invalidate('folders')
+        self.assertIsNone(cache.lookup('folders', 'title', 'Monitoring'))
+        cache.list('folders', url)
+        self.assertEqual(len(http.calls), 2)
+        self.assertEqual(cache.stats, {'hits': 1, 'misses': 2})
+
+    def test_failed_list_is_not_cached(self):
+        cache = dashboard.CollectionCache(FakeGrafana({}))
+        items, response = cache.list('folders', 'http://grafana:3000/api/folders')
+        self.assertIsNone(items)
+        self.assertEqual(response.status_code, 404)
+
+    def test_lookup_returns_a_copy(self):
+        cache = dashboard.CollectionCache(FakeGrafana({('GET', '/api/folders'): (200, [{"uid": "f1", "title": "a"}])}))
+        cache.list('folders', 'http://grafana:3000/api/folders')
+        cache.lookup('folders', 'uid', 'f1')["title"] = "changed"
+        self.assertEqual(cache.lookup('folders', 'uid', 'f1')["title"], "a")
+
+    def test_concurrent_lists_share_one_request(self):
+        http = FakeGrafana({('GET', '/api/folders'): (200, [])})
+        cache = dashboard.CollectionCache(http)
+        threads = [threading.Thread(target=cache.list, args=('folders', 'http://grafana:3000/api/folders'))
+                   for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(http.calls, [('GET', '/api/folders')])
+        self.assertEqual(cache.stats, {'hits': 7, 'misses': 1})
+
+
+class CreatorListsTest(unittest.TestCase):
+    FOLDERS = [{"uid": "general", "title": "General"}, {"uid": "monitoring", "title": "Monitoring"}]
+
+    def setUp(self):
+        with tempfile.TemporaryDirectory() as root, contextlib.redirect_stdout(io.StringIO()):
+            self.creator = make_creator(root)
+
+    def test_folders_are_listed_once_per_run(self):
+        http = use_fake_grafana(self.creator, {('GET', '/api/folders'): (200, self.FOLDERS)})
+        self.assertEqual(self.creator.select_alert_folder(), 'monitoring')
+        self.assertEqual(self.creator.select_alert_folder(), 'monitoring')
+        self.creator.get_folders()
+        self.assertEqual(http.calls, [('GET', '/api/folders')])
+
+    def test_a_write_invalidates_its_collection_only(self):
+        http = use_fake_grafana(self.creator, {
+            ('GET', '/api/folders'): (200, self.FOLDERS),
+            ('GET', '/api/v1/provisioning/alert-rules'): (200, [])
+        })
+        self.creator.get_folders()
+        self.creator.get_existing_alert_rules()
+        self.creator.record_write('alert-rules')
+        self.creator.get_folders()
+        self.creator.get_existing_alert_rules()
+        self.assertEqual(http.calls.count(('GET', '/api/folders')), 1)
+        self.assertEqual(http.calls.count(('GET', '/api/v1/provisioning/alert-rules')), 2)
+        self.assertEqual(self.creator.write_stats['written'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
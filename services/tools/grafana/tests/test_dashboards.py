@@ -0,0 +1,61 @@
+import contextlib
+import io
+import tempfile
+import unittest
+
+from .helpers import dashboard, make_creator
+
+
+class ShardedIndexTest(unittest.TestCase):
+    def build(self, overview):
+        with tempfile.TemporaryDirectory() as root, contextlib.redirect_stdout(io.StringIO()):
+            creator = make_creator(root)
+            creator.max_hosts_per_dashboard = 1
+            creator.overview = overview
+            return creator.build_dashboards(offline=True)[0]["dashboard"]
+
+    def test_index_with_overview_refreshes_like_other_dashboards(self):
+        index = self.build('section')
+        self.assertEqual(index["title"], dashboard.DASHBOARD_TITLE)
+        self.assertGreater(dashboard.dashboard_query_count(index), 0)
+        for key, value in dashboard.DASHBOARD_TIME_SETTINGS.items():
+            self.assertEqual(index[key], value)
+
+    def test_query_free_index_needs_no_refresh(self):
+        index = self.build('none')
+        self.assertEqual(dashboard.dashboard_query_count(index), 0)
+        self.assertNotIn("refresh", index)
+
+
+class OverviewTest(unittest.TestCase):
+    def setUp(self):
+        with tempfile.TemporaryDirectory() as root, contextlib.redirect_stdout(io.StringIO()):
+            self.creator = make_creator(root)
+
+    def build(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return [dashboard_json["dashboard"] for dashboard_json in self.creator.build_dashboards(offline=True)]
+
+    def test_off_by_default(self):
+        dashboards = self.build()
+        self.assertEqual([model["title"] for model in dashboards], [dashboard.DASHBOARD_TITLE])
+        self.assertNotIn("Top 10 Mounts by Usage", [panel["title"] for panel in dashboards[0]["panels"]])
+
+    def test_section_adds_panels_and_host_detail(self):
+        self.creator.overview = 'section'
+        dashboards = self.build()
+        self.assertEqual([model["title"] for model in dashboards],
+                         [dashboard.DASHBOARD_TITLE, f"{dashboard.DASHBOARD_TITLE} - Host Detail"])
+        titles = [panel["title"] for panel in dashboards[0]["panels"]]
+        self.assertEqual(titles[:2], ["Top 10 Mounts by Usage", "Last Report per Host (oldest first)"])
+
+    def test_last_report_looks_past_the_dashboard_range(self):
+        self.creator.overview = 'dashboard'
+        overview = self.build()[1]
+        last_report = overview["panels"][1]
+        self.assertEqual(last_report["timeFrom"], dashboard.LAST_REPORT_LOOKBACK)
+        self.assertIn("$timeFilter", last_report["targets"][0]["query"])
+
+
+if __name__ == '__main__':
+    unittest.main()
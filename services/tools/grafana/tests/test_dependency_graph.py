@@ -0,0 +1,83 @@
+import contextlib
+import io
+import tempfile
+import threading
+import unittest
+
+from .helpers import dashboard, make_creator
+
+
+class RunDependencyGraphTest(unittest.TestCase):
+    def test_steps_see_the_results_of_their_dependencies(self):
+        seen = {}
+
+        def contact_point(results):
+            seen['contact_point'] = dict(results)
+            return results['template'] + "-applied"
+
+        results = dashboard.run_dependency_graph({
+            'template': (lambda results: "template", []),
+            'contact_point': (contact_point, ['template'])
+        }, max_workers=4)
+
+        self.assertEqual(results, {'template': "template", 'contact_point': "template-applied"})
+        self.assertEqual(seen['contact_point'], {'template': "template"})
+
+    def test_independent_steps_run_at_once(self):
+        # Each step waits for the other; run one after the other, the barrier would time out
+        barrier = threading.Barrier(2, timeout=5)
+        results = dashboard.run_dependency_graph({
+            'dashboard': (lambda results: barrier.wait() is not None, []),
+            'rules': (lambda results: barrier.wait() is not None, [])
+        }, max_workers=2)
+        self.assertEqual(results, {'dashboard': True, 'rules': True})
+
+    def test_unknown_dependency_is_rejected_before_running(self):
+        ran = []
+        with self.assertRaisesRegex(ValueError, "Unknown step dependencies: missing"):
+            dashboard.run_dependency_graph({'policy': (ran.append, ['missing'])}, max_workers=2)
+        self.assertEqual(ran, [])
+
+    def test_cycle_is_reported(self):
+        with self.assertRaisesRegex(ValueError, "Dependency cycle between steps: a, b"):
+            dashboard.run_dependency_graph({
+                'root': (lambda results: None, []),
+                'a': (lambda results: None, ['b']),
+                'b': (lambda results: None, ['a'])
+            }, max_workers=2)
+
+    def test_step_error_propagates_and_dependents_never_run(self):
+        ran = []
+
+        def rules(results):
+            raise RuntimeError("rules failed")
+
+        with self.assertRaisesRegex(RuntimeError, "rules failed"):
+            dashboard.run_dependency_graph({
+                'rules': (rules, []),
+                'policy': (ran.append, ['rules'])
+            }, max_workers=2)
+        self.assertEqual(ran, [])
+
+
+class ProvisioningStepsTest(unittest.TestCase):
+    def setUp(self):
+        with tempfile.TemporaryDirectory() as root, contextlib.redirect_stdout(io.StringIO()):
+            self.creator = make_creator(root)
+
+    def test_dashboard_only_without_alerts(self):
+        self.assertEqual(list(self.creator.provisioning_steps()), ['dashboard'])
+
+    def test_alerting_dependencies(self):
+        steps = self.creator.provisioning_steps(with_alerts=True)
+        self.assertEqual({name: deps for name, (_, deps) in steps.items()}, {
+            'dashboard': [],
+            'template': [],
+            'contact_point': ['template'],
+            'rules': [],
+            'policy': ['rules']
+        })
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import re
+import unittest
+
+from .helpers import HAS_JINJA2, dashboard, render_telegraf_config
+
+
+class DurationTest(unittest.TestCase):
+    def test_parse_duration(self):
+        self.assertEqual(dashboard.parse_duration('60s'), 60)
+        self.assertEqual(dashboard.parse_duration('1h30m'), 5400)
+        self.assertEqual(dashboard.parse_duration('500ms'), 0.5)
+        self.assertEqual(dashboard.parse_duration(45), 45)
+
+    def test_parse_duration_rejects_garbage(self):
+        for value in ('', '10 s', '1x', '5m junk'):
+            with self.assertRaises(ValueError, msg=value):
+                dashboard.parse_duration(value)
+
+    def test_format_duration_uses_largest_exact_unit(self):
+        self.assertEqual(dashboard.format_duration(86400), '1d')
+        self.assertEqual(dashboard.format_duration(7200), '2h')
+        self.assertEqual(dashboard.format_duration(150), '150s')
+        self.assertEqual(dashboard.format_duration(120), '2m')
+        self.assertEqual(dashboard.format_duration(0), '1s')
+
+    def test_round_trip(self):
+        for seconds in (1, 59, 60, 90, 3600, 5400, 86400):
+            self.assertEqual(dashboard.parse_duration(dashboard.format_duration(seconds)), seconds)
+
+
+@unittest.skipUnless(HAS_JINJA2, 'jinja2 is not installed')
+class TelegrafSizingTest(unittest.TestCase):
+    """The role sizes Telegraf batches from the same durations the tool's plan parses."""
+
+    def setting(self, config, name):
+        return int(re.search(rf'^\s*{name} = (\d+)$', config, re.MULTILINE).group(1))
+
+    def test_compound_durations(self):
+        mounts = [f"/mnt/{number}" for number in range(30)]
+        config = render_telegraf_config(monitor_mount_points=mounts, telegraf_interval='10s',
+                             telegraf_flush_interval='1m30s', telegraf_buffer_duration='1h30m')
+        interval = dashboard.parse_duration('10s')
+        flush = dashboard.parse_duration('1m30s')
+        self.assertEqual(self.setting(config, 'metric_batch_size'), len(mounts) * int(flush // interval))
+        self.assertEqual(self.setting(config, 'metric_buffer_limit'),
+                         len(mounts) * int(dashboard.parse_duration('1h30m') // interval))
+
+    def test_small_fleet_keeps_the_minimum_batch(self):
+        config = render_telegraf_config(monitor_mount_points=['/'], telegraf_interval='500ms', telegraf_flush_interval='1s')
+        self.assertEqual(self.setting(config, 'metric_batch_size'), 100)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,126 @@
+import contextlib
+import io
+import tempfile
+import unittest
+from pathlib import Path
+
+from .helpers import dashboard
+
+
+def write(path, content):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(content)
+
+
+class InventoryLoaderResolveTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = Path(self.tmp.name)
+        self.inventory = root / 'inventory' / 'inventory.yml'
+        self.role = root / 'role'
+        write(self.role / 'defaults' / 'main.yml',
+              "influxdb_database: from_defaults\ntelegraf_interval: 60s\ndisk_usage_threshold: 90\n")
+        write(self.inventory, """
+all:
+  vars:
+    influxdb_database: from_inventory
+    telegraf_interval: 30s
+  hosts:
+    nas.example.com:
+  children:
+    web:
+      vars:
+        telegraf_interval: 20s
+      hosts:
+        web1.example.com:
+          disk_usage_threshold: 80
+      children:
+        web_eu:
+          vars:
+            telegraf_interval: 15s
+          hosts:
+            web2.example.com:
+""")
+        write(self.inventory.parent / 'group_vars' / 'all.yml',
+              "influxdb_database: from_group_vars\ninfluxdb_port: 8087\n")
+        write(self.inventory.parent / 'group_vars' / 'web.yml', "disk_usage_threshold: 85\n")
+        write(self.inventory.parent / 'host_vars' / 'web1.example.com.yml', "disk_usage_threshold: 75\n")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def resolve(self):
+        return dashboard.InventoryLoader().resolve(self.inventory, self.role)
+
+    def test_later_layers_override_the_same_key(self):
+        config = self.resolve()['config']
+        self.assertEqual(config['influxdb_database'], 'from_group_vars')
+        self.assertEqual(config['telegraf_interval'], '30s')
+        self.assertEqual(config['influxdb_port'], 8087)
+        self.assertEqual(config['disk_usage_threshold'], 90)
+
+    def test_role_vars_override_everything(self):
+        write(self.role / 'vars' / 'main.yml', "influxdb_database: from_role_vars\n")
+        inventory = self.resolve()
+        self.assertEqual(inventory['config']['influxdb_database'], 'from_role_vars')
+        self.assertEqual(inventory['host_vars']['web1.example.com']['influxdb_database'], 'from_role_vars')
+
+    def test_hosts_and_child_groups(self):
+        inventory = self.resolve()
+        self.assertEqual(inventory['hosts'], ['nas.example.com', 'web1.example.com', 'web2.example.com'])
+        self.assertEqual(inventory['host_groups'], {
+            'web': ['web1.example.com', 'web2.example.com'],
+            'web_eu': ['web2.example.com']
+        })
+
+    def test_host_vars_layering(self):
+        host_vars = self.resolve()['host_vars']
+        self.assertEqual(host_vars['nas.example.com']['telegraf_interval'], '30s')
+        self.assertEqual(host_vars['web1.example.com']['telegraf_interval'], '20s')
+        # The deeper child group wins over its parent
+        self.assertEqual(host_vars['web2.example.com']['telegraf_interval'], '15s')
+        # host_vars file beats inline host variables, which beat group_vars
+        self.assertEqual(host_vars['web1.example.com']['disk_usage_threshold'], 75)
+        self.assertEqual(host_vars['web2.example.com']['disk_usage_threshold'], 85)
+        self.assertEqual(host_vars['nas.example.com']['disk_usage_threshold'], 90)
+
+    def test_encrypted_defaults_are_skipped(self):
+        (self.role / 'defaults' / 'main.yml').write_bytes(b'\x00GITCRYPT\x00\x8f\x12')
+        with contextlib.redirect_stdout(io.StringIO()) as output:
+            config = self.resolve()['config']
+        self.assertIn("Skipping unreadable variables file", output.getvalue())
+        self.assertEqual(config['influxdb_database'], 'from_group_vars')
+        self.assertNotIn('disk_usage_threshold', config)
+
+
+class InventoryCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        self.cache = self.root / 'cache.json'
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def load_twice(self, content):
+        path = self.root / 'vars.yml'
+        path.write_text(content)
+        loader = dashboard.InventoryLoader(self.cache)
+        first = loader.load(path)
+        loader.save()
+        loader = dashboard.InventoryLoader(self.cache)
+        return first, loader.load(path), loader.stats
+
+    def test_unchanged_file_is_served_from_the_cache(self):
+        first, second, stats = self.load_twice("influxdb_port: 8086\nhosts: [a, b]\n")
+        self.assertEqual(first, second)
+        self.assertEqual(stats, {'parsed': 0, 'cached': 1})
+
+    def test_non_string_keys_are_not_cached(self):
+        first, second, stats = self.load_twice("ports:\n  8086: influxdb\n")
+        self.assertEqual(second, {"ports": {8086: "influxdb"}})
+        self.assertEqual(stats, {'parsed': 1, 'cached': 0})
+
+
+if __name__ == '__main__':
+    unittest.main()
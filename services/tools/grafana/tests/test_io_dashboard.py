@@ -0,0 +1,53 @@
+import contextlib
+import io
+import re
+import tempfile
+import unittest
+
+from .helpers import dashboard, make_creator
+
+
+class IoDashboardTest(unittest.TestCase):
+    def setUp(self):
+        with tempfile.TemporaryDirectory() as root, contextlib.redirect_stdout(io.StringIO()):
+            self.creator = make_creator(root)
+        self.model = self.creator.create_io_dashboard_json()["dashboard"]
+        self.panels = {panel["title"]: panel for panel in self.model["panels"]}
+
+    def query(self, title):
+        return self.panels[title]["targets"][0]["query"]
+
+    def test_added_only_when_asked(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertNotIn(dashboard.IO_DASHBOARD_TITLE,
+                             [d["dashboard"]["title"] for d in self.creator.build_dashboards(offline=True)])
+            self.creator.io_dashboard = True
+            self.assertEqual(self.creator.build_dashboards(offline=True)[-1]["dashboard"]["title"],
+                             dashboard.IO_DASHBOARD_TITLE)
+
+    def test_panels_and_units(self):
+        self.assertEqual({title: panel["fieldConfig"]["defaults"]["unit"] for title, panel in self.panels.items()},
+                         {"IOPS": "iops", "Throughput": "Bps", "Await": "ms", "Utilisation": "percent"})
+        self.assertEqual(self.panels["Utilisation"]["fieldConfig"]["defaults"]["max"], 100)
+        self.assertIn("diskio", self.model["tags"])
+
+    def test_rates_are_computed_by_influxdb(self):
+        self.assertEqual(re.findall(r'non_negative_derivative\(last\("(\w+)"\), 1s\)', self.query("IOPS")),
+                         ["reads", "writes"])
+        self.assertIn('GROUP BY time($__interval), "host", "name" fill(none)', self.query("Throughput"))
+        self.assertIn('"name" !~ /^(loop|ram)/', self.query("Throughput"))
+        self.assertTrue(self.query("Await").startswith('SELECT ("read_time" + "write_time") / ("reads" + "writes")'))
+        self.assertTrue(self.query("Utilisation").startswith('SELECT "io_time" / 10 AS "util" FROM (SELECT'))
+        for panel in self.panels.values():
+            self.assertEqual(panel["interval"], "1m")
+
+    def test_host_variable_reads_diskio(self):
+        variable = self.model["templating"]["list"][0]
+        self.assertEqual(variable["name"], "host")
+        self.assertEqual(variable["query"], 'SHOW TAG VALUES FROM "diskio" WITH KEY = "host"')
+        for title in self.panels:
+            self.assertIn('"host" =~ /^$host$/', self.query(title))
+
+
+if __name__ == '__main__':
+    unittest.main()
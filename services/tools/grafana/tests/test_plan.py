@@ -0,0 +1,96 @@
+import contextlib
+import io
+import tempfile
+import unittest
+
+from .helpers import dashboard, make_creator
+
+
+def panel(queries=1):
+    return {"type": "gauge", "targets": [{"refId": chr(65 + index)} for index in range(queries)]}
+
+
+class DashboardQueryCountTest(unittest.TestCase):
+    def test_plain_panels(self):
+        model = {"panels": [panel(), panel(2), {"type": "text"}]}
+        self.assertEqual(dashboard.dashboard_query_count(model), 3)
+
+    def test_repeated_row_counts_its_panels_per_value(self):
+        model = {"panels": [{"type": "row", "repeat": "host", "panels": []}, panel(), panel(),
+                            {"type": "row", "panels": []}, panel()]}
+        self.assertEqual(dashboard.dashboard_query_count(model, repeat_values=5), 11)
+
+    def test_collapsed_rows_count_only_when_asked(self):
+        model = {"panels": [panel(), {"type": "row", "collapsed": True, "panels": [panel(), panel()]}]}
+        self.assertEqual(dashboard.dashboard_query_count(model), 3)
+        self.assertEqual(dashboard.dashboard_query_count(model, include_collapsed=False), 1)
+        self.assertEqual(dashboard.panel_load_counts(model), (1, 2))
+
+
+class SelectedHostCountTest(unittest.TestCase):
+    def model(self, **variable):
+        variable = dict({"name": "host", "current": {"value": ["$__all"]}}, **variable)
+        return {"templating": {"list": [variable]}}
+
+    def test_selection(self):
+        self.assertEqual(dashboard.selected_host_count({"templating": {"list": []}}, 40), 40)
+        self.assertEqual(dashboard.selected_host_count(self.model(current={"value": ["a", "b"]}), 40), 2)
+        self.assertEqual(dashboard.selected_host_count(self.model(type="custom", query="a,b,c"), 40), 3)
+        self.assertEqual(dashboard.selected_host_count(self.model(type="query", regex="/^(a|b)$/"), 40), 2)
+        self.assertEqual(dashboard.selected_host_count(self.model(type="query", regex=""), 40), 40)
+
+
+class PlanTest(unittest.TestCase):
+    def setUp(self):
+        with tempfile.TemporaryDirectory() as root, contextlib.redirect_stdout(io.StringIO()):
+            self.creator = make_creator(root)
+
+    def plan(self, **budgets):
+        with contextlib.redirect_stdout(io.StringIO()) as output:
+            within = self.creator.plan(**budgets)
+        return within, output.getvalue()
+
+    def test_rates_of_the_default_stack(self):
+        within, output = self.plan()
+        self.assertTrue(within)
+        # Two hosts, a gauge and a table each, refreshed every 30s
+        self.assertRegex(output, r"Disk Monitoring +4 +0 +30s +0\.13")
+        # Two rules with one InfluxDB query each, every minute
+        self.assertIn("Alert rules: 0.03 queries/s", output)
+        # 4 mounts and 2 devices per host each minute
+        self.assertIn("Total: 0.17 queries/s, 0.20 points/s", output)
+
+    def test_viewers_multiply_dashboard_queries(self):
+        _, output = self.plan(viewers=3)
+        self.assertIn("Dashboards: 0.40 queries/s (3 viewer(s) per dashboard)", output)
+
+    def test_budgets(self):
+        within, output = self.plan(max_query_rate=0.1, max_write_rate=1)
+        self.assertFalse(within)
+        self.assertIn("Query rate 0.17 queries/s exceeds the budget of 0.1 queries/s", output)
+        self.assertNotIn("Write rate", output)
+
+    def test_collapsed_rows_are_planned_as_lazy(self):
+        self.creator.collapse_hosts = True
+        _, output = self.plan()
+        self.assertRegex(output, r"Disk Monitoring +0 +4 +30s +0\.00")
+
+
+class BenchmarkLayoutsTest(unittest.TestCase):
+    def test_reports_each_layout_and_restores_the_creator(self):
+        with tempfile.TemporaryDirectory() as root, contextlib.redirect_stdout(io.StringIO()):
+            creator = make_creator(root)
+        hosts = creator.hosts
+        with contextlib.redirect_stdout(io.StringIO()) as output:
+            creator.benchmark_layouts([10], rounds=1)
+        rows = {line.split()[1]: line.split() for line in output.getvalue().splitlines()
+                if line.split()[:1] == ["10"]}
+        self.assertEqual(rows["inline"][4], "20")
+        self.assertEqual(rows["collapsed"][4], "0")
+        self.assertEqual(rows["repeat"][4:], ["20", "(+1", "on", "load)"])
+        self.assertIs(creator.hosts, hosts)
+        self.assertEqual((creator.layout, creator.collapse_hosts), ('inline', False))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+import contextlib
+import io
+import tempfile
+import unittest
+
+from .helpers import dashboard, make_creator, use_fake_grafana
+
+
+class MergePolicyRoutesTest(unittest.TestCase):
+    USAGE = [["alertname", "=", "Disk Usage Alert"]]
+    STALE = [["alertname", "=", "Host Data Staleness Alert"]]
+    RETIRED_TIER = [["alertname", "=", "Host Data Staleness Alert (hourly)"]]
+    OTHER = [["team", "=", "db"]]
+
+    def route(self, matchers, receiver="pushover"):
+        return {"receiver": receiver, "object_matchers": matchers}
+
+    def test_appends_missing_routes_and_keeps_others(self):
+        routes = [self.route(self.OTHER, "db-team")]
+        merged, counts = dashboard.merge_policy_routes(routes, [self.route(self.USAGE)])
+        self.assertEqual(merged, [self.route(self.OTHER, "db-team"), self.route(self.USAGE)])
+        self.assertEqual(counts, (1, 0, 0))
+
+    def test_updates_in_place(self):
+        routes = [self.route(self.USAGE, "old"), self.route(self.OTHER, "db-team")]
+        merged, counts = dashboard.merge_policy_routes(routes, [self.route(self.USAGE)])
+        self.assertEqual(merged, [self.route(self.USAGE), self.route(self.OTHER, "db-team")])
+        self.assertEqual(counts, (0, 1, 0))
+
+    def test_unchanged_routes_count_nothing(self):
+        routes = [self.route(self.USAGE)]
+        merged, counts = dashboard.merge_policy_routes(routes, [self.route(self.USAGE)])
+        self.assertEqual(merged, routes)
+        self.assertEqual(counts, (0, 0, 0))
+
+    def test_drops_duplicates_and_routes_no_longer_wanted(self):
+        routes = [self.route(self.USAGE), self.route(self.USAGE), self.route(self.STALE)]
+        merged, counts = dashboard.merge_policy_routes(routes, [self.route(self.USAGE)])
+        self.assertEqual(merged, [self.route(self.USAGE)])
+        self.assertEqual(counts, (0, 0, 2))
+
+    def test_drops_routes_of_retired_tiers(self):
+        routes = [self.route(self.RETIRED_TIER), self.route(self.OTHER, "db-team")]
+        merged, counts = dashboard.merge_policy_routes(routes, [self.route(self.USAGE)])
+        self.assertEqual(merged, [self.route(self.OTHER, "db-team"), self.route(self.USAGE)])
+        self.assertEqual(counts, (1, 0, 1))
+
+    def test_keeps_routes_that_only_mention_our_rules(self):
+        team = self.route(self.RETIRED_TIER + self.OTHER, "db-team")
+        merged, counts = dashboard.merge_policy_routes([team], [self.route(self.USAGE)])
+        self.assertEqual(merged, [team, self.route(self.USAGE)])
+
+
+class CreateNotificationPolicyTest(unittest.TestCase):
+    # Our routes as Grafana returns them: a false "continue" is left out
+    STORED_ROUTES = [
+        {"receiver": "disk-monitoring-pushover", "group_by": ["host", "path"],
+         "object_matchers": [["alertname", "=", "Disk Usage Alert"]],
+         "group_wait": "5s", "group_interval": "5m", "repeat_interval": "1h"},
+        {"receiver": "disk-monitoring-pushover", "group_by": ["host"],
+         "object_matchers": [["alertname", "=", "Host Data Staleness Alert"]],
+         "group_wait": "10s", "group_interval": "10m", "repeat_interval": "2h"}
+    ]
+
+    def setUp(self):
+        with tempfile.TemporaryDirectory() as root, contextlib.redirect_stdout(io.StringIO()):
+            self.creator = make_creator(root)
+
+    def provision(self, routes, rule_uids=None):
+        http = use_fake_grafana(self.creator, {
+            ('GET', '/api/v1/provisioning/policies'): (200, {"receiver": "default", "routes": routes}),
+            ('PUT', '/api/v1/provisioning/policies'): (202, {})
+        })
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertTrue(self.creator.create_notification_policy(
+                rule_uids or {"Disk Usage Alert": "usage-uid", "Host Data Staleness Alert": "staleness-uid"}))
+        return http
+
+    def test_stored_routes_need_no_write(self):
+        other = {"receiver": "db-team", "object_matchers": [["team", "=", "db"]], "continue": True}
+        http = self.provision([other] + self.STORED_ROUTES)
+        self.assertNotIn(('PUT', '/api/v1/provisioning/policies'), http.calls)
+        self.assertEqual(self.creator.write_stats, {'written': 0, 'skipped': 1})
+
+    def test_changed_route_is_written(self):
+        routes = [dict(self.STORED_ROUTES[0], repeat_interval="4h"), self.STORED_ROUTES[1]]
+        http = self.provision(routes)
+        self.assertIn(('PUT', '/api/v1/provisioning/policies'), http.calls)
+
+    def test_tier_staleness_routes_are_kept_without_the_untiered_rule(self):
+        self.creator.tiers_in_use = lambda: ["fast"]
+        http = self.provision(self.STORED_ROUTES, {"Disk Usage Alert": "usage-uid",
+                                                   "Host Data Staleness Alert (fast)": "fast-uid"})
+        put = http.bodies[('PUT', '/api/v1/provisioning/policies')]
+        self.assertEqual([route["object_matchers"][0][2] for route in put["routes"]],
+                         ["Disk Usage Alert", "Host Data Staleness Alert (fast)"])
+
+
+if __name__ == '__main__':
+    unittest.main()
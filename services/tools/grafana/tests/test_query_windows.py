@@ -0,0 +1,44 @@
+import contextlib
+import io
+import tempfile
+import unittest
+
+from .helpers import DEFAULTS, make_creator
+
+
+class QueryWindowTest(unittest.TestCase):
+    def creator(self, interval):
+        defaults = DEFAULTS.replace("telegraf_interval: 60s", f"telegraf_interval: {interval}")
+        with tempfile.TemporaryDirectory() as root, contextlib.redirect_stdout(io.StringIO()):
+            return make_creator(root, defaults)
+
+    def host_panels(self, creator):
+        _, gauge, table = creator.create_host_panels("nas.example.com", 1, 0, 0)
+        return gauge, table
+
+    def test_panels_query_no_finer_than_the_collection_interval(self):
+        for interval, panel_interval, time_from in (("60s", "1m", "5m"), ("5m", "5m", "15m")):
+            with self.subTest(interval=interval):
+                for panel in self.host_panels(self.creator(interval)):
+                    self.assertEqual(panel["interval"], panel_interval)
+                    # The staleness window, but never fewer than three points
+                    self.assertEqual(panel["timeFrom"], time_from)
+
+    def test_usage_rule_window_holds_two_points(self):
+        for interval, seconds, window in (("60s", 60, 600), ("10m", 600, 1200)):
+            with self.subTest(interval=interval):
+                query = self.creator(interval).build_alert_rule('monitoring')["data"][0]
+                self.assertEqual(query["relativeTimeRange"]["from"], window)
+                self.assertEqual(query["model"]["intervalMs"], seconds * 1000)
+                self.assertEqual(query["model"]["maxDataPoints"], window // seconds)
+                self.assertIn({"params": ["none"], "type": "fill"}, query["model"]["groupBy"])
+
+    def test_staleness_rule_sized_to_the_staleness_window(self):
+        query = self.creator("30s").build_data_freshness_alert_rule('monitoring')["data"][0]
+        self.assertEqual(query["model"]["intervalMs"], 30000)
+        # max_data_staleness_minutes: 5
+        self.assertEqual(query["model"]["maxDataPoints"], 10)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,46 @@
+import contextlib
+import io
+import tempfile
+import unittest
+
+from .helpers import dashboard, make_creator
+
+
+class RepeatLayoutTest(unittest.TestCase):
+    def setUp(self):
+        with tempfile.TemporaryDirectory() as root, contextlib.redirect_stdout(io.StringIO()):
+            self.creator = make_creator(root)
+        self.creator.layout = 'repeat'
+
+    def test_one_repeated_row_whatever_the_host_count(self):
+        model = self.creator.create_dashboard_json()["dashboard"]
+        row, gauge, table = model["panels"]
+        self.assertEqual((row["type"], row["repeat"], row["title"]), ("row", "host", "$host"))
+        for panel in (gauge, table):
+            self.assertEqual(panel["targets"][0]["tags"], [{"key": "host", "operator": "=~", "value": "/^$host$/"}])
+
+        self.creator.hosts = [f"host{number}.example.com" for number in range(50)]
+        self.assertEqual(len(self.creator.create_dashboard_json()["dashboard"]["panels"]), 3)
+
+    def test_host_variable_from_influxdb(self):
+        variable = self.creator.create_dashboard_json()["dashboard"]["templating"]["list"][0]
+        self.assertEqual(variable["name"], "host")
+        self.assertEqual(variable["type"], "query")
+        self.assertEqual(variable["query"], 'SHOW TAG VALUES FROM "disk" WITH KEY = "host"')
+        self.assertTrue(variable["multi"] and variable["includeAll"])
+        self.assertEqual(variable["regex"], "")
+
+    def test_shard_variable_is_limited_to_its_hosts(self):
+        variable = self.creator.create_host_variable(["nas.example.com"])
+        self.assertEqual(variable["regex"], dashboard.host_regex(["nas.example.com"]))
+
+    def test_host_variable_from_inventory(self):
+        self.creator.host_variable_source = 'inventory'
+        variable = self.creator.create_host_variable(self.creator.hosts)
+        self.assertEqual(variable["type"], "custom")
+        self.assertEqual(variable["query"], ','.join(self.creator.hosts))
+        self.assertNotIn("datasource", variable)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+import contextlib
+import io
+import tempfile
+import unittest
+
+from .helpers import DEFAULTS, dashboard, make_creator
+
+
+class AssignRuleGroupsTest(unittest.TestCase):
+    def test_groups_fill_up_and_stagger_intervals(self):
+        titles = [f"rule {number}" for number in range(5)]
+        groups = dashboard.assign_rule_groups(titles, 2, 60, 10)
+        self.assertEqual(groups['rule 0'], ('disk-monitoring-1', 60))
+        self.assertEqual(groups['rule 1'], ('disk-monitoring-1', 60))
+        self.assertEqual(groups['rule 2'], ('disk-monitoring-2', 70))
+        self.assertEqual(groups['rule 4'], ('disk-monitoring-3', 80))
+
+    def test_intervals_cycle_before_doubling(self):
+        groups = dashboard.assign_rule_groups([f"rule {number}" for number in range(8)], 1, 60, 20)
+        self.assertEqual([interval for _, interval in groups.values()], [60, 80, 100, 60, 80, 100, 60, 80])
+
+    def test_no_step_keeps_base_interval(self):
+        groups = dashboard.assign_rule_groups(['a', 'b'], 1, 60, 0)
+        self.assertEqual(list(groups.values()), [('disk-monitoring-1', 60), ('disk-monitoring-2', 60)])
+
+
+class PeakConcurrentQueriesTest(unittest.TestCase):
+    def test_rules_on_the_same_interval_start_together(self):
+        self.assertEqual(dashboard.peak_concurrent_queries([(60, 2), (60, 3)]), (5, 60))
+
+    def test_staggered_intervals_only_coincide_on_their_lcm(self):
+        # 60s and 70s rules both fall due every 420s
+        self.assertEqual(dashboard.peak_concurrent_queries([(60, 1), (70, 1)]), (2, 3600 / 420))
+
+    def test_empty_schedule(self):
+        self.assertEqual(dashboard.peak_concurrent_queries([])[0], 0)
+
+
+class RuleGroupSettingsTest(unittest.TestCase):
+    def creator(self, defaults=DEFAULTS):
+        with tempfile.TemporaryDirectory() as root, contextlib.redirect_stdout(io.StringIO()):
+            return make_creator(root, defaults)
+
+    def test_defaults_keep_every_rule_at_the_base_interval(self):
+        creator = self.creator()
+        self.assertEqual(creator.rule_group("Disk Usage Alert"), ("disk-monitoring-1", 60))
+        self.assertEqual(creator.rule_group("Host Data Staleness Alert"), ("disk-monitoring-2", 60))
+
+    def test_stagger_spreads_groups(self):
+        creator = self.creator(DEFAULTS + "alert_group_stagger_seconds: 10\n")
+        self.assertEqual(creator.rule_group("Host Data Staleness Alert"), ("disk-monitoring-2", 70))
+
+    def test_stagger_off_the_scheduler_tick_is_rejected(self):
+        for stagger in ("15", "-10", "'10s'"):
+            with self.assertRaisesRegex(ValueError, "multiple of Grafana's 10s scheduler tick", msg=stagger):
+                self.creator(DEFAULTS + f"alert_group_stagger_seconds: {stagger}\n")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import threading
+import unittest
+
+from .helpers import dashboard
+
+
+class LineProtocolTest(unittest.TestCase):
+    def test_escapes_tag_keys_and_values(self):
+        self.assertEqual(dashboard.line_protocol_escape("Disk Monitoring, a=b"), r"Disk\ Monitoring\,\ a\=b")
+
+    def test_field_values(self):
+        self.assertEqual(dashboard.line_protocol_field(True), "true")
+        self.assertEqual(dashboard.line_protocol_field(3), "3i")
+        self.assertEqual(dashboard.line_protocol_field(0.25), "0.25")
+        self.assertEqual(dashboard.line_protocol_field('say "hi" \\o/'), r'"say \"hi\" \\o/"')
+
+    def test_line_sorts_tags_and_drops_empty_ones(self):
+        line = dashboard.line_protocol("grafana_provisioning", {"target": "blue green", "phase": None, "org": ""},
+                                       {"requests": 2, "duration_s": 1.5}, 1760000000000000000)
+        self.assertEqual(line, r"grafana_provisioning,target=blue\ green requests=2i,duration_s=1.5 1760000000000000000")
+
+    def test_endpoint_of_hides_uids_and_names(self):
+        self.assertEqual(dashboard.endpoint_of("http://grafana:3000/api/dashboards/uid/dm-1f2e/versions?limit=1"),
+                         "/api/dashboards/uid/:id/versions")
+        self.assertEqual(dashboard.endpoint_of("http://grafana:3000/api/v1/provisioning/templates/pushover-disk-usage"),
+                         "/api/v1/provisioning/templates/:id")
+        self.assertEqual(dashboard.endpoint_of(
+            "http://grafana:3000/api/v1/provisioning/folder/monitoring/rule-groups/disk-monitoring-1"),
+            "/api/v1/provisioning/folder/:id/rule-groups/:id")
+        self.assertEqual(dashboard.endpoint_of("http://grafana:3000/api/v1/provisioning/alert-rules"),
+                         "/api/v1/provisioning/alert-rules")
+
+
+class RunMetricsTest(unittest.TestCase):
+    def setUp(self):
+        self.metrics = dashboard.RunMetrics()
+
+    def record(self, url, status=200, seconds=0.01, retries=0):
+        self.metrics.record_request("GET", url, status, 1760000000000000000, seconds, 10, 100, retries)
+
+    def test_requests_belong_to_the_innermost_phase_of_their_thread(self):
+        with self.metrics.phase('dashboard'):
+            self.record("http://grafana:3000/api/search")
+            with self.metrics.phase('build'):
+                self.record("http://grafana:3000/api/ds/query")
+            worker = threading.Thread(target=self.record, args=("http://grafana:3000/api/folders",))
+            worker.start()
+            worker.join()
+        self.assertEqual([request["phase"] for request in self.metrics.requests], ['dashboard', 'build', None])
+        self.assertEqual(set(self.metrics.phases), {'dashboard', 'build'})
+
+    def test_summary_per_endpoint(self):
+        for uid, status, seconds, retries in (("a", 200, 0.01, 0), ("b", 404, 0.03, 0), ("c", 200, 0.02, 2)):
+            self.record(f"http://grafana:3000/api/dashboards/uid/{uid}", status, seconds, retries)
+        summary = self.metrics.summary(command="deploy")
+
+        self.assertEqual(summary["run"]["command"], "deploy")
+        self.assertEqual((summary["run"]["requests"], summary["run"]["retries"]), (3, 2))
+        self.assertEqual(summary["run"]["response_bytes"], 300)
+        endpoint = summary["endpoints"]["GET /api/dashboards/uid/:id"]
+        self.assertEqual((endpoint["count"], endpoint["non_2xx"], endpoint["retries"]), (3, 1, 2))
+        self.assertEqual(endpoint["latency_ms"], {"p50": 20.0, "p95": 30.0, "max": 30.0})
+
+    def test_line_protocol_has_a_run_point_and_one_point_per_request(self):
+        with self.metrics.phase('rules'):
+            self.record("http://grafana:3000/api/v1/provisioning/alert-rules")
+        lines = self.metrics.line_protocol({"target": "blue"}, command="deploy", success=True).splitlines()
+
+        self.assertEqual(len(lines), 2)
+        run, request = lines
+        self.assertTrue(run.startswith("grafana_provisioning,command=deploy,target=blue "))
+        self.assertIn("phase_rules_s=", run)
+        self.assertIn("success=true", run)
+        self.assertTrue(request.startswith(
+            "grafana_provisioning_request,endpoint=/api/v1/provisioning/alert-rules,method=GET,"
+            "phase=rules,status=200,target=blue latency_ms=10.0,"))
+        self.assertTrue(request.endswith(" 1760000000000000000"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+import contextlib
+import io
+import tempfile
+import unittest
+
+from .helpers import dashboard, make_creator
+
+INVENTORY = """\
+all:
+  hosts:
+    db.example.com:
+  children:
+    storage:
+      hosts:
+        nas.example.com:
+        backup.example.com:
+    web:
+      hosts:
+        web1.example.com:
+        nas.example.com:
+"""
+
+
+def panel_hosts(model):
+    """Hosts whose tag filter appears in a dashboard's queries."""
+    return {tag["value"] for panel in model["panels"] for target in panel.get("targets", [])
+            for tag in target.get("tags", []) if tag["key"] == "host"}
+
+
+class ShardHostsTest(unittest.TestCase):
+    def setUp(self):
+        with tempfile.TemporaryDirectory() as root, contextlib.redirect_stdout(io.StringIO()):
+            self.creator = make_creator(root, inventory=INVENTORY)
+
+    def test_by_group_puts_each_host_in_its_first_group(self):
+        self.creator.shard_by = 'group'
+        self.assertEqual(self.creator.shard_hosts(), [
+            ('ungrouped', ['db.example.com']),
+            ('storage', ['nas.example.com', 'backup.example.com']),
+            ('web', ['web1.example.com'])
+        ])
+
+    def test_host_limit_splits_groups_further(self):
+        self.creator.shard_by = 'group'
+        self.creator.max_hosts_per_dashboard = 1
+        self.assertEqual([name for name, _ in self.creator.shard_hosts()],
+                         ['ungrouped', 'storage 1/2', 'storage 2/2', 'web'])
+
+    def test_host_limit_alone(self):
+        self.creator.max_hosts_per_dashboard = 3
+        self.assertEqual(self.creator.shard_hosts(), [
+            ('1/2', ['db.example.com', 'nas.example.com', 'backup.example.com']),
+            ('2/2', ['web1.example.com'])
+        ])
+        self.creator.max_hosts_per_dashboard = 4
+        self.assertEqual([name for name, _ in self.creator.shard_hosts()], ['all'])
+
+
+class ShardedDashboardsTest(unittest.TestCase):
+    def setUp(self):
+        with tempfile.TemporaryDirectory() as root, contextlib.redirect_stdout(io.StringIO()):
+            self.creator = make_creator(root, inventory=INVENTORY)
+        self.creator.shard_by = 'group'
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.dashboards = [dashboard_json["dashboard"] for dashboard_json in self.creator.build_dashboards()]
+
+    def test_index_then_one_dashboard_per_shard(self):
+        self.assertEqual([model["title"] for model in self.dashboards], [
+            dashboard.DASHBOARD_TITLE,
+            f"{dashboard.DASHBOARD_TITLE} - ungrouped",
+            f"{dashboard.DASHBOARD_TITLE} - storage",
+            f"{dashboard.DASHBOARD_TITLE} - web"
+        ])
+        for model in self.dashboards[1:]:
+            self.assertIn(dashboard.SHARD_TAG, model["tags"])
+        self.assertEqual(panel_hosts(self.dashboards[2]), {'nas.example.com', 'backup.example.com'})
+
+    def test_index_links_every_shard_and_runs_no_queries(self):
+        index = self.dashboards[0]
+        self.assertEqual(dashboard.dashboard_query_count(index), 0)
+        self.assertEqual(index["links"][0]["tags"], [dashboard.SHARD_TAG])
+        content = index["panels"][0]["options"]["content"]
+        for model in self.dashboards[1:]:
+            self.assertIn(f"[{model['title']}](/d/{self.creator.dashboard_uid(model['title'])})", content)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,124 @@
+import contextlib
+import io
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from .helpers import dashboard, make_creator, use_fake_grafana
+
+
+class PayloadMatchesTest(unittest.TestCase):
+    def test_server_side_fields_are_ignored(self):
+        payload = {"title": "Disk Usage Alert", "for": "5m"}
+        remote = dict(payload, uid="abc", id=3, updated="2026-01-01T00:00:00Z", provenance="api")
+        self.assertTrue(dashboard.payload_matches(payload, remote))
+
+    def test_omitted_defaults_match(self):
+        payload = {"title": "t", "labels": {}, "continue": False, "tags": [], "isPaused": False}
+        self.assertTrue(dashboard.payload_matches(payload, {"title": "t"}))
+
+    def test_missing_non_default_value_differs(self):
+        self.assertFalse(dashboard.payload_matches({"title": "t", "for": "5m"}, {"title": "t"}))
+        self.assertFalse(dashboard.payload_matches({"continue": True}, {}))
+
+    def test_changed_value_differs(self):
+        self.assertFalse(dashboard.payload_matches({"labels": {}}, {"labels": {"team": "db"}}))
+        self.assertFalse(dashboard.payload_matches({"title": "t"}, {"title": "u"}))
+
+    def test_ignored_keys_and_missing_remote(self):
+        self.assertTrue(dashboard.payload_matches({"id": None, "title": "t"}, {"id": 4, "title": "t"}, ignore=("id",)))
+        self.assertFalse(dashboard.payload_matches({"title": "t"}, None))
+
+
+class ProvisioningStateTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / 'state.json'
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_round_trip_per_target(self):
+        state = dashboard.ProvisioningState(self.path, 'http://grafana:3000/', org_id=2)
+        state.set('dashboard', 'Disk Monitoring', uid='dm-1', version=3, hash='h')
+        state.for_target('http://staging:3000').set('template', 'pushover-disk-usage', hash='t')
+        state.save()
+
+        reloaded = dashboard.ProvisioningState(self.path, 'http://grafana:3000', org_id=2)
+        self.assertEqual(reloaded.get('dashboard', 'Disk Monitoring'), {"uid": "dm-1", "version": 3, "hash": "h"})
+        self.assertIsNone(reloaded.get('template', 'pushover-disk-usage'))
+        self.assertEqual(reloaded.for_target('http://staging:3000').names('template'), ['pushover-disk-usage'])
+
+    def test_unchanged_state_is_not_rewritten(self):
+        state = dashboard.ProvisioningState(self.path, 'http://grafana:3000')
+        state.set('dashboard', 'Disk Monitoring', uid='dm-1')
+        state.save()
+        self.path.write_text(json.dumps(dict(json.loads(self.path.read_text()), marker=True)))
+        state = dashboard.ProvisioningState(self.path, 'http://grafana:3000')
+        state.set('dashboard', 'Disk Monitoring', uid='dm-1')
+        state.save()
+        self.assertTrue(json.loads(self.path.read_text())["marker"])
+
+    def test_reads_create_no_entries(self):
+        state = dashboard.ProvisioningState(self.path, 'http://grafana:3000')
+        state.get('dashboard', 'Disk Monitoring')
+        state.names('alert_rule')
+        self.assertEqual(state._data["targets"], {})
+
+    def test_unreadable_file_is_ignored(self):
+        self.path.write_text('{not json')
+        with contextlib.redirect_stdout(io.StringIO()) as output:
+            state = dashboard.ProvisioningState(self.path, 'http://grafana:3000')
+        self.assertIsNone(state.get('dashboard', 'Disk Monitoring'))
+        self.assertIn("Ignoring unreadable state file", output.getvalue())
+
+
+class SkipUnchangedWritesTest(unittest.TestCase):
+    def setUp(self):
+        with tempfile.TemporaryDirectory() as root, contextlib.redirect_stdout(io.StringIO()):
+            self.creator = make_creator(root)
+        self.dashboard_json = self.creator.create_dashboard_json()
+        self.model = self.dashboard_json["dashboard"]
+        self.uid = self.creator.stable_uid('dashboard', self.model["title"])
+        self.content_hash = dashboard.canonical_hash(
+            {key: value for key, value in self.model.items() if key not in dashboard.DASHBOARD_SERVER_FIELDS})
+
+    def write(self, routes):
+        http = use_fake_grafana(self.creator, routes)
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertTrue(self.creator.write_dashboard(self.dashboard_json))
+        return http
+
+    def test_cached_version_and_hash_cost_one_lookup(self):
+        self.creator.state.set('dashboard', self.model["title"], uid=self.uid, version=3, hash=self.content_hash)
+        http = self.write({('GET', f'/api/dashboards/uid/{self.uid}/versions'): (200, [{"version": 3}])})
+        self.assertEqual(http.calls, [('GET', f'/api/dashboards/uid/{self.uid}/versions')])
+        self.assertEqual(self.creator.write_stats, {'written': 0, 'skipped': 1})
+
+    def test_dashboard_edited_back_to_the_same_content_is_not_written(self):
+        self.creator.state.set('dashboard', self.model["title"], uid=self.uid, version=3, hash=self.content_hash)
+        stored = dict(self.model, uid=self.uid, id=12, version=4)
+        http = self.write({
+            ('GET', f'/api/dashboards/uid/{self.uid}/versions'): (200, {"versions": [{"version": 4}]}),
+            ('GET', f'/api/dashboards/uid/{self.uid}'): (200, {"dashboard": stored, "meta": {"version": 4}})
+        })
+        self.assertNotIn(('POST', '/api/dashboards/db'), http.calls)
+        self.assertEqual(self.creator.state.get('dashboard', self.model["title"])["version"], 4)
+
+    def test_unchanged_template_is_not_written(self):
+        template = self.creator.build_notification_template()
+        self.creator.state.set('template', template["name"], hash='old')
+        # Grafana adds a version and provenance to the stored template
+        stored = dict(template, version="v1", provenance="api")
+        http = use_fake_grafana(self.creator, {
+            ('GET', f'/api/v1/provisioning/templates/{template["name"]}'): (200, stored)
+        })
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertEqual(self.creator.create_notification_template(), template["name"])
+        self.assertEqual(len(http.calls), 1)
+        self.assertEqual(self.creator.write_stats, {'written': 0, 'skipped': 1})
+
+
+if __name__ == '__main__':
+    unittest.main()
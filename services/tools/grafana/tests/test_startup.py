@@ -0,0 +1,57 @@
+import contextlib
+import functools
+import io
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+from .helpers import SCRIPT, make_creator
+
+
+class LazyImportTest(unittest.TestCase):
+    def test_loading_the_script_imports_neither_yaml_nor_requests(self):
+        # A fresh interpreter, as the test runner may have imported either already
+        code = (
+            "import importlib.util, sys\n"
+            f"spec = importlib.util.spec_from_file_location('dashboard', {str(SCRIPT)!r})\n"
+            "spec.loader.exec_module(importlib.util.module_from_spec(spec))\n"
+            "print(sorted(name for name in ('yaml', 'requests') if name in sys.modules))\n"
+        )
+        result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+        self.assertEqual(result.stdout.strip(), "[]")
+
+
+class ProfileStartupTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.creator = make_creator(self.tmp.name)
+        # Profile against the test tree rather than this repository's inventory
+        self.creator.load_ansible_config = functools.partial(
+            type(self.creator).load_ansible_config, self.creator, Path(self.tmp.name) / 'services')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def profile(self, budget_ms):
+        with contextlib.redirect_stdout(io.StringIO()) as output:
+            within = self.creator.profile_startup(budget_ms)
+        return within, output.getvalue()
+
+    def test_reports_every_phase(self):
+        within, output = self.profile(60_000)
+        self.assertTrue(within)
+        for phase in ("imports", "config load", "JSON generation", "HTTP client import", "total"):
+            self.assertRegex(output, rf"{phase} +[\d.]+ms")
+        self.assertIn("✅ Startup within budget", output)
+
+    def test_over_budget_fails(self):
+        within, output = self.profile(0)
+        self.assertFalse(within)
+        self.assertIn("over the 0ms budget", output)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import contextlib
+import io
+import tempfile
+import unittest
+
+from .helpers import dashboard, make_creator, use_fake_grafana
+
+
+class StateLookupTest(unittest.TestCase):
+    def setUp(self):
+        with tempfile.TemporaryDirectory() as root, contextlib.redirect_stdout(io.StringIO()):
+            self.creator = make_creator(root)
+
+    def run_quietly(self, func, *args):
+        with contextlib.redirect_stdout(io.StringIO()) as output:
+            result = func(*args)
+        return result, output.getvalue()
+
+    def test_dashboard_uid_prefers_the_cached_uid(self):
+        self.assertEqual(self.creator.dashboard_uid("Disk Monitoring"),
+                         self.creator.stable_uid('dashboard', "Disk Monitoring"))
+        self.creator.state.set('dashboard', "Disk Monitoring", uid='adopted', version=1, hash='h')
+        self.assertEqual(self.creator.dashboard_uid("Disk Monitoring"), 'adopted')
+
+    def test_stale_dashboard_entry_is_forgotten_and_replaced_after_the_write(self):
+        dashboard_json = self.creator.create_dashboard_json()
+        title = dashboard_json["dashboard"]["title"]
+        uid = self.creator.stable_uid('dashboard', title)
+        self.creator.state.set('dashboard', title, uid='deleted', version=7, hash='h')
+        http = use_fake_grafana(self.creator, {
+            ('GET', '/api/search'): (200, []),
+            ('POST', '/api/dashboards/db'): (200, {"uid": uid, "version": 1})
+        })
+        ok, output = self.run_quietly(self.creator.write_dashboard, dashboard_json)
+
+        self.assertTrue(ok)
+        self.assertIn("Cached dashboard UID deleted not found", output)
+        self.assertEqual(http.calls[:2], [('GET', '/api/dashboards/uid/deleted/versions'),
+                                          ('GET', f'/api/dashboards/uid/{uid}')])
+        self.assertEqual(self.creator.state.get('dashboard', title)["uid"], uid)
+        self.assertEqual(self.creator.state.get('dashboard', title)["version"], 1)
+
+    def test_cached_alert_rule_is_fetched_by_uid(self):
+        self.creator.state.set('alert_rule', "Disk Usage Alert", uid='cached')
+        http = use_fake_grafana(self.creator, {
+            ('GET', '/api/v1/provisioning/alert-rules/cached'): (200, {"uid": "cached", "title": "Disk Usage Alert"})
+        })
+        rule, _ = self.run_quietly(self.creator.find_existing_alert_rule, "Disk Usage Alert")
+        self.assertEqual(rule["uid"], 'cached')
+        self.assertEqual(http.calls, [('GET', '/api/v1/provisioning/alert-rules/cached')])
+
+    def test_alert_rule_renamed_in_grafana_is_forgotten(self):
+        uid = self.creator.stable_uid('alert_rule', "Disk Usage Alert")
+        self.creator.state.set('alert_rule', "Disk Usage Alert", uid='cached')
+        http = use_fake_grafana(self.creator, {
+            ('GET', '/api/v1/provisioning/alert-rules/cached'): (200, {"uid": "cached", "title": "Renamed"}),
+            ('GET', f'/api/v1/provisioning/alert-rules/{uid}'): (200, {"uid": uid, "title": "Disk Usage Alert"})
+        })
+        rule, _ = self.run_quietly(self.creator.find_existing_alert_rule, "Disk Usage Alert")
+        self.assertEqual(rule["uid"], uid)
+        self.assertIsNone(self.creator.state.get('alert_rule', "Disk Usage Alert"))
+        self.assertEqual(len(http.calls), 2)
+
+    def test_missing_cached_template_falls_back_to_the_list(self):
+        template = self.creator.build_notification_template()
+        self.creator.state.set('template', template["name"], hash='old')
+        http = use_fake_grafana(self.creator, {
+            ('GET', '/api/v1/provisioning/templates'): (200, []),
+            ('POST', '/api/v1/provisioning/templates'): (201, {})
+        })
+        name, _ = self.run_quietly(self.creator.create_notification_template)
+        self.assertEqual(name, template["name"])
+        self.assertEqual(http.calls, [('GET', f'/api/v1/provisioning/templates/{template["name"]}'),
+                                      ('GET', '/api/v1/provisioning/templates'),
+                                      ('POST', '/api/v1/provisioning/templates')])
+        self.assertEqual(self.creator.state.get('template', template["name"]),
+                         {"hash": dashboard.canonical_hash(template)})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,123 @@
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from .helpers import dashboard, make_creator
+
+# Created per creator and never shared between targets
+PER_RUN_FIELDS = {'grafana_url', 'api_key', 'headers', 'org_id', 'metrics', 'http', 'state', 'collections',
+                  'write_stats', '_write_stats_lock'}
+
+
+class LoadTargetsTest(unittest.TestCase):
+    def load(self, content):
+        with tempfile.TemporaryDirectory() as root:
+            path = Path(root) / 'targets.yml'
+            path.write_text(content)
+            with mock.patch.dict(os.environ, {"GRAFANA_API_KEY": "key", "BLUE_KEY": "blue"}):
+                return dashboard.load_targets(path)
+
+    def test_reads_targets_with_keys_from_the_environment(self):
+        targets = self.load("targets:\n"
+                            "  - {name: blue, url: 'http://blue:3000', api_key_env: BLUE_KEY}\n"
+                            "  - {name: staging, url: 'http://staging:3000', org_id: 2}\n")
+        self.assertEqual(targets, [
+            {"name": "blue", "url": "http://blue:3000", "org_id": None, "api_key": "blue"},
+            {"name": "staging", "url": "http://staging:3000", "org_id": 2, "api_key": "key"}
+        ])
+
+    def test_rejects_malformed_files(self):
+        for content in ("targets:\n  - http://blue:3000\n",
+                        "targets: http://blue:3000\n",
+                        "targets:\n  - {name: blue}\n",
+                        "targets:\n  - {name: a, url: x}\n  - {name: a, url: y}\n",
+                        "targets:\n  - {name: a, url: x, api_key_env: MISSING_KEY}\n",
+                        "targets: []\n"):
+            with self.assertRaises(ValueError, msg=content):
+                self.load(content)
+
+
+class ForTargetTest(unittest.TestCase):
+    def test_copies_configuration_and_owns_per_run_state(self):
+        with tempfile.TemporaryDirectory() as root, contextlib.redirect_stdout(io.StringIO()):
+            creator = make_creator(root)
+        creator.layout = 'repeat'
+        target = creator.for_target('http://green:3000', 'green-key', org_id=2)
+
+        # Any attribute the creator gained must either carry over or be created per target
+        self.assertEqual(set(vars(target)), set(vars(creator)))
+        for name in set(vars(creator)) - PER_RUN_FIELDS:
+            self.assertIs(getattr(target, name), getattr(creator, name), name)
+        for name in PER_RUN_FIELDS - {'grafana_url', 'org_id'}:
+            self.assertIsNot(getattr(target, name), getattr(creator, name), name)
+        self.assertEqual(target.headers['X-Grafana-Org-Id'], '2')
+        self.assertEqual(target.state.target, 'http://green:3000#org=2')
+
+
+class PrefixedOutputTest(unittest.TestCase):
+    def setUp(self):
+        self.stream = io.StringIO()
+        self.output = dashboard.PrefixedOutput(self.stream)
+
+    def test_unprefixed_text_passes_through(self):
+        self.output.write("plain")
+        self.assertEqual(self.stream.getvalue(), "plain")
+
+    def test_each_thread_prefixes_whole_lines(self):
+        def report(name):
+            with dashboard.PrefixedOutput.prefixed(f"[{name}] "):
+                for number in range(50):
+                    self.output.write(f"step {number}")
+                    self.output.write(" done\n")
+
+        threads = [threading.Thread(target=report, args=(name,)) for name in ("blue", "green")]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        lines = self.stream.getvalue().splitlines()
+        self.assertEqual(len(lines), 100)
+        for name in ("blue", "green"):
+            self.assertEqual([line for line in lines if line.startswith(f"[{name}] ")],
+                             [f"[{name}] step {number} done" for number in range(50)])
+
+    def test_unfinished_line_ends_with_its_block(self):
+        with mock.patch.object(sys, 'stdout', self.output):
+            with dashboard.PrefixedOutput.prefixed("[blue] "):
+                print("Updating", end="")
+            print("after")
+        self.assertEqual(self.stream.getvalue(), "[blue] Updating\nafter\n")
+
+    def test_nested_prefix_is_restored(self):
+        with dashboard.PrefixedOutput.prefixed("[blue] "):
+            with dashboard.PrefixedOutput.prefixed("[green] "):
+                self.output.write("inner\n")
+            self.output.write("outer\n")
+        self.assertEqual(self.stream.getvalue(), "[green] inner\n[blue] outer\n")
+
+
+class ProvisionTargetsTest(unittest.TestCase):
+    def test_failing_target_leaves_the_others_alone(self):
+        with tempfile.TemporaryDirectory() as root, contextlib.redirect_stdout(io.StringIO()):
+            creator = make_creator(root)
+        targets = {name: creator.for_target(f'http://{name}:3000', 'key') for name in ("blue", "green")}
+        targets["blue"].provision = lambda with_alerts, concurrency: True
+        targets["green"].provision = mock.Mock(side_effect=RuntimeError("connection refused"))
+
+        stream = io.StringIO()
+        with mock.patch.object(sys, 'stdout', dashboard.PrefixedOutput(stream)):
+            results = creator.provision_targets(targets)
+
+        self.assertEqual({name: success for name, (success, _) in results.items()}, {"blue": True, "green": False})
+        self.assertIn("[green] ❌ Error: connection refused", stream.getvalue())
+        self.assertIs(targets["blue"].prebuilt_dashboards, creator.prebuilt_dashboards)
+
+
+if __name__ == '__main__':
+    unittest.main()
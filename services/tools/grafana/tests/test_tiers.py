@@ -0,0 +1,37 @@
+import contextlib
+import io
+import tempfile
+import unittest
+
+from .helpers import DEFAULTS, make_creator
+
+FAST_HOST = {"nas.example.com": "telegraf_collection_tier: fast\n"}
+
+
+class CollectionTiersTest(unittest.TestCase):
+    def creator(self, defaults=DEFAULTS):
+        output = io.StringIO()
+        with tempfile.TemporaryDirectory() as root, contextlib.redirect_stdout(output):
+            creator = make_creator(root, defaults, host_vars=FAST_HOST)
+        return creator, output.getvalue()
+
+    def test_fast_tier_window_covers_three_intervals_and_flush(self):
+        creator, _ = self.creator()
+        self.assertEqual(creator.tiers["fast"]["staleness_minutes"], 1)
+
+    def test_aggregation_widens_windows_to_the_dedup_interval(self):
+        # An idle host re-sends unchanged disk points only every 150s
+        creator, _ = self.creator(DEFAULTS + "telegraf_aggregation: true\n")
+        self.assertEqual(creator.tiers["fast"]["staleness_minutes"], 3)
+        # Slow tiers already wait longer than that
+        self.assertEqual(creator.tiers["slow"]["staleness_minutes"], 25)
+
+    def test_warns_about_explicit_tier_window_below_dedup_interval(self):
+        _, output = self.creator(DEFAULTS + "telegraf_aggregation: true\n"
+                                 "telegraf_collection_tiers:\n"
+                                 "  fast: {interval: 10s, flush_interval: 10s, max_data_staleness_minutes: 1}\n")
+        self.assertIn("Tier 'fast': max_data_staleness_minutes (1m) is shorter than telegraf_dedup_interval", output)
+
+
+if __name__ == '__main__':
+    unittest.main()
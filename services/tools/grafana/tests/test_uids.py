@@ -0,0 +1,71 @@
+import contextlib
+import io
+import tempfile
+import unittest
+
+from .helpers import DEFAULTS, dashboard, make_creator, use_fake_grafana
+
+STALENESS = dashboard.STALENESS_ALERT_TITLE
+
+
+class StableUidTest(unittest.TestCase):
+    def test_same_identity_same_uid(self):
+        uid = dashboard.stable_uid("inventory.yml:disk_monitoring", "dashboard", "Disk Monitoring")
+        self.assertEqual(uid, dashboard.stable_uid("inventory.yml:disk_monitoring", "dashboard", "Disk Monitoring"))
+        self.assertTrue(uid.startswith("dm-"))
+        self.assertLessEqual(len(uid), 40)
+
+    def test_every_part_of_the_identity_counts(self):
+        uids = {
+            dashboard.stable_uid("inventory.yml:disk_monitoring", "dashboard", "Disk Monitoring"),
+            dashboard.stable_uid("staging.yml:disk_monitoring", "dashboard", "Disk Monitoring"),
+            dashboard.stable_uid("inventory.yml:disk_monitoring", "alert_rule", "Disk Monitoring"),
+            dashboard.stable_uid("inventory.yml:disk_monitoring", "dashboard", "Disk Monitoring - I/O")
+        }
+        self.assertEqual(len(uids), 4)
+
+
+class CreatorUidTest(unittest.TestCase):
+    def creator(self, defaults=DEFAULTS):
+        with tempfile.TemporaryDirectory() as root, contextlib.redirect_stdout(io.StringIO()):
+            return make_creator(root, defaults)
+
+    def test_uids_follow_the_inventory_and_database(self):
+        first, second = self.creator(), self.creator()
+        other = self.creator(DEFAULTS.replace("influxdb_database: disk_monitoring", "influxdb_database: staging"))
+        self.assertEqual(first.stable_uid('dashboard', "Disk Monitoring"),
+                         second.stable_uid('dashboard', "Disk Monitoring"))
+        self.assertNotEqual(first.stable_uid('dashboard', "Disk Monitoring"),
+                            other.stable_uid('dashboard', "Disk Monitoring"))
+
+    def test_new_dashboard_is_created_with_its_stable_uid(self):
+        creator = self.creator()
+        dashboard_json = creator.create_dashboard_json()
+        uid = creator.stable_uid('dashboard', dashboard_json["dashboard"]["title"])
+        http = use_fake_grafana(creator, {
+            ('GET', '/api/search'): (200, []),
+            ('POST', '/api/dashboards/db'): (200, {"uid": uid, "version": 1})
+        })
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertTrue(creator.write_dashboard(dashboard_json))
+        self.assertEqual(http.bodies[('POST', '/api/dashboards/db')]["dashboard"]["uid"], uid)
+
+    def test_rules_get_stable_uids_and_legacy_rules_keep_theirs(self):
+        creator = self.creator()
+        group = creator.rule_group("Disk Usage Alert")[0]
+        legacy = {"uid": "legacy", "title": STALENESS, "folderUID": "monitoring"}
+        http = use_fake_grafana(creator, {
+            ('GET', '/api/v1/provisioning/alert-rules'): (200, [legacy]),
+            ('PUT', f'/api/v1/provisioning/folder/monitoring/rule-groups/{group}'): (200, {})
+        })
+        builders = [creator.build_alert_rule, creator.build_data_freshness_alert_rule]
+        with contextlib.redirect_stdout(io.StringIO()):
+            uids = creator.write_rule_group(group, 60, builders)
+
+        self.assertEqual(uids, {"Disk Usage Alert": creator.stable_uid('alert_rule', "Disk Usage Alert"),
+                                STALENESS: "legacy"})
+        self.assertNotIn(('GET', '/api/search'), http.calls)
+
+
+if __name__ == '__main__':
+    unittest.main()